@@ -0,0 +1,119 @@
+"""Semantic cache of generated answers for repeated document questions.
+
+An answer is reused when a new question is semantically close to a cached
+one (cosine similarity above a threshold) *and* the chunks the cached answer
+was generated from are among the new question's retrieved candidates. A
+paraphrase reorders and reshuffles the candidate list, especially after
+keyword fusion, but still retrieves the few chunks an answer was built on,
+so it can hit. Matching against the candidates rather than the new re-ranked
+selection lets a hit skip re-ranking. Entries are evicted by LRU and TTL and
+dropped when the documents they were built from are replaced.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CachedAnswer(NamedTuple):
+    """A cached answer, its question's embedding and the context chunks it was generated from."""
+    embedding: np.ndarray
+    context_ids: frozenset
+    filenames: frozenset
+    answer: str
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """LRU/TTL cache of answers keyed by query embedding and context chunks.
+
+    Args:
+        threshold: Minimum cosine similarity between query embeddings for a
+            cached answer to be reused.
+        max_entries: Maximum number of cached answers (least recently used
+            are evicted first).
+        ttl_seconds: Age after which an entry is discarded.
+        min_overlap: Fraction of a cached answer's context chunks that must
+            be among the new question's candidates for it to be reused.
+    """
+
+    def __init__(
+        self, threshold: float = 0.95, max_entries: int = 512, ttl_seconds: float = 3600, min_overlap: float = 1.0
+    ):
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, query_embedding, candidate_ids: Iterable[str]) -> Optional[str]:
+        """Return a cached answer for a similar question whose context is among ``candidate_ids``, if any."""
+        retrieved = frozenset(candidate_ids)
+        query = self._normalize(query_embedding)
+        with self._lock:
+            self._expire(time.monotonic())
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if len(entry.context_ids & retrieved) >= self.min_overlap * len(entry.context_ids)
+            ]
+            if candidates:
+                similarities = np.stack([entry.embedding for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    logger.info(f"Answer cache hit (similarity {similarities[best]:.3f})")
+                    return entry.answer
+            self.misses += 1
+            return None
+
+    def store(self, query_embedding, context_ids: Iterable[str], filenames: Iterable[str], answer: str) -> None:
+        """Cache an answer generated from the given context chunks."""
+        entry = CachedAnswer(
+            self._normalize(query_embedding), frozenset(context_ids), frozenset(filenames), answer, time.monotonic()
+        )
+        with self._lock:
+            self._entries[self._next_key] = entry
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_files(self, filenames: Iterable[str]) -> int:
+        """Drop answers built from any of these documents; returns how many were removed."""
+        changed = set(filenames)
+        with self._lock:
+            stale: List[int] = [key for key, entry in self._entries.items() if entry.filenames & changed]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(f"Answer cache: invalidated {len(stale)} answers for changed documents")
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove every cached answer."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,118 @@
+"""Compare the character chunker with the token-aware sentence chunker.
+
+Reports chunking throughput, how many chunks exceed the embedding model's
+token limit (and are therefore silently truncated when embedded), and
+retrieval hit-rate@k on the synthetic corpus's labelled questions.
+
+Usage:
+    uv run python -m benchmarks.chunking --documents 10 --pages 30 --json results.json
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from benchmarks.corpus import generate_corpus
+from pdf_processing import (
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_OVERLAP_TOKENS,
+    DEFAULT_TOKENIZER,
+    chunk_text,
+    get_token_counter,
+    iter_token_chunks,
+)
+
+
+def run_chunker(name: str, chunker: Callable[[List], List[str]], corpus, count_tokens) -> Dict:
+    """Chunk every document, timing the chunker and measuring chunk token sizes."""
+    chunks_by_doc = []
+    start = time.perf_counter()
+    for _, pages, _ in corpus:
+        chunks_by_doc.append(chunker(pages))
+    elapsed = time.perf_counter() - start
+
+    all_chunks = [chunk for chunks in chunks_by_doc for chunk in chunks]
+    tokens = count_tokens(all_chunks)
+    total_chars = sum(len(text) for _, pages, _ in corpus for _, text in pages)
+    return {
+        "name": name,
+        "chunks": all_chunks,
+        "chunks_by_doc": chunks_by_doc,
+        "seconds": elapsed,
+        "chunks_per_sec": len(all_chunks) / elapsed if elapsed else float("inf"),
+        "mb_per_sec": total_chars / 1e6 / elapsed if elapsed else float("inf"),
+        "num_chunks": len(all_chunks),
+        "mean_tokens": float(tokens.mean()) if len(tokens) else 0.0,
+        "max_tokens": int(tokens.max()) if len(tokens) else 0,
+        "truncated_fraction": float((tokens > DEFAULT_MAX_TOKENS).mean()) if len(tokens) else 0.0,
+    }
+
+
+def hit_rate(result: Dict, corpus, model, top_k: int) -> float:
+    """Fraction of questions whose top-k chunks contain the planted answer."""
+    chunks = result["chunks"]
+    chunk_vectors = model.encode(chunks, normalize_embeddings=True, batch_size=64)
+    facts = [fact for _, _, doc_facts in corpus for fact in doc_facts]
+    query_vectors = model.encode([f.question for f in facts], normalize_embeddings=True)
+
+    scores = query_vectors @ chunk_vectors.T
+    top = np.argsort(-scores, axis=1)[:, :top_k]
+    hits = sum(any(fact.answer in chunks[i] for i in row) for fact, row in zip(facts, top))
+    return hits / len(facts) if facts else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=30)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--skip-retrieval", action="store_true", help="Only measure chunking throughput")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.documents, args.pages)
+    count_tokens = get_token_counter(DEFAULT_TOKENIZER)
+
+    results = [
+        run_chunker(
+            "character (1000/200)",
+            lambda pages: chunk_text("\n".join(text for _, text in pages)),
+            corpus,
+            count_tokens,
+        ),
+        run_chunker(
+            f"token ({DEFAULT_MAX_TOKENS}/{DEFAULT_OVERLAP_TOKENS})",
+            lambda pages: [c.text for c in iter_token_chunks(pages, count_tokens)],
+            corpus,
+            count_tokens,
+        ),
+    ]
+
+    if not args.skip_retrieval:
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(DEFAULT_TOKENIZER)
+        for result in results:
+            result[f"hit_rate@{args.top_k}"] = hit_rate(result, corpus, model, args.top_k)
+
+    report = []
+    for result in results:
+        summary = {k: v for k, v in result.items() if k not in ("chunks", "chunks_by_doc")}
+        report.append(summary)
+        print(
+            f"{summary['name']:<24} chunks={summary['num_chunks']:<6} "
+            f"{summary['chunks_per_sec']:>10.0f} chunks/s {summary['mb_per_sec']:>7.2f} MB/s "
+            f"mean_tokens={summary['mean_tokens']:.0f} max_tokens={summary['max_tokens']} "
+            f"truncated={summary['truncated_fraction']:.1%}"
+            + (f" hit@{args.top_k}={summary[f'hit_rate@{args.top_k}']:.1%}" if not args.skip_retrieval else "")
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
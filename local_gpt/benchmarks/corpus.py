@@ -0,0 +1,119 @@
+"""Deterministic synthetic corpus for the local_gpt benchmarks.
+
+Documents are made of filler prose with labelled "fact" sentences planted at
+known pages. Each fact comes with a question whose answer is a unique
+identifier, so retrieval quality can be scored by checking whether a
+retrieved chunk contains that identifier. :func:`write_pdf` renders the
+pages as real PDF files so extraction can be benchmarked too.
+"""
+import os
+import random
+import textwrap
+from typing import List, NamedTuple, Tuple
+
+FILLER_WORDS = (
+    "system process module value report section policy customer service "
+    "device network account record output signal review budget schedule "
+    "quality support update request response operator manual standard "
+    "contract period storage control interface measure result analysis"
+).split()
+
+SUBJECTS = (
+    "pump", "valve", "sensor", "router", "turbine", "compressor", "gateway",
+    "controller", "inverter", "battery", "relay", "scanner", "printer", "drive",
+)
+
+QUALIFIERS = (
+    "primary", "backup", "northern", "southern", "auxiliary", "external",
+    "internal", "secondary", "legacy", "portable", "central", "remote",
+)
+
+
+class Fact(NamedTuple):
+    """A planted sentence, the question that targets it and its answer key."""
+    question: str
+    answer: str
+    page: int
+
+
+def _filler_sentence(rng: random.Random) -> str:
+    words = rng.choices(FILLER_WORDS, k=rng.randint(8, 28))
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([".", ".", ".", "?", "!"])
+
+
+def generate_document(
+    seed: int, num_pages: int = 20, sentences_per_page: int = 25, facts_per_page: float = 0.5
+) -> Tuple[List[Tuple[int, str]], List[Fact]]:
+    """Generate ``(page_number, text)`` pages and the facts planted in them."""
+    rng = random.Random(seed)
+    pages = []
+    facts = []
+    for page_number in range(1, num_pages + 1):
+        sentences = [_filler_sentence(rng) for _ in range(sentences_per_page)]
+        if rng.random() < facts_per_page:
+            subject = f"{rng.choice(QUALIFIERS)} {rng.choice(SUBJECTS)} {rng.randint(100, 999)}"
+            answer = f"KX-{rng.randint(10000, 99999)}-{seed}"
+            sentences.insert(
+                rng.randrange(len(sentences)),
+                f"The calibration code assigned to the {subject} is {answer}.",
+            )
+            facts.append(Fact(f"What is the calibration code of the {subject}?", answer, page_number))
+        pages.append((page_number, " ".join(sentences)))
+    return pages, facts
+
+
+def generate_corpus(
+    num_documents: int = 10, num_pages: int = 20, sentences_per_page: int = 25, seed: int = 0
+) -> List[Tuple[str, List[Tuple[int, str]], List[Fact]]]:
+    """Generate ``(filename, pages, facts)`` for several synthetic documents."""
+    return [
+        (f"synthetic_{seed + i:04d}.pdf",) + generate_document(seed + i, num_pages, sentences_per_page)
+        for i in range(num_documents)
+    ]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf(pages: List[Tuple[int, str]], line_width: int = 95) -> bytes:
+    """Render text pages as a minimal PDF (Helvetica, one text object per page).
+
+    Lines are wrapped at word boundaries, so identifiers survive extraction
+    intact; pages longer than an A4 sheet simply run off the bottom.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_refs = []
+    for _, text in pages:
+        lines = textwrap.wrap(text, line_width) or [""]
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines) + " ET"
+        stream_bytes = stream.encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream_bytes), stream_bytes))
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(len(objects))
+    kids = " ".join(f"{ref} 0 R" for ref in page_refs).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_refs))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def write_pdf(pages: List[Tuple[int, str]], path: str) -> str:
+    """Write ``pages`` to ``path`` as a PDF and return the path."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(render_pdf(pages))
+    return path
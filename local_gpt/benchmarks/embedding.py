@@ -0,0 +1,83 @@
+"""Compare embedding backends: chunks/sec and agreement with PyTorch.
+
+Chunks the synthetic corpus with the app's token-aware chunker, embeds
+every chunk with each backend and reports throughput. It also reports the
+mean and minimum cosine similarity of each backend's vectors to the
+PyTorch reference.
+
+Usage:
+    uv run python -m benchmarks.embedding --documents 5 --pages 20 --batch-size 64 --threads 4 --json embedding.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks.corpus import generate_corpus
+from embedding_backends import create_embedding_backend
+from pdf_processing import DEFAULT_TOKENIZER, get_token_counter, iter_token_chunks
+
+CONFIGURATIONS = [
+    ("torch", {"backend": "torch"}),
+    ("onnx", {"backend": "onnx"}),
+    ("onnx-int8", {"backend": "onnx", "quantize": True}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0: runtime default)")
+    parser.add_argument("--backends", nargs="+", default=[name for name, _ in CONFIGURATIONS])
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    count_tokens = get_token_counter(DEFAULT_TOKENIZER)
+    chunks = [
+        chunk.text
+        for _, pages, _ in generate_corpus(args.documents, args.pages)
+        for chunk in iter_token_chunks(pages, count_tokens)
+    ]
+    print(f"{len(chunks)} chunks, batch size {args.batch_size}, threads {args.threads or 'default'}")
+
+    reference = None
+    results = []
+    for name, options in CONFIGURATIONS:
+        if name not in args.backends and name != "torch":
+            continue
+        backend = create_embedding_backend(
+            model_name=DEFAULT_TOKENIZER, batch_size=args.batch_size, threads=args.threads or None, **options
+        )
+        backend.encode(chunks[:args.batch_size])  # warm up
+        start = time.perf_counter()
+        vectors = backend.encode(chunks)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = vectors
+        if name not in args.backends:
+            continue
+        cosines = np.sum(vectors * reference, axis=1)
+        result = {
+            "name": name,
+            "seconds": elapsed,
+            "chunks_per_sec": len(chunks) / elapsed if elapsed else float("inf"),
+            "mean_cosine_vs_torch": float(cosines.mean()),
+            "min_cosine_vs_torch": float(cosines.min()),
+        }
+        results.append(result)
+        print(
+            f"{name:<10} {result['chunks_per_sec']:>8.1f} chunks/s "
+            f"cosine vs torch mean={result['mean_cosine_vs_torch']:.4f} min={result['min_cosine_vs_torch']:.4f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "num_chunks": len(chunks), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""End-to-end ingestion and retrieval benchmark for local_gpt.
+
+Runs fully offline. The synthetic corpus is rendered to real PDF files
+and ingested through ``main.ingest_pdfs``, i.e. the ingestion queue,
+into throwaway stores in a temporary directory. Questions then go through the app's retrieval path
+(hybrid search, re-ranking, MMR) and a stubbed Ollama client, so no model
+server is needed.
+
+Reports:
+    * extraction pages/sec (single process, PyPDF2)
+    * embedding chunks/sec (encoder only, no cache)
+    * ingestion wall time and chunks/sec (extraction + chunking + embedding + storage)
+    * p50/p95 query latency for retrieval and for the full answer path
+    * recall@k of the search results and of the chunks selected as context
+    * memory high-water mark of this process and of the extraction workers
+
+Usage:
+    uv run python -m benchmarks.pipeline --documents 20 --pages 30 --json run.json
+    uv run python -m benchmarks.pipeline --json new.json --baseline run.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.corpus import generate_corpus, write_pdf
+from pdf_processing import iter_pdf_pages
+
+
+class StubOllamaClient:
+    """Stand-in for ``ollama.AsyncClient`` that streams a canned answer.
+
+    Args:
+        answer_tokens: Number of tokens in every answer.
+        tokens_per_second: Simulated generation speed; 0 streams instantly.
+    """
+
+    def __init__(self, answer_tokens: int = 64, tokens_per_second: float = 0):
+        self.answer_tokens = answer_tokens
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+
+    async def _stream(self):
+        for i in range(self.answer_tokens):
+            if self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield {"message": {"role": "assistant", "content": f"token{i} "}, "done": i == self.answer_tokens - 1}
+
+    async def chat(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        self.calls += 1
+        if stream:
+            return self._stream()
+        content = " ".join(f"token{i}" for i in range(self.answer_tokens))
+        return {"message": {"role": "assistant", "content": content}, "done": True}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Return the ``q``-th percentile (0-100) by linear interpolation."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def max_rss_mb(who: int) -> float:
+    """Peak resident set size in MB for ``RUSAGE_SELF`` or ``RUSAGE_CHILDREN``."""
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def answer(app, question: str, top_k: int) -> Dict:
+    """Run one question through retrieval and the (stubbed) LLM, timing each stage."""
+    started = time.perf_counter()
+    n_results = app.RERANK_CANDIDATES if app.RERANK_ENABLED else max(5, top_k)
+    results = await app.search_documents_async(question, n_results=n_results)
+    selected = await app.rerank_pool.run(app.select_context, question, results) if results["documents"] else []
+    retrieved = time.perf_counter()
+
+    context = "\n\n".join(results["documents"][i] for i in selected)
+    messages = [
+        {"role": "system", "content": app.SYSTEM_PROMPT},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"},
+    ]
+    async with app.llm_pool.slot():
+        stream = await app.ollama_client.chat(model=app.OLLAMA_MODEL, messages=messages, stream=True)
+        async for _ in stream:
+            pass
+    finished = time.perf_counter()
+    return {
+        "retrieval_seconds": retrieved - started,
+        "total_seconds": finished - started,
+        "top_k": results["documents"][:top_k],
+        "context": [results["documents"][i] for i in selected],
+    }
+
+
+async def run(args, workdir: str) -> Dict:
+    corpus = generate_corpus(args.documents, args.pages, seed=args.seed)
+    paths = [write_pdf(pages, os.path.join(workdir, "pdfs", filename)) for filename, pages, _ in corpus]
+    facts = [fact for _, _, doc_facts in corpus for fact in doc_facts]
+
+    # Extraction alone, in this process
+    started = time.perf_counter()
+    extracted_pages = sum(1 for path in paths for _ in iter_pdf_pages(path))
+    extraction_seconds = time.perf_counter() - started
+
+    # Stores must point at the temporary directory before main is imported
+    os.environ["CHROMA_DB_PATH"] = os.path.join(workdir, "chroma_db")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(workdir, "embedding_cache")
+    os.environ["INGEST_QUEUE_PATH"] = os.path.join(workdir, "ingest_queue")
+    if args.no_rerank:
+        os.environ["RERANK_ENABLED"] = "false"
+    import main as app
+
+    logging.getLogger().setLevel(logging.WARNING)
+    app.ollama_client = StubOllamaClient(args.answer_tokens, args.tokens_per_second)
+    app.warm_up()
+
+    # Encoder throughput without the embedding cache
+    chunk_texts = [chunk.text for path in paths for chunk in app.chunk_document(path)[0]]
+    started = time.perf_counter()
+    app.get_embedding_model().encode(chunk_texts)
+    embedding_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    ingested = await app.ingest_pdfs([(os.path.basename(path), path) for path in paths])
+    ingestion_seconds = time.perf_counter() - started
+    ingested_chunks = sum(result["chunks"] for result in ingested)
+    errors = [result for result in ingested if result["status"] == "error"]
+
+    timings = []
+    retrieval_hits = context_hits = 0
+    for fact in facts:
+        result = await answer(app, fact.question, args.top_k)
+        timings.append(result)
+        retrieval_hits += any(fact.answer in doc for doc in result["top_k"])
+        context_hits += any(fact.answer in doc for doc in result["context"])
+    # Concurrent queries exercise the pools the way several users would
+    started = time.perf_counter()
+    await asyncio.gather(*(answer(app, fact.question, args.top_k) for fact in facts[:args.concurrency]))
+    concurrent_seconds = time.perf_counter() - started
+
+    # Wait for the extraction workers to exit so their peak memory is counted
+    app.extraction_pool.executor.shutdown(wait=True)
+
+    retrieval = [t["retrieval_seconds"] * 1000 for t in timings]
+    total = [t["total_seconds"] * 1000 for t in timings]
+    return {
+        "documents": len(paths),
+        "pages": extracted_pages,
+        "chunks": ingested_chunks,
+        "questions": len(facts),
+        "ingest_errors": len(errors),
+        "extraction_pages_per_sec": extracted_pages / extraction_seconds if extraction_seconds else 0.0,
+        "embedding_chunks_per_sec": len(chunk_texts) / embedding_seconds if embedding_seconds else 0.0,
+        "ingestion_seconds": ingestion_seconds,
+        "ingestion_chunks_per_sec": ingested_chunks / ingestion_seconds if ingestion_seconds else 0.0,
+        "retrieval_p50_ms": percentile(retrieval, 50),
+        "retrieval_p95_ms": percentile(retrieval, 95),
+        "query_p50_ms": percentile(total, 50),
+        "query_p95_ms": percentile(total, 95),
+        "concurrent_queries": min(args.concurrency, len(facts)),
+        "concurrent_seconds": concurrent_seconds,
+        f"recall@{args.top_k}": retrieval_hits / len(facts) if facts else 0.0,
+        "context_recall": context_hits / len(facts) if facts else 0.0,
+        "max_rss_mb": max_rss_mb(resource.RUSAGE_SELF),
+        "max_rss_workers_mb": max_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def print_comparison(results: Dict, baseline: Dict) -> None:
+    """Print each numeric metric next to the baseline run's value."""
+    for key, value in results.items():
+        before = baseline.get(key)
+        if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+            print(f"{key:<28} {before:>12.2f} -> {value:>12.2f} ({(value - before) / before:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8, help="Questions sent at once in the concurrent phase")
+    parser.add_argument("--answer-tokens", type=int, default=64)
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="Simulated LLM speed (0: instant)")
+    parser.add_argument("--no-rerank", action="store_true", help="Disable cross-encoder re-ranking")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = asyncio.run(run(args, workdir))
+
+    for key, value in results.items():
+        print(f"{key:<28} {value:.2f}" if isinstance(value, float) else f"{key:<28} {value}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            print("\nCompared with", args.baseline)
+            print_comparison(results, json.load(f)["results"])
+
+    if args.json:
+        report = {
+            "config": vars(args),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Measure local_gpt cold-start cost: module import and first-query latency.
+
+Each measurement runs in a fresh Python process so nothing is cached in
+memory between runs. The throwaway store is seeded with a few chunks
+first, since searches skip empty namespaces without embedding the query.
+Two scenarios are timed:
+
+* ``lazy``: import ``main``, then run the first search (which loads the
+  encoder and opens the vector store on demand).
+* ``warm-up``: import ``main``, run ``warm_up()`` as the app does on
+  startup, then run the first search.
+
+Usage:
+    uv run python -m benchmarks.startup --runs 3 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SEED = r"""
+import main
+from pdf_processing import Chunk
+texts = [
+    "Calibrate the device every six months using the reference weight.",
+    "Hold the power button for ten seconds to reset the device.",
+]
+chunks = [Chunk(text, 1, 1) for text in texts]
+main.store_document_chunks("manual.pdf", "startup-benchmark", [(chunks, main.embed_chunks(texts))])
+"""
+
+CHILD = r"""
+import json, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+warm_up_seconds = None
+if {warm_up}:
+    main.warm_up()
+    warm_up_seconds = time.perf_counter() - imported
+query_started = time.perf_counter()
+results = main.search_documents("What does the manual say about calibration?")
+first_query = time.perf_counter() - query_started
+assert main.embedding_model.loaded, "the first query did not load the encoder"
+assert results["ids"], "the first query found nothing in the seeded store"
+query_started = time.perf_counter()
+main.search_documents("How is the device reset?")
+second_query = time.perf_counter() - query_started
+print(json.dumps({{
+    "import_seconds": imported - started,
+    "warm_up_seconds": warm_up_seconds,
+    "first_query_seconds": first_query,
+    "second_query_seconds": second_query,
+}}))
+"""
+
+
+def run_python(code: str, env: dict) -> str:
+    """Run ``code`` in a fresh interpreter in the local_gpt directory and return its output."""
+    local_gpt_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=local_gpt_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def run_once(warm_up: bool, env: dict) -> dict:
+    """Run one scenario in a fresh interpreter and return its timings."""
+    output = run_python(CHILD.format(warm_up=warm_up), env)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    """Median of each timing across runs."""
+    keys = [key for key in runs[0] if runs[0][key] is not None]
+    return {key: statistics.median(run[key] for run in runs) for key in keys}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Use throwaway stores so the benchmark never touches real data
+        env = dict(
+            os.environ,
+            CHROMA_DB_PATH=os.path.join(tmp, "chroma_db"),
+            EMBEDDING_CACHE_PATH=os.path.join(tmp, "embedding_cache"),
+        )
+        run_python(SEED, env)
+        results = {}
+        for name, warm_up in (("lazy", False), ("warm-up", True)):
+            results[name] = summarize([run_once(warm_up, env) for _ in range(args.runs)])
+
+    for name, timings in results.items():
+        print(f"{name:<8} " + " ".join(f"{key}={value * 1000:.0f}ms" for key, value in timings.items()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Compare vector engines: query latency, recall@k, memory and disk use.
+
+Builds a Chroma HNSW collection and a flat float16 collection over the same
+synthetic vectors. The vectors are clustered like real chunk embeddings and
+have MiniLM's 384 dimensions by default. Each engine is loaded and queried
+in a fresh process, so the memory high-water mark belongs to that engine
+alone. Recall is measured against exact float32 search.
+
+Usage:
+    uv run python -m benchmarks.vector_store --chunks 200000 --queries 200 --json vector_store.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.pipeline import max_rss_mb, percentile
+
+ENGINES = ("chroma", "flat")
+ADD_BATCH_SIZE = 5000
+
+
+def make_vectors(count: int, dim: int, seed: int, clusters: int = 256) -> np.ndarray:
+    """Unit vectors scattered around ``clusters`` random centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(clusters, size=count)] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def open_collection(engine: str, path: str):
+    if engine == "flat":
+        from flat_index import FlatClient
+        return FlatClient(path).get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+    import chromadb
+    from chromadb.config import Settings
+    client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False))
+    return client.get_or_create_collection("bench", metadata={"hnsw:space": "cosine"})
+
+
+def build(engine: str, path: str, vectors: np.ndarray) -> float:
+    """Add every vector to a new collection; returns seconds taken."""
+    collection = open_collection(engine, path)
+    started = time.perf_counter()
+    for start in range(0, len(vectors), ADD_BATCH_SIZE):
+        batch = vectors[start:start + ADD_BATCH_SIZE]
+        collection.add(
+            ids=[f"c_{start + i}" for i in range(len(batch))],
+            documents=[f"chunk {start + i}" for i in range(len(batch))],
+            metadatas=[{"filename": f"doc_{(start + i) // 500}.pdf", "chunk_id": start + i} for i in range(len(batch))],
+            embeddings=batch,
+        )
+    return time.perf_counter() - started
+
+
+def measure(engine: str, path: str, queries: np.ndarray, k: int) -> Dict:
+    """Open an existing collection in this process and time single queries."""
+    started = time.perf_counter()
+    collection = open_collection(engine, path)
+    collection.query(query_embeddings=queries[:1].tolist(), n_results=k)
+    open_seconds = time.perf_counter() - started
+
+    latencies: List[float] = []
+    found: List[List[int]] = []
+    for query in queries:
+        started = time.perf_counter()
+        result = collection.query(
+            query_embeddings=[query.tolist()], n_results=k, include=["documents", "metadatas", "distances"]
+        )
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append([int(chunk_id.split("_")[1]) for chunk_id in result["ids"][0]])
+    return {
+        "first_query_seconds": open_seconds,
+        "query_p50_ms": percentile(latencies, 50),
+        "query_p95_ms": percentile(latencies, 95),
+        "found": found,
+        "max_rss_mb": peak_rss_mb(),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB.
+
+    On Linux ``ru_maxrss`` survives ``exec`` and so includes the parent's
+    peak; ``VmHWM`` is reset for the new program.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return max_rss_mb(resource.RUSAGE_SELF)
+
+
+def _run_in_child(function, *args):
+    # A fresh interpreter per engine keeps each memory high-water mark separate
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(function, args)
+
+
+def directory_mb(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=ENGINES)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    vectors = make_vectors(args.chunks, args.dim, args.seed)
+    queries = make_vectors(args.queries, args.dim, args.seed + 1)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.top_k]
+    print(f"{args.chunks} vectors x {args.dim} dims, {args.queries} queries, top {args.top_k}")
+
+    results = []
+    workdir = tempfile.mkdtemp()
+    try:
+        for engine in args.engines:
+            path = os.path.join(workdir, engine)
+            try:
+                build_seconds = _run_in_child(build, engine, path, vectors)
+            except ImportError as e:
+                print(f"{engine:<8} skipped: {e}", file=sys.stderr)
+                continue
+            measured = _run_in_child(measure, engine, path, queries, args.top_k)
+            recall = np.mean([len(set(f) & set(e)) / args.top_k for f, e in zip(measured.pop("found"), exact)])
+            result = {
+                "engine": engine,
+                "build_seconds": build_seconds,
+                "disk_mb": directory_mb(path),
+                f"recall@{args.top_k}": float(recall),
+                **measured,
+            }
+            results.append(result)
+            print(
+                f"{engine:<8} p50 {result['query_p50_ms']:7.2f} ms  p95 {result['query_p95_ms']:7.2f} ms  "
+                f"recall {recall:.3f}  rss {result['max_rss_mb']:8.1f} MB  disk {result['disk_mb']:8.1f} MB  "
+                f"build {build_seconds:6.1f} s"
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Pluggable text embedding backends.
+
+``torch`` runs the model through ``SentenceTransformer.encode``. ``onnx``
+runs the model's ONNX export through ONNX Runtime, which is considerably
+faster on CPU. It can use dynamic int8 quantization for another speed-up
+at a small cost in accuracy. Both backends return L2-normalized float32
+vectors, so they can be swapped without touching callers. They are not
+interchangeable inside one vector store, because their vectors differ
+slightly; ``name`` identifies the backend so caches never mix them.
+"""
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx")
+# Token limit the sentence-transformers MiniLM models were trained with
+DEFAULT_MAX_SEQ_LENGTH = 256
+# ONNX export published in the model's Hugging Face repository
+ONNX_MODEL_FILE = "onnx/model.onnx"
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over real (non-padding) tokens."""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length (zero rows are left as they are)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class EmbeddingBackend(ABC):
+    """Interface shared by all embedding backends.
+
+    Attributes:
+        name: Identifier of the model *and* backend; vectors with different
+            names must not be mixed.
+        dim: Embedding dimension.
+    """
+
+    name: str
+    dim: int
+
+    @abstractmethod
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` into a float32 array of unit vectors, one row per text."""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Embeds through PyTorch with sentence-transformers.
+
+    Args:
+        model_name: Hugging Face model ID.
+        batch_size: Texts per forward pass.
+        threads: PyTorch intra-op threads; ``None`` keeps the default.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 64, threads: Optional[int] = None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.batch_size = batch_size
+        self.name = model_name
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True),
+            dtype=np.float32,
+        )
+
+
+class OnnxBackend(EmbeddingBackend):
+    """Embeds with ONNX Runtime on CPU, optionally int8-quantized.
+
+    The ONNX export is downloaded from the model's Hugging Face repository.
+    With ``quantize=True`` it is quantized once with dynamic int8
+    quantization and the result is stored in ``cache_dir``.
+
+    Args:
+        model_name: Hugging Face model ID; the repository must contain
+            ``onnx/model.onnx``.
+        batch_size: Texts per inference call.
+        threads: ONNX Runtime intra-op threads; ``None`` lets ONNX Runtime
+            choose.
+        quantize: Use dynamic int8 quantization of the weights.
+        cache_dir: Where the quantized model is stored.
+        max_seq_length: Longer inputs are truncated, as in
+            sentence-transformers.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 64,
+        threads: Optional[int] = None,
+        quantize: bool = False,
+        cache_dir: str = "onnx_models",
+        max_seq_length: int = DEFAULT_MAX_SEQ_LENGTH,
+    ):
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from transformers import AutoTokenizer
+
+        model_path = hf_hub_download(model_name, ONNX_MODEL_FILE)
+        if quantize:
+            model_path = self._quantized_model(model_path, model_name, cache_dir)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.batch_size = batch_size
+        self.max_seq_length = max_seq_length
+        self.name = f"{model_name}-onnx{'-int8' if quantize else ''}"
+        self.dim = self.encode(["dimension probe"]).shape[1]
+
+    @staticmethod
+    def _quantized_model(model_path: str, model_name: str, cache_dir: str) -> str:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        os.makedirs(cache_dir, exist_ok=True)
+        quantized_path = os.path.join(cache_dir, model_name.replace("/", "_") + "-int8.onnx")
+        if not os.path.exists(quantized_path):
+            logger.info(f"Quantizing {model_name} to int8 at {quantized_path}")
+            # Write to a temporary name so an interrupted run never leaves a broken model
+            partial_path = quantized_path + ".partial"
+            quantize_dynamic(model_path, partial_path, weight_type=QuantType.QInt8)
+            os.replace(partial_path, quantized_path)
+        return quantized_path
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        inputs = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_seq_length, return_tensors="np"
+        )
+        feeds = {name: np.asarray(value, dtype=np.int64) for name, value in inputs.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+        return l2_normalize(mean_pool(token_embeddings, inputs["attention_mask"]))
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, getattr(self, "dim", 0)), dtype=np.float32)
+        # Batch texts of similar length together to minimise padding
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        vectors = np.concatenate([
+            self._encode_batch([texts[i] for i in order[start:start + self.batch_size]])
+            for start in range(0, len(texts), self.batch_size)
+        ]).astype(np.float32, copy=False)
+        result = np.empty_like(vectors)
+        result[order] = vectors
+        return result
+
+
+def create_embedding_backend(
+    backend: str,
+    model_name: str,
+    batch_size: int = 64,
+    threads: Optional[int] = None,
+    quantize: bool = False,
+    cache_dir: str = "onnx_models",
+) -> EmbeddingBackend:
+    """Build the embedding backend named ``backend`` (``"torch"`` or ``"onnx"``)."""
+    if backend == "torch":
+        if quantize:
+            logger.warning("int8 quantization is only supported by the onnx backend; ignoring it")
+        return SentenceTransformerBackend(model_name, batch_size=batch_size, threads=threads)
+    if backend == "onnx":
+        return OnnxBackend(model_name, batch_size=batch_size, threads=threads, quantize=quantize, cache_dir=cache_dir)
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(BACKENDS)}")
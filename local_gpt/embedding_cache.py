@@ -0,0 +1,233 @@
+"""Persistent embedding cache keyed by model and normalized chunk text.
+
+Vectors live in a flat, append-only binary file that is read through
+``np.memmap``; a small SQLite table maps each chunk hash to its row. Only
+texts missing from the cache are sent to the encoder.
+
+The cache holds at most ``max_rows`` vectors. When a write would exceed
+that, the least recently used entries are dropped and the rest are copied
+into a new vectors file, which replaces the old one in the same SQLite
+transaction that renumbers the rows.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so layout-only differences share a cache entry."""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def text_hash(text: str) -> str:
+    """Return the cache key for a chunk of text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk cache of embeddings for a single model.
+
+    Args:
+        path: Directory holding the cache files; each model gets its own
+            subdirectory.
+        model_name: Identifier of the embedding model. Entries from
+            different models never mix.
+        dim: Embedding dimension.
+        dtype: Storage dtype, ``float16`` (half the disk and page cache) or
+            ``float32``.
+        max_rows: Most vectors kept; least recently used entries are evicted
+            beyond it (0: unbounded).
+    """
+
+    def __init__(self, path: str, model_name: str, dim: int, dtype: str = "float16", max_rows: int = 0):
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.max_rows = max_rows
+        self._row_bytes = self.dim * self.dtype.itemsize
+        self._lock = threading.Lock()
+
+        self._dir = os.path.join(path, re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{model_name}-{self.dtype.name}"))
+        os.makedirs(self._dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self._dir, "index.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (hash TEXT PRIMARY KEY, row INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """
+        )
+        if "used" not in [column[1] for column in self._db.execute("PRAGMA table_info(entries)")]:
+            self._db.execute("ALTER TABLE entries ADD COLUMN used REAL NOT NULL DEFAULT 0")
+        self._db.commit()
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        self._generation = row[0] if row else 0
+        self._vectors_path = self._generation_path(self._generation)
+        open(self._vectors_path, "ab").close()
+        # Files of other generations were left behind by a compaction that crashed
+        for name in os.listdir(self._dir):
+            if name.startswith("vectors") and os.path.join(self._dir, name) != self._vectors_path:
+                os.remove(os.path.join(self._dir, name))
+
+        self._memmap = None
+        self._memmap_rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def _generation_path(self, generation: int) -> str:
+        return os.path.join(self._dir, "vectors.bin" if generation == 0 else f"vectors.{generation}.bin")
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _stored_rows(self) -> int:
+        # Whole rows in the file, indexed or not; a write that crashed may leave
+        # a partial row after them, which the next put overwrites
+        return os.path.getsize(self._vectors_path) // self._row_bytes
+
+    def _vectors(self) -> np.ndarray:
+        rows = self._stored_rows()
+        if self._memmap is None or rows != self._memmap_rows:
+            self._memmap = (
+                np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+                if rows else np.zeros((0, self.dim), dtype=self.dtype)
+            )
+            self._memmap_rows = rows
+        return self._memmap
+
+    def _lookup(self, hashes: Sequence[str]) -> dict:
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            found.update(self._db.execute(
+                f"SELECT hash, row FROM entries WHERE hash IN ({placeholders})", batch
+            ).fetchall())
+        return found
+
+    def get(self, texts: Sequence[str]) -> List:
+        """Return cached vectors for ``texts``, with ``None`` for misses."""
+        hashes = [text_hash(text) for text in texts]
+        with self._lock:
+            rows = self._lookup(hashes)
+            if rows and self.max_rows:
+                self._touch(list(rows))
+            vectors = self._vectors()
+            return [
+                np.asarray(vectors[rows[h]], dtype=np.float32) if h in rows else None
+                for h in hashes
+            ]
+
+    def put(self, texts: Sequence[str], embeddings: np.ndarray) -> None:
+        """Store embeddings for ``texts``; texts already cached are ignored."""
+        hashes = [text_hash(text) for text in texts]
+        with self._lock:
+            existing = self._lookup(hashes)
+            new = {}
+            for h, vector in zip(hashes, embeddings):
+                if h not in existing and h not in new:
+                    new[h] = vector
+            if not new:
+                return
+
+            if self.max_rows:
+                # A batch larger than the whole cache keeps only its last rows
+                new = dict(list(new.items())[-self.max_rows:])
+                if self._stored_rows() + len(new) > self.max_rows:
+                    # Keep half the cache so evictions stay rare
+                    self._evict(keep=min(self.max_rows // 2, self.max_rows - len(new)))
+
+            first_row = self._stored_rows()
+            block = np.asarray(list(new.values()), dtype=self.dtype).reshape(len(new), self.dim)
+            with open(self._vectors_path, "r+b") as f:
+                # Drop any partial row a crashed write left, so new rows land where the index says
+                f.truncate(first_row * self._row_bytes)
+                f.seek(first_row * self._row_bytes)
+                f.write(block.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            now = time.time()
+            self._db.executemany(
+                "INSERT OR IGNORE INTO entries (hash, row, used) VALUES (?, ?, ?)",
+                [(h, first_row + i, now) for i, h in enumerate(new)],
+            )
+            self._db.commit()
+
+    def _touch(self, hashes: List[str]) -> None:
+        now = time.time()
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            self._db.execute(f"UPDATE entries SET used = ? WHERE hash IN ({placeholders})", [now, *batch])
+        self._db.commit()
+
+    def _evict(self, keep: int) -> None:
+        """Keep the ``keep`` most recently used entries, copied into a new vectors file."""
+        total = len(self)
+        kept = self._db.execute("SELECT hash, row FROM entries ORDER BY used DESC LIMIT ?", (keep,)).fetchall()
+        vectors = self._vectors()
+        generation = self._generation + 1
+        path = self._generation_path(generation)
+        with open(path, "wb") as f:
+            for start in range(0, len(kept), 4096):
+                rows = [row for _, row in kept[start:start + 4096]]
+                f.write(np.ascontiguousarray(vectors[rows]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # The index switches to the new file in one transaction; a crash before
+        # the commit leaves the old generation in place
+        with self._db:
+            self._db.execute("CREATE TEMP TABLE kept (hash TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+            self._db.executemany("INSERT INTO temp.kept (hash, row) VALUES (?, ?)",
+                                 [(h, i) for i, (h, _) in enumerate(kept)])
+            self._db.execute("DELETE FROM entries WHERE hash NOT IN (SELECT hash FROM temp.kept)")
+            self._db.execute("UPDATE entries SET row = (SELECT row FROM temp.kept WHERE kept.hash = entries.hash)")
+            self._db.execute("DROP TABLE temp.kept")
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (generation,)
+            )
+        old_path = self._vectors_path
+        self._generation, self._vectors_path = generation, path
+        self._memmap, self._memmap_rows = None, 0
+        del vectors
+        os.remove(old_path)
+        self.evicted += total - len(kept)
+        logger.info(f"Embedding cache full: evicted {total - len(kept)} vectors, kept the {len(kept)} most recently used")
+
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Embed ``texts``, sending only cache misses to ``encode_fn``.
+
+        Repeated texts within one call are encoded once. Returns a float32
+        array with one row per input text.
+        """
+        result = np.zeros((len(texts), self.dim), dtype=np.float32)
+        missing = {}
+        for i, vector in enumerate(self.get(texts)):
+            if vector is None:
+                missing.setdefault(normalize_text(texts[i]), []).append(i)
+            else:
+                result[i] = vector
+
+        self.hits += len(texts) - sum(len(rows) for rows in missing.values())
+        self.misses += len(missing)
+        if missing:
+            miss_texts = [texts[rows[0]] for rows in missing.values()]
+            logger.info(f"Embedding cache: {len(texts) - len(miss_texts)} hits, encoding {len(miss_texts)} new chunks")
+            embeddings = np.asarray(encode_fn(miss_texts), dtype=np.float32)
+            self.put(miss_texts, embeddings)
+            for rows, vector in zip(missing.values(), embeddings):
+                result[rows] = vector
+        return result
@@ -0,0 +1,125 @@
+"""Bounded worker pools that keep blocking work off the Chainlit event loop.
+
+Each kind of hot call (embedding, vector DB, LLM, PDF extraction) gets its
+own pool with a concurrency limit, so one user's large upload or long
+generation cannot starve everyone else. Pools track queue depth and timing
+so their sizes can be tuned from real traffic.
+"""
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional
+
+
+class WorkPool:
+    """A named pool with a concurrency limit and queue-depth metrics.
+
+    Args:
+        name: Pool name used in metrics and thread names.
+        max_concurrency: Maximum number of calls running at once; further
+            calls wait in the queue.
+        kind: ``"thread"`` runs calls on a thread pool, ``"process"`` on a
+            process pool (spawned, so workers do not inherit loaded models)
+            and ``"async"`` only limits concurrency of coroutines entered
+            through :meth:`slot`.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, kind: str = "thread"):
+        if kind not in ("thread", "process", "async"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+        self._executor_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        self.waiting = 0
+        self.active = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """The underlying executor, created on first use."""
+        if self.kind == "async":
+            return None
+        with self._executor_lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_concurrency,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency, thread_name_prefix=self.name
+                    )
+            return self._executor
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot in this pool and hold it for the block's duration."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+
+        self.active += 1
+        try:
+            yield
+        except BaseException:
+            self.failed += 1
+            raise
+        else:
+            self.completed += 1
+        finally:
+            self.active -= 1
+            self.total_run_seconds += time.perf_counter() - started_at
+            self._semaphore.release()
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking ``fn(*args, **kwargs)`` in this pool and await its result."""
+        if self.kind == "async":
+            raise TypeError(f"Pool {self.name!r} only limits coroutines; use slot()")
+        async with self.slot():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current queue depth, utilisation and timing counters."""
+        finished = self.completed + self.failed
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": 1000 * self.total_wait_seconds / finished if finished else 0.0,
+            "avg_run_ms": 1000 * self.total_run_seconds / finished if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the underlying executor, if one was started."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
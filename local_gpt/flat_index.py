@@ -0,0 +1,413 @@
+"""Exact-search vector store on memory-mapped float16 vectors.
+
+For corpora up to about a million MiniLM chunks an approximate index is not
+needed. A blocked brute-force scan over L2-normalized vectors returns exact
+top-k results in tens of milliseconds. Each collection keeps its vectors in
+one raw float16 file mapped with :class:`numpy.memmap`, at 768
+bytes per 384-dimensional chunk, and its ids, texts and metadata in a SQLite
+side table. Resident memory is a liveness mask plus one block of vectors
+while a search runs; the operating system pages the rest in on demand.
+
+:class:`FlatClient` and :class:`FlatCollection` implement the subset of
+Chroma's client and collection API that ``main.py`` uses, so the engine can
+be swapped with ``VECTOR_ENGINE=flat``.
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows converted to float32 and scored at a time; small enough to stay in cache (~6 MB at 384 dims)
+BLOCK_ROWS = 4096
+INITIAL_CAPACITY = 1024
+DEFAULT_INCLUDE = ("documents", "metadatas")
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_KEY = re.compile(r"^[A-Za-z0-9_:.-]+$")
+
+
+def where_to_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Translate a Chroma ``where`` filter into a SQL condition on the JSON metadata column.
+
+    Supports equality, ``$eq``, ``$ne``, ``$gt``, ``$gte``, ``$lt``, ``$lte``,
+    ``$in``, ``$nin``, ``$and`` and ``$or``.
+    """
+    clauses, params = [], []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_to_sql(part) for part in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+        if not _KEY.match(key):
+            raise ValueError(f"Unsupported metadata key {key!r}")
+        field = f"json_extract(metadata, '$.\"{key}\"')"
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, value in condition.items():
+            if operator in _OPERATORS:
+                clauses.append(f"{field} {_OPERATORS[operator]} ?")
+                params.append(value)
+            elif operator in ("$in", "$nin"):
+                placeholders = ",".join("?" * len(value)) or "NULL"
+                clauses.append(f"{field} {'IN' if operator == '$in' else 'NOT IN'} ({placeholders})")
+                params.extend(value)
+            else:
+                raise ValueError(f"Unsupported where operator {operator!r}")
+    return " AND ".join(clauses) or "1", params
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 copies of ``vectors`` scaled to unit length (zero rows stay zero)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def top_k_scan(
+    vectors: np.ndarray, live: np.ndarray, queries: np.ndarray, k: int, block_rows: int = BLOCK_ROWS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact top-``k`` inner-product search over ``vectors`` in blocks.
+
+    Args:
+        vectors: ``(n, dim)`` rows, usually a float16 memmap.
+        live: ``(n,)`` mask; rows where it is False are never returned.
+        queries: ``(q, dim)`` float32 query vectors.
+        k: Results per query.
+
+    Returns:
+        ``(rows, scores)``, each ``(q, k')`` with ``k' = min(k, live rows)``,
+        best first.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    k = min(k, int(live.sum()))
+    if k <= 0:
+        return best_rows, best_scores
+    for start in range(0, len(vectors), block_rows):
+        end = min(start + block_rows, len(vectors))
+        block_live = live[start:end]
+        if not block_live.any():
+            continue
+        scores = queries @ np.asarray(vectors[start:end], dtype=np.float32).T
+        scores[:, ~block_live] = -np.inf
+        # Keep the best k of this block plus the running best, per query
+        rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, end), scores.shape)], axis=1)
+        scores = np.concatenate([best_scores, scores], axis=1)
+        if scores.shape[1] > k:
+            keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            rows = np.take_along_axis(rows, keep, axis=1)
+            scores = np.take_along_axis(scores, keep, axis=1)
+        best_rows, best_scores = rows, scores
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+class FlatCollection:
+    """One collection: a float16 vector file plus a SQLite table of ids, texts and metadata.
+
+    Vectors are stored normalized, so query distances are cosine distances
+    (``1 - cosine similarity``), as in a Chroma collection created with
+    ``hnsw:space=cosine``. Rows of deleted chunks are masked out until the
+    collection is rebuilt.
+    """
+
+    def __init__(self, client: "FlatClient", path: str):
+        self._client = client
+        self._path = path
+        self._lock = threading.RLock()
+        self._open()
+
+    def _open(self) -> None:
+        """Load the collection info, connect to its SQLite table and map its vectors."""
+        path = self._path
+        with open(os.path.join(path, "collection.json")) as f:
+            info = json.load(f)
+        self.name: str = info["name"]
+        self.metadata: Optional[Dict[str, Any]] = info.get("metadata")
+        self._dim: Optional[int] = info.get("dim")
+        self._db = sqlite3.connect(os.path.join(path, "chunks.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                document TEXT,
+                metadata TEXT
+            );
+            CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            """
+        )
+        found = self._db.execute("SELECT value FROM info WHERE key = 'size'").fetchone()
+        # Rows written so far, live or deleted; rows past this are unused capacity
+        self._size = found[0] if found else 0
+        self._vectors: Optional[np.memmap] = None
+        self._live = np.zeros(0, dtype=bool)
+        if self._dim:
+            stored_rows = os.path.getsize(self._vector_path) // (self._dim * 2) if os.path.exists(self._vector_path) else 0
+            self._map(max(self._size, stored_rows, INITIAL_CAPACITY))
+            self._live = np.zeros(len(self._vectors), dtype=bool)
+            live_rows = np.fromiter((row for row, in self._db.execute("SELECT row FROM chunks")), dtype=np.int64)
+            self._live[live_rows] = True
+
+    @property
+    def _vector_path(self) -> str:
+        return os.path.join(self._path, "vectors.f16")
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map the vector file, growing it to ``capacity`` rows if needed."""
+        nbytes = capacity * self._dim * 2
+        with open(self._vector_path, "ab") as f:
+            if f.tell() < nbytes:
+                f.truncate(nbytes)
+        self._vectors = np.memmap(self._vector_path, dtype=np.float16, mode="r+", shape=(capacity, self._dim))
+
+    def _save_info(self) -> None:
+        with open(os.path.join(self._path, "collection.json"), "w") as f:
+            json.dump({"name": self.name, "metadata": self.metadata, "dim": self._dim}, f)
+
+    def count(self) -> int:
+        """Return the number of stored chunks."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        """Store new chunks; raises ``ValueError`` if an id already exists."""
+        vectors = normalize_rows(embeddings)
+        documents = documents or [None] * len(ids)
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._save_info()
+                self._map(INITIAL_CAPACITY)
+                self._live = np.zeros(INITIAL_CAPACITY, dtype=bool)
+            if vectors.shape[1] != self._dim:
+                raise ValueError(f"Expected {self._dim}-dimensional embeddings, got {vectors.shape[1]}")
+            start, end = self._size, self._size + len(ids)
+            if end > len(self._vectors):
+                capacity = max(end, 2 * len(self._vectors))
+                self._map(capacity)
+                self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), dtype=bool)])
+            # Vectors first: rows only become visible once the SQLite transaction commits
+            self._vectors[start:end] = vectors
+            self._vectors.flush()
+            try:
+                with self._db:
+                    self._db.executemany(
+                        "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                        [
+                            (start + i, chunk_id, document, json.dumps(metadata) if metadata is not None else None)
+                            for i, (chunk_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+                        ],
+                    )
+                    self._db.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('size', ?)", (end,))
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Duplicate chunk id in add(): {e}") from e
+            self._size = end
+            self._live[start:end] = True
+
+    def _select(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> List[Tuple[int, str, Optional[str], Optional[str]]]:
+        sql, params = where_to_sql(where or {})
+        if ids is not None:
+            sql += f" AND id IN ({','.join('?' * len(ids)) or 'NULL'})"
+            params = params + list(ids)
+        query = f"SELECT row, id, document, metadata FROM chunks WHERE {sql} ORDER BY row"
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params = params + [-1 if limit is None else limit, offset or 0]
+        return self._db.execute(query, params).fetchall()
+
+    def _result(self, rows, include: Sequence[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"ids": [chunk_id for _, chunk_id, _, _ in rows]}
+        if "documents" in include:
+            result["documents"] = [document for _, _, document, _ in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(metadata) if metadata else None for _, _, _, metadata in rows]
+        if "embeddings" in include:
+            positions = np.array([row for row, _, _, _ in rows], dtype=np.int64)
+            result["embeddings"] = (
+                np.asarray(self._vectors[positions], dtype=np.float32) if len(positions) else np.zeros((0, self._dim or 0))
+            )
+        return result
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = DEFAULT_INCLUDE,
+    ) -> Dict[str, Any]:
+        """Return chunks by id and/or metadata filter, in insertion order."""
+        with self._lock:
+            return self._result(self._select(ids, where, limit, offset), include)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        """Delete chunks by id and/or metadata filter.
+
+        Raises ``ValueError`` without either, like Chroma, rather than
+        deleting every chunk.
+        """
+        if ids is None and not where:
+            raise ValueError("delete() needs ids or a where filter")
+        with self._lock:
+            rows = [row for row, _, _, _ in self._select(ids, where)]
+            with self._db:
+                self._db.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+            self._live[rows] = False
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+    ) -> Dict[str, List]:
+        """Return the ``n_results`` nearest chunks to each query embedding, by exact cosine distance."""
+        queries = normalize_rows(query_embeddings)
+        with self._lock:
+            vectors, live, size = self._vectors, self._live, self._size
+        result: Dict[str, List] = {"ids": []}
+        for key in include:
+            result[key] = []
+        if vectors is None:
+            for _ in queries:
+                for key in result:
+                    result[key].append([])
+            return result
+
+        rows, scores = top_k_scan(vectors[:size], live[:size], queries, n_results)
+        with self._lock:
+            by_row = {
+                row: (row, chunk_id, document, metadata)
+                for row, chunk_id, document, metadata in self._db.execute(
+                    f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({','.join('?' * rows.size) or 'NULL'})",
+                    rows.ravel().tolist(),
+                )
+            }
+        for query_rows, query_scores in zip(rows, scores):
+            # A row deleted since the scan started is dropped
+            hits = [(by_row[row], score) for row, score in zip(query_rows.tolist(), query_scores) if row in by_row]
+            hit_result = self._result([hit for hit, _ in hits], include)
+            for key in hit_result:
+                result[key].append(list(hit_result[key]) if key == "embeddings" else hit_result[key])
+            if "distances" in include:
+                result["distances"].append([float(1.0 - score) for _, score in hits])
+        return result
+
+    def modify(self, name: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Rename the collection and/or replace its metadata."""
+        with self._lock:
+            # Renaming reopens the collection from disk, so it goes before the in-memory metadata update
+            if name is not None and name != self.name:
+                self._client._rename(self, name)
+            if metadata is not None:
+                self.metadata = metadata
+            self._save_info()
+
+    def _close(self) -> None:
+        with self._lock:
+            self._db.close()
+            self._vectors = None
+
+
+class FlatClient:
+    """Directory of :class:`FlatCollection` objects, one subdirectory each.
+
+    Args:
+        path: Root directory, created if missing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._collections: Dict[str, FlatCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection_path(self, name: str) -> str:
+        if not _KEY.match(name) or name.startswith("."):
+            raise ValueError(f"Invalid collection name {name!r}")
+        return os.path.join(self.path, name)
+
+    def list_collections(self) -> List[FlatCollection]:
+        """Return every collection."""
+        names = sorted(
+            entry for entry in os.listdir(self.path)
+            if os.path.exists(os.path.join(self.path, entry, "collection.json"))
+        )
+        return [self.get_collection(name) for name in names]
+
+    def get_collection(self, name: str) -> FlatCollection:
+        """Return an existing collection; raises ``ValueError`` if there is none."""
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                path = self._collection_path(name)
+                if not os.path.exists(os.path.join(path, "collection.json")):
+                    raise ValueError(f"Collection {name} does not exist")
+                collection = self._collections[name] = FlatCollection(self, path)
+            return collection
+
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> FlatCollection:
+        """Create an empty collection; raises ``ValueError`` if it exists."""
+        path = self._collection_path(name)
+        with self._lock:
+            if os.path.exists(os.path.join(path, "collection.json")):
+                raise ValueError(f"Collection {name} already exists")
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "collection.json"), "w") as f:
+                json.dump({"name": name, "metadata": metadata, "dim": None}, f)
+        return self.get_collection(name)
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> FlatCollection:
+        """Return the named collection, creating it if needed."""
+        try:
+            return self.get_collection(name)
+        except ValueError:
+            return self.create_collection(name, metadata)
+
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection and its files."""
+        collection = self.get_collection(name)
+        with self._lock:
+            collection._close()
+            del self._collections[name]
+            shutil.rmtree(collection._path)
+
+    def _rename(self, collection: FlatCollection, name: str) -> None:
+        path = self._collection_path(name)
+        with self._lock:
+            if os.path.exists(path):
+                raise ValueError(f"Collection {name} already exists")
+            # SQLite keeps the old path for its journal, so the connection must not outlive the move
+            collection._close()
+            os.rename(collection._path, path)
+            self._collections.pop(collection.name, None)
+            collection._path = path
+            collection._open()
+            collection.name = name
+            self._collections[name] = collection
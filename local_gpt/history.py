@@ -0,0 +1,121 @@
+"""Token-budgeted chat history with a rolling summary of older turns.
+
+Sending the full conversation on every turn makes prompt evaluation time and
+KV-cache memory grow linearly until the model's context overflows. This
+history keeps the system prompt and the most recent turns verbatim, folds
+older turns into a summary generated in the background, and caps every
+prompt at a fixed token budget.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+# Called with (previous_summary, messages_to_fold) and returns the new summary
+Summarizer = Callable[[str, List[Message]], Awaitable[str]]
+
+# Per-message overhead for role markers and separators in chat templates
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+class ConversationHistory:
+    """Conversation state for one chat session.
+
+    Args:
+        system_prompt: Instructions sent first on every turn.
+        max_tokens: Token budget for the whole prompt, including the new
+            user message.
+        recent_turns: Number of most recent user/assistant turns kept
+            verbatim; older turns are folded into the summary.
+        count_tokens: Token counter for message text.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        max_tokens: int = 6000,
+        recent_turns: int = 4,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        self.system_message: Message = {"role": "system", "content": system_prompt}
+        self.max_tokens = max_tokens
+        self.recent_turns = max(1, recent_turns)
+        self.count_tokens = count_tokens
+        self.summary = ""
+        self.turns: List[List[Message]] = []
+        self._compaction: Optional[asyncio.Task] = None
+
+    def message_tokens(self, message: Message) -> int:
+        """Estimate the prompt tokens used by one message."""
+        return self.count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+    def summary_message(self) -> Optional[Message]:
+        """Return the summary of folded turns as a system message, if any."""
+        if not self.summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}
+
+    def build_prompt(self, user_message: Message) -> List[Message]:
+        """Assemble the messages for the next request within the token budget.
+
+        Whole turns are added newest first until the budget is reached, so
+        the prompt never exceeds ``max_tokens`` even while a summary is
+        still being generated.
+        """
+        head = [self.system_message]
+        summary = self.summary_message()
+        if summary:
+            head.append(summary)
+
+        budget = self.max_tokens - sum(self.message_tokens(m) for m in head) - self.message_tokens(user_message)
+        included: List[List[Message]] = []
+        for turn in reversed(self.turns):
+            cost = sum(self.message_tokens(m) for m in turn)
+            if cost > budget:
+                break
+            included.append(turn)
+            budget -= cost
+
+        dropped = len(self.turns) - len(included)
+        if dropped:
+            logger.debug(f"History budget reached: leaving out {dropped} older turns")
+        return head + [m for turn in reversed(included) for m in turn] + [user_message]
+
+    def add_turn(self, user_message: Message, assistant_message: Message) -> None:
+        """Record a completed user/assistant exchange."""
+        self.turns.append([user_message, assistant_message])
+
+    def maybe_compact(self, summarize: Summarizer) -> Optional[asyncio.Task]:
+        """Start folding older turns into the summary in the background.
+
+        Runs once ``recent_turns`` turns have accumulated beyond the recent
+        window, so the summarizer is called once every ``recent_turns``
+        turns rather than on every message.
+        """
+        if self._compaction is not None and not self._compaction.done():
+            return None
+        if len(self.turns) < 2 * self.recent_turns:
+            return None
+        folding = self.turns[:len(self.turns) - self.recent_turns]
+        self._compaction = asyncio.create_task(self._compact(summarize, folding))
+        return self._compaction
+
+    async def _compact(self, summarize: Summarizer, folding: List[List[Message]]) -> None:
+        try:
+            summary = await summarize(self.summary, [m for turn in folding for m in turn])
+        except Exception as e:
+            logger.warning(f"History summarization failed, keeping turns verbatim: {e}")
+            return
+
+        # Cap the summary at roughly a quarter of the budget (~4 characters per token)
+        self.summary = summary.strip()[:self.max_tokens]
+        # Only appends happen while summarizing, so the folded turns are still first
+        del self.turns[:len(folding)]
+        logger.info(f"Folded {len(folding)} turns into the conversation summary")
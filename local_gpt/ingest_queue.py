@@ -0,0 +1,280 @@
+"""Durable queue of PDF ingestion jobs with chunk and embedding checkpoints.
+
+Uploads are copied into a spool directory and recorded as jobs in SQLite
+before any work starts. Workers extract and chunk pages in batches and
+embed chunks in batches, saving each batch as it completes. Only the
+chunker's unfinished window is kept between page batches, never the pages
+themselves. If the process stops midway, a restarted worker resumes the job
+from its last checkpoint instead of starting a long document over.
+"""
+import logging
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+import time
+from typing import List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from pdf_processing import Chunk, TokenChunker
+
+logger = logging.getLogger(__name__)
+
+# Job states; the last three are final
+QUEUED, RUNNING, DONE, SKIPPED, FAILED = "queued", "running", "done", "skipped", "failed"
+FINAL_STATES = (DONE, SKIPPED, FAILED)
+
+
+class IngestJob(NamedTuple):
+    """One queued PDF and its progress.
+
+    Attributes:
+        next_page: First page (1-based) not yet extracted and chunked.
+        pages_total: Page count, or 0 until the job first runs.
+        chunks_total: Chunks checkpointed so far; the document's chunk
+            count once ``next_page`` is past ``pages_total``.
+        chunks_embedded: Chunks whose embeddings are checkpointed.
+    """
+    id: int
+    filename: str
+    namespace: str
+    source_path: str
+    status: str
+    attempts: int
+    pages_total: int
+    next_page: int
+    chunks_total: int
+    chunks_embedded: int
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job reached a final state."""
+        return self.status in FINAL_STATES
+
+
+_JOB_COLUMNS = ", ".join(IngestJob._fields)
+
+
+def _seq_end(end: Optional[int]) -> int:
+    return 2 ** 62 if end is None else end
+
+
+class IngestQueue:
+    """SQLite-backed job queue for PDF ingestion.
+
+    Args:
+        path: Directory holding the queue database and spooled uploads.
+    """
+
+    def __init__(self, path: str):
+        self.spool_dir = os.path.join(path, "files")
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(path, "jobs.sqlite"), check_same_thread=False)
+        self._db.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                filename TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                source_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                pages_total INTEGER NOT NULL DEFAULT 0,
+                next_page INTEGER NOT NULL DEFAULT 1,
+                chunks_total INTEGER NOT NULL DEFAULT 0,
+                chunks_embedded INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_chunkers (
+                job_id INTEGER PRIMARY KEY,
+                state BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS job_chunks (
+                job_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                page_start INTEGER NOT NULL,
+                page_end INTEGER NOT NULL,
+                embedding BLOB,
+                PRIMARY KEY (job_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+            """
+        )
+        self._db.commit()
+
+    def enqueue(self, filename: str, source: Union[bytes, str], namespace: str) -> int:
+        """Spool ``source`` (a path or PDF bytes) and queue it; returns the job ID."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO jobs (filename, namespace, source_path, status, created_at, updated_at) "
+                "VALUES (?, ?, '', ?, ?, ?)",
+                (filename, namespace, QUEUED, now, now),
+            )
+            job_id = cursor.lastrowid
+            # Chainlit deletes uploads with the session, so keep our own copy
+            source_path = os.path.join(self.spool_dir, f"{job_id}.pdf")
+            if isinstance(source, str):
+                shutil.copyfile(source, source_path)
+            else:
+                with open(source_path, "wb") as f:
+                    f.write(source)
+            self._db.execute("UPDATE jobs SET source_path = ? WHERE id = ?", (source_path, job_id))
+            self._db.commit()
+        logger.info(f"Queued ingestion job {job_id} for {filename}")
+        return job_id
+
+    def claim(self) -> Optional[IngestJob]:
+        """Mark the oldest queued job as running and return it, or None if the queue is empty."""
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {_JOB_COLUMNS} FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (RUNNING, time.time(), row[0]),
+            )
+            self._db.commit()
+        return self.get(row[0])
+
+    def requeue_interrupted(self, max_attempts: int = 3) -> int:
+        """Queue again the jobs left running by a previous process; returns how many.
+
+        Jobs already started ``max_attempts`` times are failed instead, so a
+        document that crashes the process cannot do so on every restart.
+        """
+        with self._lock:
+            given_up = [row[0] for row in self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? AND attempts >= ?", (RUNNING, max_attempts)
+            )]
+        for job_id in given_up:
+            self.finish(job_id, FAILED, f"Interrupted {max_attempts} times")
+        with self._lock:
+            count = self._db.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?", (QUEUED, time.time(), RUNNING)
+            ).rowcount
+            self._db.commit()
+        if count:
+            logger.info(f"Resuming {count} interrupted ingestion jobs")
+        return count
+
+    def get(self, job_id: int) -> Optional[IngestJob]:
+        """Return a job by ID."""
+        with self._lock:
+            row = self._db.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return IngestJob(*row) if row else None
+
+    def jobs(self, namespace: Optional[str] = None, limit: int = 20) -> List[IngestJob]:
+        """Return the most recent jobs, optionally only those of ``namespace``."""
+        query = f"SELECT {_JOB_COLUMNS} FROM jobs"
+        params: tuple = ()
+        if namespace is not None:
+            query += " WHERE namespace = ?"
+            params = (namespace,)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id DESC LIMIT ?", params + (limit,)).fetchall()
+        return [IngestJob(*row) for row in rows]
+
+    def pending_count(self) -> int:
+        """Number of jobs queued or running."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()[0]
+
+    def set_page_count(self, job_id: int, pages_total: int) -> None:
+        """Record the page count of a job's PDF."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET pages_total = ?, updated_at = ? WHERE id = ?", (pages_total, time.time(), job_id)
+            )
+            self._db.commit()
+
+    def save_batch(self, job_id: int, chunks: Sequence[Chunk], chunker: TokenChunker, next_page: int) -> None:
+        """Checkpoint the chunks of one page batch and the chunker's state after it.
+
+        The chunks are appended to those already saved, and extraction
+        resumes at ``next_page`` with the saved chunker.
+        """
+        with self._lock:
+            chunks_total = self._db.execute("SELECT chunks_total FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            self._db.executemany(
+                "INSERT OR REPLACE INTO job_chunks (job_id, seq, text, page_start, page_end) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, chunks_total + i, c.text, c.page_start, c.page_end) for i, c in enumerate(chunks)],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO job_chunkers (job_id, state) VALUES (?, ?)", (job_id, pickle.dumps(chunker))
+            )
+            self._db.execute(
+                "UPDATE jobs SET next_page = ?, chunks_total = ?, updated_at = ? WHERE id = ?",
+                (next_page, chunks_total + len(chunks), time.time(), job_id),
+            )
+            self._db.commit()
+
+    def chunker(self, job_id: int) -> Optional[TokenChunker]:
+        """Return the chunker checkpointed with a job's last page batch, or None before the first."""
+        with self._lock:
+            row = self._db.execute("SELECT state FROM job_chunkers WHERE job_id = ?", (job_id,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def chunks(self, job_id: int, start: int = 0, end: Optional[int] = None) -> List[Chunk]:
+        """Return the checkpointed chunks ``start`` to ``end`` (default: all) of a job, in order."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT text, page_start, page_end FROM job_chunks WHERE job_id = ? AND seq >= ? AND seq < ? "
+                "ORDER BY seq",
+                (job_id, start, _seq_end(end)),
+            ).fetchall()
+        return [Chunk(*row) for row in rows]
+
+    def save_embeddings(self, job_id: int, start: int, embeddings: Sequence[Sequence[float]]) -> None:
+        """Checkpoint the embeddings of chunks ``start`` onwards."""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            self._db.executemany(
+                "UPDATE job_chunks SET embedding = ? WHERE job_id = ? AND seq = ?",
+                [(vector.tobytes(), job_id, start + i) for i, vector in enumerate(vectors)],
+            )
+            self._db.execute(
+                "UPDATE jobs SET chunks_embedded = ?, updated_at = ? WHERE id = ?",
+                (start + len(vectors), time.time(), job_id),
+            )
+            self._db.commit()
+
+    def embeddings(self, job_id: int, start: int = 0, end: Optional[int] = None) -> List[List[float]]:
+        """Return the checkpointed embeddings of chunks ``start`` to ``end`` (default: all), in order."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT embedding FROM job_chunks WHERE job_id = ? AND seq >= ? AND seq < ? "
+                "AND embedding IS NOT NULL ORDER BY seq",
+                (job_id, start, _seq_end(end)),
+            ).fetchall()
+        return [np.frombuffer(blob, dtype=np.float32).tolist() for blob, in rows]
+
+    def finish(self, job_id: int, status: str, error: Optional[str] = None) -> None:
+        """Record a final state and drop the job's checkpoints and spooled file."""
+        if status not in FINAL_STATES:
+            raise ValueError(f"{status!r} is not a final job state")
+        job = self.get(job_id)
+        with self._lock:
+            self._db.execute("DELETE FROM job_chunkers WHERE job_id = ?", (job_id,))
+            self._db.execute("DELETE FROM job_chunks WHERE job_id = ?", (job_id,))
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id),
+            )
+            self._db.commit()
+        if job and job.source_path and os.path.exists(job.source_path):
+            os.remove(job.source_path)
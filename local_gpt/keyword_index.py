@@ -0,0 +1,124 @@
+"""BM25 keyword index for document chunks, kept next to the vector store.
+
+Dense retrieval regularly misses exact identifiers such as part numbers,
+clause IDs and function names. This index uses SQLite's FTS5 extension,
+which maintains an inverted index incrementally and ranks matches with
+BM25, so keyword lookups take milliseconds and never touch the encoder.
+"""
+import logging
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal-rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+
+_TERM = re.compile(r"\w+")
+# Tokens joined by -, _, ., : or / (part numbers, clause IDs, dotted names)
+_IDENTIFIER = re.compile(r"\w+(?:[-_.:/]\w+)+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me of on or "
+    "say says tell than that the this to was what when where which who why with".split()
+)
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """Turn a free-text question into an FTS5 OR query.
+
+    Identifier-like tokens are also added as quoted phrases so adjacent
+    parts (``KX-12345``) score higher than the parts found apart.
+    """
+    terms = []
+    for identifier in _IDENTIFIER.findall(query):
+        terms.append(identifier.lower())
+    for term in _TERM.findall(query.lower()):
+        if term not in STOPWORDS:
+            terms.append(term)
+    if not terms:
+        return None
+    # Tokens only contain word characters and separators, so quoting is safe
+    return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse several ranked ID lists into one, scoring each ID by sum(1 / (k + rank))."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class KeywordIndex:
+    """Persistent BM25 index over chunk text.
+
+    Args:
+        path: SQLite database file holding the index.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5("
+            "text, chunk_id UNINDEXED, filename UNINDEXED)"
+        )
+        self._db.commit()
+
+    def count(self) -> int:
+        """Return the number of indexed chunks."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Sequence[Dict]) -> None:
+        """Index new chunks; callers remove previous versions with :meth:`delete` first."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO chunks (text, chunk_id, filename) VALUES (?, ?, ?)",
+                [(text, chunk_id, meta.get("filename", "")) for chunk_id, text, meta in zip(ids, texts, metadatas)],
+            )
+            self._db.commit()
+
+    def delete(self, filename: Optional[str] = None, ids: Optional[Sequence[str]] = None) -> None:
+        """Remove all chunks of ``filename`` and/or the given chunk IDs."""
+        with self._lock:
+            if filename is not None:
+                self._db.execute("DELETE FROM chunks WHERE filename = ?", (filename,))
+            if ids:
+                self._delete_ids(ids)
+            self._db.commit()
+
+    def _delete_ids(self, ids: Sequence[str]) -> None:
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            self._db.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+
+    def optimize(self) -> None:
+        """Merge the index's internal segments and reclaim space left by deletes."""
+        with self._lock:
+            self._db.execute("INSERT INTO chunks(chunks) VALUES ('optimize')")
+            self._db.commit()
+            self._db.execute("VACUUM")
+
+    def search(self, query: str, n_results: int = 20) -> List[Tuple[str, float]]:
+        """Return ``(chunk_id, score)`` pairs, best first; higher scores are better."""
+        match = build_match_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    "SELECT chunk_id, bm25(chunks) AS rank FROM chunks WHERE chunks MATCH ? "
+                    "ORDER BY rank LIMIT ?",
+                    (match, n_results),
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Keyword search failed for query {query[:50]!r}: {e}")
+                return []
+        # FTS5's bm25() is negated so that smaller is better
+        return [(chunk_id, -rank) for chunk_id, rank in rows]
@@ -0,0 +1,49 @@
+"""Thread-safe lazy initialization for expensive shared resources."""
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyResource(Generic[T]):
+    """Create a resource on first use, exactly once, from any thread.
+
+    Args:
+        name: Human-readable name used in log messages.
+        factory: Zero-argument callable that builds the resource.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the resource has been created."""
+        return self._loaded
+
+    def get(self) -> T:
+        """Return the resource, creating it if this is the first call.
+
+        Concurrent first callers block until the single load finishes; a
+        failed load is retried on the next call.
+        """
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                logger.info(f"Loading {self.name}...")
+                started = time.perf_counter()
+                self._value = self._factory()
+                self.load_seconds = time.perf_counter() - started
+                self._loaded = True
+                logger.info(f"Loaded {self.name} in {self.load_seconds:.2f}s")
+        return self._value
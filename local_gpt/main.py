@@ -1,204 +1,995 @@
 import chainlit as cl
 import os
 import logging
+import asyncio
+import functools
+import threading
+import time
 from dotenv import load_dotenv
-import chromadb
-from sentence_transformers import SentenceTransformer
-import PyPDF2
-from io import BytesIO
-from typing import List, Dict, Any
-import uuid
-import io
+from typing import List, Dict, Any, Awaitable, Callable, Iterable, NamedTuple, Optional, Tuple, Union
+import numpy as np
 import ollama
 
+from answer_cache import SemanticAnswerCache
+from embedding_backends import EmbeddingBackend, create_embedding_backend
+from embedding_cache import EmbeddingCache
+from executors import WorkPool
+from flat_index import FlatClient
+from history import ConversationHistory
+from ingest_queue import DONE, FAILED, QUEUED, SKIPPED, IngestJob, IngestQueue
+from keyword_index import KeywordIndex, reciprocal_rank_fusion
+from lazy import LazyResource
+from metrics import MetricsRegistry, SamplingFilter, start_metrics_server
+from namespaces import SHARED_NAMESPACE, NamespaceRegistry, namespace_for, storage_name
+from pdf_processing import (
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_OVERLAP_TOKENS,
+    Chunk,
+    TokenChunker,
+    chunk_page_batch,
+    chunk_pdf_timed,
+    compute_document_hash,
+    count_pdf_pages,
+    extract_pages,
+)
+from query_encoder import BatchingQueryEncoder
+from reranking import mmr_select, rerank
+from streaming import ThinkTagSplitter
+
 # Load environment variables
 load_dotenv()
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Per-chunk and per-query details; only a LOG_SAMPLE_RATE fraction (0-1) is logged
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0"))
+hot_path_logger = logging.getLogger(f"{__name__}.hot_path")
+hot_path_logger.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
 
-# Initialize embedding model
-logger.info("Loading embedding model...")
-embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-logger.info("Embedding model loaded successfully")
-
-# Initialize ChromaDB
-logger.info("Initializing ChromaDB...")
-chroma_client = chromadb.Client()
-collection = chroma_client.get_or_create_collection(
-    name="pdf_documents",
-    metadata={"hnsw:space": "cosine"}
-)
-logger.info("ChromaDB initialized successfully")
+# Embedding model, vector store and caches are created lazily on first use so
+# importing this module (and Chainlit worker startup) stays fast
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+# "torch" (sentence-transformers) or "onnx" (ONNX Runtime, faster on CPU)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+# int8 dynamic quantization of the ONNX model
+EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "false").lower() in ("1", "true", "yes")
+# Intra-op threads for the encoder; 0 keeps the runtime's default
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+ONNX_MODEL_CACHE_PATH = os.getenv("ONNX_MODEL_CACHE_PATH", "onnx_models")
+# Persistent cache so unchanged chunks are never re-embedded
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache")
+EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float16")
+# Cached chunk embeddings kept; least recently used ones are evicted beyond it (0: unbounded)
+EMBEDDING_CACHE_MAX_ROWS = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "1000000"))
+# ChromaDB is persisted on disk so embeddings survive restarts
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "chroma_db")
+# "chroma" (HNSW) or "flat" (exact search over memory-mapped float16 vectors in CHROMA_DB_PATH/flat)
+VECTOR_ENGINE = os.getenv("VECTOR_ENGINE", "chroma").lower()
+COLLECTION_NAME = "pdf_documents"
+# Document namespaces: "user" (per authenticated user, else per session),
+# "session" or "shared" (one global corpus)
+NAMESPACE_MODE = os.getenv("NAMESPACE_MODE", "user").lower()
+# Also search the shared namespace from private namespaces
+SHARED_CORPUS = os.getenv("SHARED_CORPUS", "true").lower() in ("1", "true", "yes")
+# Namespaces unused for this long (or beyond NAMESPACE_MAX_OPEN) are released from memory
+NAMESPACE_IDLE_SECONDS = float(os.getenv("NAMESPACE_IDLE_SECONDS", "900"))
+NAMESPACE_MAX_OPEN = int(os.getenv("NAMESPACE_MAX_OPEN", "64"))
+# Documents older than this are deleted by a background sweep (0 disables)
+DOCUMENT_TTL_DAYS = float(os.getenv("DOCUMENT_TTL_DAYS", "0"))
+DOCUMENT_SWEEP_INTERVAL = float(os.getenv("DOCUMENT_SWEEP_INTERVAL", "3600"))
+# Rebuild a namespace's index once this fraction of its chunks has been deleted (0 disables)
+COMPACT_AFTER_DELETED_FRACTION = float(os.getenv("COMPACT_AFTER_DELETED_FRACTION", "0.3"))
+# Memory budget for Chroma's loaded indexes; least recently used are unloaded (0: unlimited).
+# Released namespaces stay in Chroma's cache until this limit pushes them out.
+CHROMA_MEMORY_LIMIT_MB = int(os.getenv("CHROMA_MEMORY_LIMIT_MB", "1024"))
+# Uploads are spooled here and ingested by background workers that resume after a restart
+INGEST_QUEUE_PATH = os.getenv("INGEST_QUEUE_PATH", "ingest_queue")
+INGEST_QUEUE_WORKERS = int(os.getenv("INGEST_QUEUE_WORKERS", "2"))
+# Pages extracted between checkpoints
+INGEST_CHECKPOINT_PAGES = int(os.getenv("INGEST_CHECKPOINT_PAGES", "20"))
+# Jobs interrupted this many times (e.g. by crashes) are failed rather than resumed
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+# Load the encoder and vector store in the background when the app starts
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes")
 
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
-    """Extract text from PDF content."""
-    logger.info(f"Starting PDF text extraction, content size: {len(pdf_content)} bytes")
-    
-    text = ""
+def _load_embedding_model() -> EmbeddingBackend:
+    return create_embedding_backend(
+        EMBEDDING_BACKEND,
+        EMBEDDING_MODEL_NAME,
+        batch_size=EMBED_BATCH_SIZE,
+        threads=EMBEDDING_THREADS or None,
+        quantize=EMBEDDING_QUANTIZE,
+        cache_dir=ONNX_MODEL_CACHE_PATH,
+    )
+
+
+def _open_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(
+        EMBEDDING_CACHE_PATH,
+        # Keyed by backend too: ONNX and int8 vectors differ slightly from PyTorch ones
+        get_embedding_model().name,
+        get_embedding_model().dim,
+        dtype=EMBEDDING_CACHE_DTYPE,
+        max_rows=EMBEDDING_CACHE_MAX_ROWS,
+    )
+
+
+def _open_vector_store():
+    if VECTOR_ENGINE == "flat":
+        return FlatClient(os.path.join(CHROMA_DB_PATH, "flat"))
+    if VECTOR_ENGINE != "chroma":
+        raise ValueError(f"Unknown VECTOR_ENGINE {VECTOR_ENGINE!r}; expected 'chroma' or 'flat'")
+    import chromadb
+    from chromadb.config import Settings
+
+    settings = Settings(anonymized_telemetry=False)
+    if CHROMA_MEMORY_LIMIT_MB:
+        settings = Settings(
+            anonymized_telemetry=False,
+            chroma_segment_cache_policy="LRU",
+            chroma_memory_limit_bytes=CHROMA_MEMORY_LIMIT_MB * 1024 * 1024,
+        )
+    return chromadb.PersistentClient(path=CHROMA_DB_PATH, settings=settings)
+
+
+# Suffix of the temporary collection a namespace is rebuilt into during compaction
+COMPACTING_SUFFIX = "-compacting"
+
+
+class DocumentStore(NamedTuple):
+    """The vector collection and keyword index of one namespace."""
+    collection: Any
+    keyword_index: KeywordIndex
+
+
+def _open_namespace(namespace: str) -> DocumentStore:
+    client = vector_store.get()
+    name = storage_name(COLLECTION_NAME, namespace)
+    existing = {c.name for c in client.list_collections()}
+    if name not in existing and name + COMPACTING_SUFFIX in existing:
+        # A compaction was interrupted after the old collection was dropped
+        logger.warning(f"Restoring {name} from an interrupted compaction")
+        client.get_collection(name + COMPACTING_SUFFIX).modify(name=name)
+    collection = client.get_or_create_collection(
+        name=name,
+        metadata={"hnsw:space": "cosine", "namespace": namespace}
+    )
+    # BM25 keyword index stored alongside the Chroma collection
+    keyword_index = KeywordIndex(os.path.join(CHROMA_DB_PATH, storage_name("keyword_index", namespace) + ".sqlite"))
+    sync_keyword_index(collection, keyword_index)
+    return DocumentStore(collection, keyword_index)
+
+
+def _load_reranker():
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(RERANKER_MODEL, device="cpu")
+
+
+embedding_model = LazyResource("embedding model", _load_embedding_model)
+reranker = LazyResource("reranker", _load_reranker)
+embedding_cache = LazyResource("embedding cache", _open_embedding_cache)
+vector_store = LazyResource("vector store", _open_vector_store)
+ingest_queue = LazyResource("ingest queue", lambda: IngestQueue(INGEST_QUEUE_PATH))
+namespace_registry = NamespaceRegistry(_open_namespace, NAMESPACE_IDLE_SECONDS, NAMESPACE_MAX_OPEN)
+
+
+def get_embedding_model() -> EmbeddingBackend:
+    """Return the embedding backend, loading the model on first use."""
+    return embedding_model.get()
+
+
+def get_reranker():
+    """Return the cross-encoder used for re-ranking, loading it on first use."""
+    return reranker.get()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the on-disk embedding cache, opening it on first use."""
+    return embedding_cache.get()
+
+
+def get_collection(namespace: str = SHARED_NAMESPACE):
+    """Return the Chroma collection of ``namespace``, opening it on first use."""
+    return namespace_registry.get(namespace).collection
+
+
+def get_keyword_index(namespace: str = SHARED_NAMESPACE) -> KeywordIndex:
+    """Return the BM25 keyword index of ``namespace``, opening it on first use."""
+    return namespace_registry.get(namespace).keyword_index
+
+
+def search_namespaces(namespace: str) -> List[str]:
+    """Namespaces searched on behalf of ``namespace``: its own, plus the shared corpus."""
+    if SHARED_CORPUS and namespace != SHARED_NAMESPACE:
+        return [namespace, SHARED_NAMESPACE]
+    return [namespace]
+
+
+def warm_up() -> None:
+    """Load the encoder and vector store and run one encode so the first query is fast."""
     try:
-        # Create a BytesIO object from the PDF content
-        logger.info("Creating BytesIO stream from PDF content")
-        pdf_stream = io.BytesIO(pdf_content)
-        
-        logger.info("Initializing PyPDF2 reader")
-        pdf_reader = PyPDF2.PdfReader(pdf_stream)
-        
-        num_pages = len(pdf_reader.pages)
-        logger.info(f"PDF has {num_pages} pages")
-        
-        for page_num, page in enumerate(pdf_reader.pages):
-            try:
-                logger.info(f"Extracting text from page {page_num + 1}/{num_pages}")
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-                    logger.info(f"Page {page_num + 1}: extracted {len(page_text)} characters")
-                else:
-                    logger.warning(f"Page {page_num + 1}: no text extracted")
-            except Exception as e:
-                logger.error(f"Error extracting text from page {page_num + 1}: {e}")
-                continue
-                
+        get_embedding_model().encode(["warm-up"])
+        get_collection()
+        get_embedding_cache()
+        if RERANK_ENABLED:
+            get_reranker().predict([("warm-up", "warm-up")])
     except Exception as e:
-        logger.error(f"Error reading PDF: {e}")
-        raise Exception(f"Failed to extract text from PDF: {e}")
-    
-    extracted_length = len(text.strip())
-    logger.info(f"PDF text extraction completed. Total characters extracted: {extracted_length}")
-    return text.strip()
+        logger.error(f"Warm-up failed: {e}")
 
 
-def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
-    """Split text into overlapping chunks."""
-    logger.info(f"Starting text chunking, input length: {len(text)} characters")
-    
-    if not text or len(text.strip()) == 0:
-        logger.warning("No text provided for chunking")
-        return []
-        
-    chunks = []
-    start = 0
-    text_length = len(text)
-    
-    while start < text_length:
-        end = start + chunk_size
-        chunk = text[start:end]
-        
-        # Try to break at sentence boundary
-        if end < text_length:
-            last_period = chunk.rfind('.')
-            if last_period > chunk_size * 0.5:  # Only if period is in latter half
-                chunk = chunk[:last_period + 1]
-                end = start + last_period + 1
-        
-        chunk = chunk.strip()
-        if chunk:  # Only add non-empty chunks
-            chunks.append(chunk)
-            logger.debug(f"Created chunk {len(chunks)}: {len(chunk)} characters")
-        
-        start = end - overlap
-        
-        if start >= text_length:
-            break
-    
-    logger.info(f"Text chunking completed. Created {len(chunks)} chunks")
-    return chunks
+@cl.on_app_startup
+def start_warm_up():
+    if WARMUP_ON_STARTUP:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    try:
+        start_ingest_workers()
+    except RuntimeError:
+        # No event loop yet; the workers start with the first chat session
+        pass
+    if DOCUMENT_TTL_DAYS:
+        threading.Thread(target=_sweep_expired_documents, name="document-expiry", daemon=True).start()
+    if METRICS_PORT:
+        try:
+            start_metrics_server(metrics, METRICS_HOST, METRICS_PORT)
+        except OSError as e:
+            logger.warning(f"Could not serve metrics on {METRICS_HOST}:{METRICS_PORT}: {e}")
 
+# LLM settings
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1:8b")
+# How to display <think> reasoning: "collapse" (separate step), "hide" or "show"
+THINKING_DISPLAY = os.getenv("THINKING_DISPLAY", "collapse").lower()
+ollama_client = ollama.AsyncClient()
+# Prompt size cap and number of recent turns kept verbatim; older turns are summarized
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+HISTORY_RECENT_TURNS = int(os.getenv("HISTORY_RECENT_TURNS", "4"))
 
-def add_pdf_to_vectorstore(pdf_content: bytes, filename: str) -> int:
-    """Process PDF and add to vector store."""
-    logger.info(f"Starting PDF processing for: {filename}")
-    
+SYSTEM_PROMPT = """You are a helpful AI assistant with access to a PDF document database. 
+
+When users ask questions about documents, I will provide you with relevant context from the PDFs. Use this context to answer their questions accurately.
+
+If no relevant context is provided, you can answer general questions normally.
+
+You can also help users with:
+1. General conversation and questions
+2. Document analysis and Q&A based on uploaded PDFs
+3. Image analysis (if images are provided)
+
+Always be helpful and accurate in your responses."""
+
+# Reuse answers to near-identical questions that retrieve the chunks the answer was built from
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+    min_overlap=float(os.getenv("ANSWER_CACHE_MIN_OVERLAP", "1.0")),
+)
+
+# Hybrid retrieval: candidates fetched from each retriever before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+
+# Second-stage ranking: over-fetch, score with a cross-encoder, then diversify with MMR
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "true").lower() in ("1", "true", "yes")
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "50"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_TIME_BUDGET = float(os.getenv("RERANK_TIME_BUDGET_MS", "300")) / 1000
+# Cross-encoder logit below which a chunk is not used (0 is probability 0.5)
+RERANK_MIN_SCORE = float(os.getenv("RERANK_MIN_SCORE", "0"))
+MMR_DIVERSITY = float(os.getenv("MMR_DIVERSITY", "0.3"))
+# Chunks passed to the LLM as context
+CONTEXT_CHUNKS = int(os.getenv("CONTEXT_CHUNKS", "3"))
+# Vector distance cutoff for candidates the cross-encoder did not score
+MAX_VECTOR_DISTANCE = 0.8
+
+# Ingestion pipeline settings
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", str(DEFAULT_MAX_TOKENS)))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", str(DEFAULT_OVERLAP_TOKENS)))
+VECTOR_ADD_BATCH_SIZE = 5000  # stay below Chroma's maximum batch size
+
+# Bounded pools for every kind of blocking call, so handlers never block the event loop
+extraction_pool = WorkPool("extraction", INGEST_WORKERS, kind="process")
+embedding_pool = WorkPool("embedding", int(os.getenv("EMBEDDING_CONCURRENCY", "1")))
+rerank_pool = WorkPool("rerank", int(os.getenv("RERANK_CONCURRENCY", "1")))
+vector_db_pool = WorkPool("vector_db", int(os.getenv("VECTOR_DB_CONCURRENCY", "4")))
+llm_pool = WorkPool("llm", int(os.getenv("LLM_CONCURRENCY", "2")), kind="async")
+WORK_POOLS = [extraction_pool, embedding_pool, rerank_pool, vector_db_pool, llm_pool]
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """Return queue depth and timing metrics for each work pool."""
+    return [pool.stats() for pool in WORK_POOLS]
+
+
+# Per-stage latency histograms, served in Prometheus format (METRICS_PORT=0 disables)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+STAGES = (
+    "extraction", "chunking", "embedding", "vector_add", "query_embedding",
+    "retrieval", "rerank", "llm_first_token", "llm_generation",
+)
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "local_gpt_stage_seconds", "Time spent in each pipeline stage, in seconds", ["stage"]
+)
+
+
+def _pool_and_cache_metrics() -> List[str]:
+    lines = []
+    for name, kind, help_text in (
+        ("waiting", "gauge", "Calls queued for a work pool"),
+        ("active", "gauge", "Calls running in a work pool"),
+        ("completed", "counter", "Calls finished by a work pool"),
+        ("failed", "counter", "Calls that raised in a work pool"),
+    ):
+        metric = f"local_gpt_pool_{name}" + ("_total" if kind == "counter" else "")
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{pool="{stats["name"]}"}} {stats[name]}' for stats in get_pool_stats()]
+    lines += [
+        "# HELP local_gpt_answer_cache_requests_total Answer cache lookups by result",
+        "# TYPE local_gpt_answer_cache_requests_total counter",
+        f'local_gpt_answer_cache_requests_total{{result="hit"}} {answer_cache.hits}',
+        f'local_gpt_answer_cache_requests_total{{result="miss"}} {answer_cache.misses}',
+        "# HELP local_gpt_namespaces_open Document namespaces currently held open",
+        "# TYPE local_gpt_namespaces_open gauge",
+        f"local_gpt_namespaces_open {len(namespace_registry)}",
+        "# HELP local_gpt_query_embedding_requests_total Query embeddings by source",
+        "# TYPE local_gpt_query_embedding_requests_total counter",
+        f'local_gpt_query_embedding_requests_total{{result="hit"}} {query_encoder.hits}',
+        f'local_gpt_query_embedding_requests_total{{result="coalesced"}} {query_encoder.coalesced}',
+        f'local_gpt_query_embedding_requests_total{{result="encoded"}} {query_encoder.misses - query_encoder.coalesced}',
+        "# HELP local_gpt_query_embedding_batches_total Batched query encoder calls",
+        "# TYPE local_gpt_query_embedding_batches_total counter",
+        f"local_gpt_query_embedding_batches_total {query_encoder.batches}",
+    ]
+    if ingest_queue.loaded:
+        lines += [
+            "# HELP local_gpt_ingest_jobs_pending Ingestion jobs queued or running",
+            "# TYPE local_gpt_ingest_jobs_pending gauge",
+            f"local_gpt_ingest_jobs_pending {ingest_queue.get().pending_count()}",
+        ]
+    return lines
+
+
+metrics.add_collector(_pool_and_cache_metrics)
+
+
+# Token-aware chunking sized to the embedding model's input limit
+chunk_document = functools.partial(
+    chunk_pdf_timed,
+    max_tokens=CHUNK_MAX_TOKENS,
+    overlap_tokens=CHUNK_OVERLAP_TOKENS,
+    tokenizer_name=EMBEDDING_MODEL_NAME,
+)
+chunk_extracted_pages = functools.partial(chunk_page_batch, tokenizer_name=EMBEDDING_MODEL_NAME)
+
+
+@stage_seconds.time(stage="embedding")
+def embed_chunks(texts: List[str]) -> List[List[float]]:
+    """Embed chunk texts, serving previously seen chunks from the embedding cache."""
+    embeddings = get_embedding_cache().encode(texts, get_embedding_model().encode)
+    return embeddings.tolist()
+
+
+def count_chunks(namespace: str = SHARED_NAMESPACE) -> int:
+    """Return the number of chunks stored in ``namespace``."""
+    return get_collection(namespace).count()
+
+
+def is_document_indexed(doc_hash: str, namespace: str = SHARED_NAMESPACE) -> bool:
+    """Check whether a document with this content hash is already stored in ``namespace``."""
+    existing = get_collection(namespace).get(where={"doc_hash": doc_hash}, limit=1, include=[])
+    return bool(existing["ids"])
+
+
+def store_document_chunks(
+    filename: str,
+    doc_hash: str,
+    batches: Iterable[Tuple[List[Chunk], List[List[float]]]],
+    namespace: str = SHARED_NAMESPACE,
+) -> int:
+    """Write one document's embedded chunks to ``namespace``; returns the number stored.
+
+    ``batches`` yields ``(chunks, embeddings)`` pairs, each written with one
+    bulk ``collection.add`` call, so a long document is never held in memory
+    at once. Previous versions stored under the same filename are removed
+    once every chunk of the new one is stored; if a write fails, the chunks
+    already added are removed instead and the previous version is kept.
+    """
+    started = time.perf_counter()
+    with namespace_write_lock(namespace):
+        count = _store_document_chunks(filename, doc_hash, batches, namespace)
+    stage_seconds.observe(time.perf_counter() - started, stage="vector_add")
+    return count
+
+
+def _store_document_chunks(
+    filename: str, doc_hash: str, batches: Iterable[Tuple[List[Chunk], List[List[float]]]], namespace: str
+) -> int:
+    collection = get_collection(namespace)
+    keyword_index = get_keyword_index(namespace)
+    # Chunks of this version left by an earlier attempt that stopped partway
+    partial = collection.get(where={"$and": [{"filename": filename}, {"doc_hash": doc_hash}]}, include=[])["ids"]
+    if partial:
+        collection.delete(ids=partial)
+        keyword_index.delete(ids=partial)
+    previous = collection.get(where={"filename": filename}, include=[])["ids"]
+
+    # The new version is written under its own ids before the previous one is
+    # deleted, so a failure partway keeps the previous version searchable
+    indexed_at = time.time()
+    added: List[str] = []
     try:
-        # Extract text
-        logger.info(f"Step 1: Extracting text from {filename}")
-        text = extract_text_from_pdf(pdf_content)
-        
-        if not text:
-            error_msg = f"No text could be extracted from {filename}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
-        
-        logger.info(f"Step 2: Text extraction successful for {filename}")
-        
-        # Chunk text
-        logger.info(f"Step 3: Chunking text for {filename}")
-        chunks = chunk_text(text)
-        
-        if not chunks:
-            error_msg = f"No valid text chunks could be created from {filename}"
-            logger.error(error_msg)
-            raise Exception(error_msg)
-        
-        logger.info(f"Step 4: Created {len(chunks)} chunks for {filename}")
-        
-        # Generate embeddings
-        logger.info(f"Step 5: Generating embeddings for {len(chunks)} chunks from {filename}")
+        for chunks, embeddings in batches:
+            ids = [f"{doc_hash}_{i}" for i in range(len(added), len(added) + len(chunks))]
+            texts = [chunk.text for chunk in chunks]
+            metadatas = [{
+                "filename": filename,
+                "chunk_id": i,
+                "doc_hash": doc_hash,
+                "page_start": chunk.page_start,
+                "page_end": chunk.page_end,
+                "indexed_at": indexed_at,
+            } for i, chunk in enumerate(chunks, len(added))]
+            collection.add(embeddings=embeddings, documents=texts, metadatas=metadatas, ids=ids)
+            added.extend(ids)
+            keyword_index.add(ids, texts, metadatas)
+    except Exception:
+        if added:
+            collection.delete(ids=added)
+            keyword_index.delete(ids=added)
+        raise
+
+    if previous:
+        collection.delete(ids=previous)
+        keyword_index.delete(ids=previous)
+        _record_deletions(namespace, len(previous))
+    answer_cache.invalidate_files([filename])
+    return len(added)
+
+
+def sync_keyword_index(collection, keyword_index: KeywordIndex) -> None:
+    """Backfill the keyword index from the collection if it is missing chunks.
+
+    Covers collections built before the keyword index existed.
+    """
+    total = collection.count()
+    if keyword_index.count() >= total:
+        return
+    logger.info(f"Rebuilding keyword index from {total} stored chunks")
+    for offset in range(0, total, VECTOR_ADD_BATCH_SIZE):
+        batch = collection.get(limit=VECTOR_ADD_BATCH_SIZE, offset=offset, include=["documents", "metadatas"])
+        keyword_index.delete(ids=batch["ids"])
+        keyword_index.add(batch["ids"], batch["documents"], batch["metadatas"])
+
+
+# Chunks deleted per namespace since its last compaction
+_deleted_since_compaction: Dict[str, int] = {}
+_namespace_locks: Dict[str, threading.RLock] = {}
+_namespace_locks_guard = threading.Lock()
+
+
+def namespace_write_lock(namespace: str) -> threading.RLock:
+    """Lock serialising writes to ``namespace`` with its compaction."""
+    with _namespace_locks_guard:
+        return _namespace_locks.setdefault(namespace, threading.RLock())
+
+
+def _record_deletions(namespace: str, count: int) -> None:
+    _deleted_since_compaction[namespace] = _deleted_since_compaction.get(namespace, 0) + count
+
+
+def list_namespaces() -> List[str]:
+    """Return every namespace that has a collection on disk."""
+    found = []
+    for collection in vector_store.get().list_collections():
+        if collection.name == COLLECTION_NAME:
+            found.append(SHARED_NAMESPACE)
+        elif collection.name.startswith(COLLECTION_NAME + "-") and not collection.name.endswith(COMPACTING_SUFFIX):
+            namespace = (collection.metadata or {}).get("namespace")
+            if namespace:
+                found.append(namespace)
+    return found
+
+
+def list_documents(namespace: str = SHARED_NAMESPACE) -> List[Dict[str, Any]]:
+    """List the documents in ``namespace``, newest first.
+
+    Each entry has ``filename``, ``doc_hash``, ``chunks``, ``pages`` (last
+    page seen) and ``indexed_at`` (Unix time, ``None`` for documents
+    indexed before it was recorded).
+    """
+    collection = get_collection(namespace)
+    documents: Dict[str, Dict[str, Any]] = {}
+    for offset in range(0, collection.count(), VECTOR_ADD_BATCH_SIZE):
+        batch = collection.get(limit=VECTOR_ADD_BATCH_SIZE, offset=offset, include=["metadatas"])
+        for metadata in batch["metadatas"]:
+            doc = documents.setdefault(metadata["doc_hash"], {
+                "filename": metadata["filename"],
+                "doc_hash": metadata["doc_hash"],
+                "chunks": 0,
+                "pages": 0,
+                "indexed_at": metadata.get("indexed_at"),
+            })
+            doc["chunks"] += 1
+            doc["pages"] = max(doc["pages"], metadata.get("page_end") or 0)
+    return sorted(documents.values(), key=lambda doc: doc["indexed_at"] or 0, reverse=True)
+
+
+def delete_documents(where: Dict[str, Any], namespace: str = SHARED_NAMESPACE) -> int:
+    """Delete every chunk matching the Chroma ``where`` filter; returns how many were removed."""
+    with namespace_write_lock(namespace):
+        collection = get_collection(namespace)
+        matched = collection.get(where=where, include=["metadatas"])
+        if not matched["ids"]:
+            return 0
+        collection.delete(ids=matched["ids"])
+        get_keyword_index(namespace).delete(ids=matched["ids"])
+        _record_deletions(namespace, len(matched["ids"]))
+    answer_cache.invalidate_files({metadata["filename"] for metadata in matched["metadatas"]})
+    logger.info(f"Deleted {len(matched['ids'])} chunks from namespace {namespace}")
+    return len(matched["ids"])
+
+
+def delete_document(
+    filename: Optional[str] = None, doc_hash: Optional[str] = None, namespace: str = SHARED_NAMESPACE
+) -> int:
+    """Delete a document by filename or content hash; returns the number of chunks removed."""
+    if (filename is None) == (doc_hash is None):
+        raise ValueError("Pass exactly one of filename or doc_hash")
+    where = {"filename": filename} if filename is not None else {"doc_hash": doc_hash}
+    return delete_documents(where, namespace)
+
+
+async def replace_document(
+    filename: str, pdf_content: Union[bytes, str], namespace: str = SHARED_NAMESPACE, new_filename: Optional[str] = None
+) -> int:
+    """Replace ``filename`` with new content, stored as ``new_filename`` (default: the same name).
+
+    Returns the number of chunks added. Raises if the new content cannot be
+    ingested, in which case the old document is kept. Content identical to
+    an indexed document is skipped and also keeps the old document, which
+    may be its only copy.
+    """
+    new_filename = new_filename or filename
+    result, = await ingest_pdfs([(new_filename, pdf_content)], namespace=namespace)
+    if result["status"] == "error":
+        raise Exception(result["error"])
+    added = result["chunks"]
+    if result["status"] == "added" and added and new_filename != filename:
+        delete_document(filename=filename, namespace=namespace)
+    return added
+
+
+def expire_documents(max_age_seconds: float, namespaces: Optional[List[str]] = None) -> Dict[str, int]:
+    """Delete documents indexed more than ``max_age_seconds`` ago; returns chunks removed per namespace.
+
+    Namespaces left with many deleted chunks are compacted afterwards.
+    """
+    cutoff = time.time() - max_age_seconds
+    removed = {}
+    for namespace in namespaces or list_namespaces():
+        count = delete_documents({"indexed_at": {"$lt": cutoff}}, namespace)
+        if count:
+            removed[namespace] = count
+        if compaction_due(namespace):
+            compact_namespace(namespace)
+    return removed
+
+
+def compaction_due(namespace: str) -> bool:
+    """Whether enough of ``namespace`` has been deleted to make a rebuild worthwhile."""
+    deleted = _deleted_since_compaction.get(namespace, 0)
+    if not COMPACT_AFTER_DELETED_FRACTION or not deleted:
+        return False
+    live = count_chunks(namespace)
+    return deleted >= COMPACT_AFTER_DELETED_FRACTION * (live + deleted)
+
+
+def compact_namespace(namespace: str = SHARED_NAMESPACE) -> int:
+    """Rebuild ``namespace``'s vector and keyword indexes from its live chunks.
+
+    Deleted vectors stay in Chroma's HNSW graph and keep costing memory and
+    search time. Compaction copies the live chunks into a fresh collection,
+    swaps it in under the original name and optimizes the keyword index.
+    Writes to the namespace wait until it finishes. Returns the number of
+    chunks kept.
+    """
+    started = time.perf_counter()
+    with namespace_write_lock(namespace):
+        client = vector_store.get()
+        old = get_collection(namespace)
+        name, temp_name = old.name, old.name + COMPACTING_SUFFIX
+        if temp_name in {c.name for c in client.list_collections()}:
+            client.delete_collection(temp_name)
+        new = client.create_collection(name=temp_name, metadata=old.metadata)
+
+        total = old.count()
+        for offset in range(0, total, VECTOR_ADD_BATCH_SIZE):
+            batch = old.get(
+                limit=VECTOR_ADD_BATCH_SIZE, offset=offset, include=["documents", "metadatas", "embeddings"]
+            )
+            new.add(
+                ids=batch["ids"],
+                documents=batch["documents"],
+                metadatas=batch["metadatas"],
+                embeddings=batch["embeddings"],
+            )
+
+        client.delete_collection(name)
+        new.modify(name=name)
+        # Searches still holding the old handle fail until the next access reopens it
+        namespace_registry.release(namespace)
+        get_keyword_index(namespace).optimize()
+        _deleted_since_compaction[namespace] = 0
+    logger.info(f"Compacted namespace {namespace}: {total} chunks in {time.perf_counter() - started:.1f}s")
+    return total
+
+
+def _sweep_expired_documents() -> None:
+    while True:
+        time.sleep(DOCUMENT_SWEEP_INTERVAL)
         try:
-            embeddings = embedding_model.encode(chunks).tolist()
-            logger.info(f"Step 6: Embeddings generated successfully for {filename}")
+            removed = expire_documents(DOCUMENT_TTL_DAYS * 86400)
+            if removed:
+                logger.info(f"Expired documents older than {DOCUMENT_TTL_DAYS} days: {removed}")
         except Exception as e:
-            logger.error(f"Failed to generate embeddings for {filename}: {e}")
-            raise
-        
-        # Create unique IDs for chunks
-        logger.info(f"Step 7: Creating unique IDs for chunks from {filename}")
-        ids = [f"{filename}_{i}_{uuid.uuid4().hex[:8]}" for i in range(len(chunks))]
-        
-        # Prepare metadata
-        logger.info(f"Step 8: Preparing metadata for {filename}")
-        metadatas = [{"filename": filename, "chunk_id": i} for i in range(len(chunks))]
-        
-        # Add to collection
-        logger.info(f"Step 9: Adding {len(chunks)} chunks to vector store for {filename}")
+            logger.error(f"Document expiry sweep failed: {e}")
+
+
+async def run_ingest_job(job: IngestJob) -> str:
+    """Ingest one queued PDF, resuming from its last checkpoint; returns the final job state.
+
+    Pages are extracted and chunked ``INGEST_CHECKPOINT_PAGES`` at a time,
+    carrying the chunker's unfinished window from one batch to the next, and
+    chunks are embedded ``EMBED_BATCH_SIZE`` at a time as they accumulate.
+    Every batch is saved to the queue before the next one starts, so memory
+    stays bounded by the batch sizes and a job interrupted by a restart only
+    repeats the batch that was in flight. The saved chunks are then written
+    to the vector store ``VECTOR_ADD_BATCH_SIZE`` at a time.
+    """
+    queue = ingest_queue.get()
+    source = job.source_path
+    doc_hash = await extraction_pool.run(compute_document_hash, source)
+    # A job interrupted while storing may have left some of its chunks; it stores them again
+    storing = job.pages_total and job.next_page > job.pages_total and job.chunks_embedded == job.chunks_total > 0
+    if not storing and await vector_db_pool.run(is_document_indexed, doc_hash, job.namespace):
+        logger.info(f"{job.filename} already indexed (sha256 {doc_hash[:12]}), skipping")
+        return SKIPPED
+
+    pages_total = job.pages_total or await extraction_pool.run(count_pdf_pages, source)
+    await vector_db_pool.run(queue.set_page_count, job.id, pages_total)
+    chunker = await vector_db_pool.run(queue.chunker, job.id) or TokenChunker(CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+    next_page, chunks_total, chunks_embedded = job.next_page, job.chunks_total, job.chunks_embedded
+    while True:
+        chunked = next_page > pages_total
+        # Embed full batches while pages are still being chunked, and the rest at the end
+        while chunks_total - chunks_embedded >= (1 if chunked else EMBED_BATCH_SIZE):
+            end = min(chunks_embedded + EMBED_BATCH_SIZE, chunks_total)
+            chunks = await vector_db_pool.run(queue.chunks, job.id, chunks_embedded, end)
+            embeddings = await embedding_pool.run(embed_chunks, [c.text for c in chunks])
+            await vector_db_pool.run(queue.save_embeddings, job.id, chunks_embedded, embeddings)
+            chunks_embedded = end
+        if chunked:
+            break
+
+        last = min(next_page + INGEST_CHECKPOINT_PAGES - 1, pages_total)
+        started = time.perf_counter()
+        pages = await extraction_pool.run(extract_pages, source, next_page, last)
+        stage_seconds.observe(time.perf_counter() - started, stage="extraction")
+        started = time.perf_counter()
+        chunks, chunker = await extraction_pool.run(chunk_extracted_pages, pages, chunker, last == pages_total)
+        stage_seconds.observe(time.perf_counter() - started, stage="chunking")
+        await vector_db_pool.run(queue.save_batch, job.id, chunks, chunker, last + 1)
+        next_page, chunks_total = last + 1, chunks_total + len(chunks)
+
+    if not chunks_total:
+        raise Exception(f"No text could be extracted from {job.filename}")
+
+    def saved_batches():
+        for start in range(0, chunks_total, VECTOR_ADD_BATCH_SIZE):
+            end = start + VECTOR_ADD_BATCH_SIZE
+            yield queue.chunks(job.id, start, end), queue.embeddings(job.id, start, end)
+
+    await vector_db_pool.run(store_document_chunks, job.filename, doc_hash, saved_batches(), job.namespace)
+    logger.info(f"Added {chunks_total} chunks from {job.filename} (job {job.id})")
+    return DONE
+
+
+_ingest_workers: List[asyncio.Task] = []
+_ingest_wakeup = asyncio.Event()
+
+
+def start_ingest_workers() -> None:
+    """Start the background ingestion workers on the running event loop, once.
+
+    Jobs a previous process left unfinished are queued again first.
+    Raises ``RuntimeError`` when called outside an event loop.
+    """
+    loop = asyncio.get_running_loop()
+    if _ingest_workers:
+        return
+    ingest_queue.get().requeue_interrupted(INGEST_MAX_ATTEMPTS)
+    for i in range(max(1, INGEST_QUEUE_WORKERS)):
+        _ingest_workers.append(loop.create_task(_ingest_worker(), name=f"ingest-worker-{i}"))
+
+
+async def _ingest_worker() -> None:
+    queue = ingest_queue.get()
+    while True:
+        _ingest_wakeup.clear()
+        job = await vector_db_pool.run(queue.claim)
+        if job is None:
+            try:
+                # Woken by enqueue_pdfs; the timeout is only a fallback
+                await asyncio.wait_for(_ingest_wakeup.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        logger.info(f"Ingesting {job.filename} (job {job.id}, attempt {job.attempts})")
         try:
-            collection.add(
-                embeddings=embeddings,
-                documents=chunks,
-                metadatas=metadatas,
-                ids=ids
-            )
-            logger.info(f"Step 10: Successfully added {len(chunks)} chunks to vector store for {filename}")
+            status, error = await run_ingest_job(job), None
         except Exception as e:
-            logger.error(f"Failed to add chunks to vector store for {filename}: {e}")
-            raise
-        
-        logger.info(f"PDF processing completed successfully for {filename}")
-        return len(chunks)
-        
-    except Exception as e:
-        logger.error(f"Error processing PDF {filename}: {e}")
-        raise e
+            logger.error(f"Ingestion job {job.id} for {job.filename} failed: {e}")
+            status, error = FAILED, str(e)
+        await vector_db_pool.run(queue.finish, job.id, status, error)
+
+
+async def enqueue_pdfs(sources: List[Tuple[str, Union[bytes, str]]], namespace: str = SHARED_NAMESPACE) -> List[int]:
+    """Queue ``(filename, path_or_bytes)`` pairs for background ingestion; returns their job IDs."""
+    start_ingest_workers()
+    queue = ingest_queue.get()
+    job_ids = [await vector_db_pool.run(queue.enqueue, name, source, namespace) for name, source in sources]
+    _ingest_wakeup.set()
+    return job_ids
+
+
+async def wait_for_jobs(
+    job_ids: List[int],
+    on_progress: Optional[Callable[[IngestJob], Awaitable[None]]] = None,
+    poll_seconds: float = 0.5,
+) -> List[IngestJob]:
+    """Wait until the given jobs finish, calling ``on_progress`` whenever one advances."""
+    queue = ingest_queue.get()
+    seen: Dict[int, tuple] = {}
+    while True:
+        jobs = [await vector_db_pool.run(queue.get, job_id) for job_id in job_ids]
+        for job in jobs:
+            progress = (job.status, job.next_page, job.chunks_total, job.chunks_embedded)
+            if seen.get(job.id) != progress:
+                seen[job.id] = progress
+                if on_progress:
+                    await on_progress(job)
+        if all(job.finished for job in jobs):
+            return jobs
+        await asyncio.sleep(poll_seconds)
+
+
+# Result status reported by ingest_pdfs for each final job state
+INGEST_RESULTS = {DONE: "added", SKIPPED: "skipped", FAILED: "error"}
+
+
+async def ingest_pdfs(
+    sources: List[Tuple[str, Union[bytes, str]]],
+    on_progress: Optional[Callable[[str, str], Awaitable[None]]] = None,
+    namespace: str = SHARED_NAMESPACE,
+) -> List[Dict[str, Any]]:
+    """Ingest several PDFs through the ingestion queue and wait until they finish.
+
+    Args:
+        sources: ``(filename, path_or_bytes)`` pairs to ingest.
+        on_progress: Optional coroutine called with ``(filename, status)``
+            whenever a file's job advances.
+        namespace: Namespace the documents are stored in.
+
+    Returns:
+        One result per source, in order, with ``filename``, ``status``
+        (``added``, ``skipped`` or ``error``), ``chunks`` and ``error``.
+    """
+    async def report(job: IngestJob) -> None:
+        await on_progress(job.filename, describe_job(job))
 
+    job_ids = await enqueue_pdfs(sources, namespace)
+    jobs = await wait_for_jobs(job_ids, report if on_progress else None)
+    return [{
+        "filename": job.filename,
+        "status": INGEST_RESULTS[job.status],
+        "chunks": job.chunks_total if job.status == DONE else 0,
+        "error": job.error,
+    } for job in jobs]
 
-def search_documents(query: str, n_results: int = 5) -> Dict[str, Any]:
-    """Search for relevant document chunks."""
-    logger.info(f"Searching documents for query: '{query[:50]}...' (showing first 50 chars)")
+
+def describe_job(job: IngestJob) -> str:
+    """One-line progress summary of an ingestion job."""
+    if job.status == QUEUED:
+        return "⏳ queued" + (f" (resuming, attempt {job.attempts + 1})" if job.attempts else "")
+    if job.status == DONE:
+        return f"✅ {job.chunks_total} chunks"
+    if job.status == SKIPPED:
+        return "♻️ already indexed"
+    if job.status == FAILED:
+        return f"❌ {job.error}"
+    if not job.pages_total or job.next_page <= job.pages_total:
+        return f"🔍 extracting pages {max(job.next_page - 1, 0)}/{job.pages_total or '?'}"
+    if job.chunks_embedded < job.chunks_total:
+        return f"🧮 embedding {job.chunks_embedded}/{job.chunks_total} chunks"
+    return f"💾 storing {job.chunks_total} chunks"
+
+
+@stage_seconds.time(stage="query_embedding")
+def encode_queries(queries: List[str]) -> np.ndarray:
+    """Embed a batch of search queries in one forward pass."""
+    return get_embedding_model().encode(queries)
+
+
+def encode_query(query: str) -> List[List[float]]:
+    """Embed a search query."""
+    return encode_queries([query]).tolist()
+
+
+# Concurrent questions are embedded together; repeated ones come from an LRU cache
+query_encoder = BatchingQueryEncoder(
+    lambda queries: embedding_pool.run(encode_queries, queries),
+    max_batch_size=int(os.getenv("QUERY_BATCH_SIZE", "32")),
+    max_wait=float(os.getenv("QUERY_BATCH_WAIT_MS", "5")) / 1000,
+    cache_size=int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")),
+)
+
+
+@stage_seconds.time(stage="retrieval")
+def search_documents(
+    query: str,
+    n_results: int = 5,
+    query_embedding: Optional[List[List[float]]] = None,
+    namespaces: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Search for relevant document chunks.
+
+    Runs dense (vector) and BM25 keyword retrieval, each over
+    ``HYBRID_CANDIDATES`` candidates, and fuses the two rankings with
+    reciprocal-rank fusion. ``matches`` records which retrievers found each
+    chunk; chunks found only by keyword have no vector distance (``None``).
+    ``embeddings`` holds each chunk's stored vector, for diversification.
+    The query is embedded here unless ``query_embedding`` is given.
+
+    Only ``namespaces`` (default: the shared namespace) are searched; their
+    hits are merged before fusion and ``namespaces`` in the result records
+    where each chunk was found. A document stored in several namespaces is
+    returned once, from the first namespace listed.
+    """
+    hot_path_logger.info(f"Searching documents for query: '{query[:50]}...' (showing first 50 chars)")
+    empty = {
+        "ids": [], "documents": [], "metadatas": [], "distances": [], "scores": [], "matches": [],
+        "embeddings": [], "namespaces": [],
+    }
     
     try:
-        logger.info("Generating query embedding")
-        query_embedding = embedding_model.encode([query]).tolist()
+        candidates = max(HYBRID_CANDIDATES, n_results)
+        found = {}
+        vector_hits, keyword_hits, keyword_namespace = [], [], {}
+        for namespace in namespaces or [SHARED_NAMESPACE]:
+            store = namespace_registry.get(namespace)
+            if store.collection.count() == 0:
+                continue
+            for chunk_id, score in store.keyword_index.search(query, candidates):
+                keyword_namespace.setdefault(chunk_id, namespace)
+                keyword_hits.append((score, chunk_id))
+            
+            if query_embedding is None:
+                hot_path_logger.info("Generating query embedding")
+                query_embedding = encode_query(query)
+            
+            results = store.collection.query(
+                query_embeddings=query_embedding,
+                n_results=candidates,
+                include=["documents", "metadatas", "distances", "embeddings"],
+            )
+            if results["ids"]:
+                for chunk_id, doc, metadata, distance, embedding in zip(
+                    results["ids"][0], results["documents"][0], results["metadatas"][0],
+                    results["distances"][0], results["embeddings"][0],
+                ):
+                    if chunk_id not in found:
+                        found[chunk_id] = (doc, metadata, distance, embedding, namespace)
+                        vector_hits.append((distance, chunk_id))
         
-        logger.info(f"Querying vector store for {n_results} results")
-        results = collection.query(
-            query_embeddings=query_embedding,
-            n_results=n_results
-        )
+        vector_ranking = [chunk_id for _, chunk_id in sorted(vector_hits, key=lambda hit: hit[0])]
+        keyword_ranking = list(dict.fromkeys(chunk_id for _, chunk_id in sorted(keyword_hits, key=lambda hit: -hit[0])))
+        hot_path_logger.info(f"Found {len(vector_ranking)} vector and {len(keyword_ranking)} keyword candidates")
+        fused = reciprocal_rank_fusion([vector_ranking, keyword_ranking])[:n_results]
+        
+        # Fetch chunks that only the keyword retriever returned
+        missing = {}
+        for chunk_id, _ in fused:
+            if chunk_id not in found:
+                missing.setdefault(keyword_namespace[chunk_id], []).append(chunk_id)
+        for namespace, ids in missing.items():
+            extra = get_collection(namespace).get(ids=ids, include=["documents", "metadatas", "embeddings"])
+            for chunk_id, doc, metadata, embedding in zip(
+                extra["ids"], extra["documents"], extra["metadatas"], extra["embeddings"]
+            ):
+                found[chunk_id] = (doc, metadata, None, embedding, namespace)
         
-        num_results = len(results["documents"][0]) if results["documents"] else 0
-        logger.info(f"Found {num_results} relevant documents")
+        keyword_set = set(keyword_ranking)
+        combined = {key: [] for key in empty}
+        for chunk_id, score in fused:
+            if chunk_id not in found:
+                continue
+            doc, metadata, distance, embedding, namespace = found[chunk_id]
+            match = [name for name, hit in (("vector", distance is not None), ("keyword", chunk_id in keyword_set)) if hit]
+            combined["ids"].append(chunk_id)
+            combined["documents"].append(doc)
+            combined["metadatas"].append(metadata)
+            combined["distances"].append(distance)
+            combined["scores"].append(score)
+            combined["matches"].append(match)
+            combined["embeddings"].append(embedding)
+            combined["namespaces"].append(namespace)
         
-        return {
-            "documents": results["documents"][0] if results["documents"] else [],
-            "metadatas": results["metadatas"][0] if results["metadatas"] else [],
-            "distances": results["distances"][0] if results["distances"] else []
-        }
+        hot_path_logger.info(f"Found {len(combined['ids'])} relevant documents")
+        return combined
     except Exception as e:
         logger.error(f"Error searching documents: {e}")
-        return {"documents": [], "metadatas": [], "distances": []}
+        return empty
+
+
+async def search_documents_async(
+    query: str, n_results: int = 5, namespaces: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Run :func:`search_documents` on the embedding and vector DB pools.
+
+    The query is embedded by ``query_encoder``, batched with other
+    concurrent searches or served from its cache.
+
+    The result also carries the ``query_embedding`` so callers can reuse it.
+    """
+    query_embedding = [(await query_encoder.encode(query)).tolist()]
+    results = await vector_db_pool.run(search_documents, query, n_results, query_embedding, namespaces)
+    results["query_embedding"] = query_embedding[0]
+    return results
+
+
+@stage_seconds.time(stage="rerank")
+def select_context(query: str, results: Dict[str, Any], k: int = CONTEXT_CHUNKS) -> List[int]:
+    """Choose which search results become LLM context; returns their indices.
+
+    Candidates are re-ranked with the cross-encoder within
+    ``RERANK_TIME_BUDGET`` and kept if they score at least
+    ``RERANK_MIN_SCORE``. Candidates left unscored (or all of them, with
+    re-ranking disabled) fall back to the keyword/vector-distance filter.
+    MMR then picks up to ``k`` chunks, trading rank against redundancy.
+    """
+    documents = results["documents"]
+    if not documents:
+        return []
+
+    if RERANK_ENABLED:
+        ranked = rerank(
+            query, documents, lambda pairs: get_reranker().predict(pairs, batch_size=RERANK_BATCH_SIZE),
+            batch_size=RERANK_BATCH_SIZE, time_budget=RERANK_TIME_BUDGET,
+        )
+        order, scores = ranked.order, ranked.scores
+    else:
+        order, scores = list(range(len(documents))), [None] * len(documents)
+
+    def is_relevant(i: int) -> bool:
+        if scores[i] is not None:
+            return scores[i] >= RERANK_MIN_SCORE
+        # Exact keyword matches bypass the semantic distance threshold
+        return "keyword" in results["matches"][i] or results["distances"][i] < MAX_VECTOR_DISTANCE
+
+    eligible = [i for i in order if is_relevant(i)]
+    embeddings = [results["embeddings"][i] for i in eligible]
+    if len(eligible) <= k or any(embedding is None for embedding in embeddings):
+        return eligible[:k]
+    # Rank-based relevance keeps scored and unscored candidates on one scale
+    relevance = 1.0 - np.arange(len(eligible)) / len(eligible)
+    return [eligible[j] for j in mmr_select(np.asarray(embeddings), relevance, k, MMR_DIVERSITY)]
 
 
 @cl.on_chat_start
@@ -206,29 +997,17 @@ async def start_chat():
     logger.info("Starting new chat session")
     
     cl.user_session.set(
-        "interaction",
-        [
-            {
-                "role": "system",
-                "content": """You are a helpful AI assistant with access to a PDF document database. 
-
-When users ask questions about documents, I will provide you with relevant context from the PDFs. Use this context to answer their questions accurately.
-
-If no relevant context is provided, you can answer general questions normally.
-
-You can also help users with:
-1. General conversation and questions
-2. Document analysis and Q&A based on uploaded PDFs
-3. Image analysis (if images are provided)
-
-Always be helpful and accurate in your responses.""",
-            }
-        ],
+        "history",
+        ConversationHistory(SYSTEM_PROMPT, max_tokens=CONTEXT_TOKEN_BUDGET, recent_turns=HISTORY_RECENT_TURNS),
     )
+    user = cl.user_session.get("user")
+    namespace = namespace_for(NAMESPACE_MODE, user.identifier if user else None, cl.user_session.get("id"))
+    cl.user_session.set("namespace", namespace)
+    start_ingest_workers()
 
     # Check if we have any documents in the database
     try:
-        count = collection.count()
+        count = sum([await vector_db_pool.run(count_chunks, ns) for ns in search_namespaces(namespace)])
         doc_status = f"\n\n📚 Documents in database: {count} chunks"
         logger.info(f"Database contains {count} document chunks")
     except Exception as e:
@@ -255,16 +1034,48 @@ How can I help you today?"""
     logger.info("Chat session started successfully")
 
 
+def get_session_namespace() -> str:
+    """Return the document namespace of the current chat session."""
+    return cl.user_session.get("namespace") or SHARED_NAMESPACE
+
+
+async def summarize_history(previous_summary: str, messages: List[Dict[str, Any]]) -> str:
+    """Fold older conversation turns into the rolling summary using the LLM."""
+    transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = f"""Update the summary of a conversation between a user and an assistant.
+
+Current summary:
+{previous_summary or "(none)"}
+
+New conversation turns:
+{transcript}
+
+Write the updated summary in at most 200 words. Keep facts, names, numbers, documents discussed and open questions. Reply with the summary only."""
+
+    async with llm_pool.slot():
+        response = await ollama_client.chat(model=OLLAMA_MODEL, messages=[{"role": "user", "content": prompt}])
+
+    # Drop any <think> reasoning from the summary
+    splitter = ThinkTagSplitter()
+    pieces = splitter.feed(response["message"]["content"]) + splitter.flush()
+    return "".join(text for is_thinking, text in pieces if not is_thinking)
+
+
 @cl.step(type="tool")
-async def process_query(input_message: str, image=None, pdf_context: str = None):
-    """Process user query with optional PDF context."""
-    logger.info(f"Processing query: '{input_message[:100]}...' (showing first 100 chars)")
+async def process_query(input_message: str, image=None, pdf_context: str = None, msg: cl.Message = None) -> str:
+    """Process user query with optional PDF context.
+
+    The model's reply is streamed into ``msg`` as chunks arrive. Reasoning
+    inside ``<think>`` tags is shown in a collapsible step, hidden or shown
+    inline depending on ``THINKING_DISPLAY``. Returns the answer text.
+    """
+    hot_path_logger.info(f"Processing query: '{input_message[:100]}...' (showing first 100 chars)")
     
-    interaction = cl.user_session.get("interaction")
+    history: ConversationHistory = cl.user_session.get("history")
     
     # Prepare the message content
     if pdf_context:
-        logger.info("Adding PDF context to query")
+        hot_path_logger.info("Adding PDF context to query")
         enhanced_message = f"""Context from relevant documents:
 {pdf_context}
 
@@ -272,43 +1083,120 @@ User question: {input_message}
 
 Please answer the user's question based on the provided context. If the context doesn't contain relevant information, mention that and provide a general response if possible."""
     else:
-        logger.info("Processing query without PDF context")
+        hot_path_logger.info("Processing query without PDF context")
         enhanced_message = input_message
 
+    user_message = {"role": "user", "content": enhanced_message}
     if image:
-        logger.info("Processing query with image")
-        interaction.append({"role": "user", "content": enhanced_message, "images": image})
-    else:
-        interaction.append({"role": "user", "content": enhanced_message})
+        hot_path_logger.info("Processing query with image")
+        user_message["images"] = image
+    messages = history.build_prompt(user_message)
+
+    hot_path_logger.info("Sending query to Ollama model")
+    splitter = ThinkTagSplitter()
+    answer_parts = []
+    thinking_step = None
 
-    logger.info("Sending query to Ollama model")
-    response = ollama.chat(model="deepseek-r1:8b", messages=interaction)
+    async def display(pieces):
+        nonlocal thinking_step
+        for is_thinking, text in pieces:
+            if not is_thinking:
+                answer_parts.append(text)
+                if msg is not None:
+                    await msg.stream_token(text)
+            elif THINKING_DISPLAY == "show" and msg is not None:
+                await msg.stream_token(text)
+            elif THINKING_DISPLAY == "collapse":
+                if thinking_step is None:
+                    thinking_step = cl.Step(name="Thinking", type="llm")
+                    await thinking_step.send()
+                await thinking_step.stream_token(text)
+
+    try:
+        async with llm_pool.slot():
+            with stage_seconds.time(stage="llm_generation"):
+                started = time.perf_counter()
+                stream = await ollama_client.chat(model=OLLAMA_MODEL, messages=messages, stream=True)
+                async for chunk in stream:
+                    if started is not None:
+                        stage_seconds.observe(time.perf_counter() - started, stage="llm_first_token")
+                        started = None
+                    await display(splitter.feed(chunk["message"]["content"]))
+                await display(splitter.flush())
+    finally:
+        if thinking_step is not None:
+            await thinking_step.update()
+
+    answer = "".join(answer_parts).strip()
+
+    # Store the original user message (not the enhanced one) and only the
+    # answer (not the reasoning) in the history, then fold older turns into
+    # the summary in the background
+    history.add_turn(dict(user_message, content=input_message), {"role": "assistant", "content": answer})
+    history.maybe_compact(summarize_history)
+
+    hot_path_logger.info("Query processed successfully")
+    return answer
 
-    # Store the original user message (not the enhanced one) in interaction history
-    interaction[-1]["content"] = input_message
-    interaction.append({"role": "assistant", "content": response.message.content})
 
-    logger.info("Query processed successfully")
-    return response
+def format_source(metadata: Dict[str, Any]) -> str:
+    """Describe where a chunk came from, including its pages when known."""
+    page_start, page_end = metadata.get("page_start"), metadata.get("page_end")
+    if page_start is None:
+        return metadata["filename"]
+    if page_end is None or page_end == page_start:
+        return f"{metadata['filename']}, p. {page_start}"
+    return f"{metadata['filename']}, pp. {page_start}-{page_end}"
+
+
+def get_pdf_source(pdf_file) -> Optional[Union[bytes, str]]:
+    """Return a path or bytes for an uploaded PDF element, or None if it has no content.
+
+    A path is preferred so the file can be hashed and extracted without
+    loading it into memory on the event loop thread.
+    """
+    # Method 1: Read from the uploaded file's path
+    if getattr(pdf_file, 'path', None):
+        hot_path_logger.info(f"Using uploaded file path for {pdf_file.name}: {pdf_file.path}")
+        return pdf_file.path
+    
+    # Method 2: Direct content access
+    content = getattr(pdf_file, 'content', None)
+    
+    # Method 3: Check if it's a file-like object
+    if not content and hasattr(pdf_file, 'read'):
+        try:
+            content = pdf_file.read()
+        except Exception as e:
+            logger.error(f"Reading {pdf_file.name} as file object failed: {e}")
+    
+    if not content:
+        logger.error(f"No content found in {pdf_file.name} using any method")
+        return None
+    
+    # Ensure content is bytes
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return content
 
 
 @cl.on_message
 async def main(message: cl.Message):
-    logger.info(f"Received message with {len(message.elements)} elements")
+    hot_path_logger.info(f"Received message with {len(message.elements)} elements")
     
     # Handle PDF uploads
     pdf_files = [file for file in message.elements if file.mime == "application/pdf"]
     images = [file for file in message.elements if "image" in file.mime]
     
-    logger.info(f"Found {len(pdf_files)} PDF files and {len(images)} images")
+    hot_path_logger.info(f"Found {len(pdf_files)} PDF files and {len(images)} images")
     
     # Debug file elements
     for i, element in enumerate(message.elements):
-        logger.info(f"Element {i}: name='{element.name}', mime='{element.mime}', size={element.size if hasattr(element, 'size') else 'unknown'}")
+        hot_path_logger.info(f"Element {i}: name='{element.name}', mime='{element.mime}', size={element.size if hasattr(element, 'size') else 'unknown'}")
         if hasattr(element, 'content'):
-            logger.info(f"Element {i} content type: {type(element.content)}, length: {len(element.content) if element.content else 'None'}")
+            hot_path_logger.info(f"Element {i} content type: {type(element.content)}, length: {len(element.content) if element.content else 'None'}")
         if hasattr(element, 'path'):
-            logger.info(f"Element {i} path: {element.path}")
+            hot_path_logger.info(f"Element {i} path: {element.path}")
     
     if pdf_files:
         logger.info("Starting PDF processing workflow")
@@ -317,64 +1205,50 @@ async def main(message: cl.Message):
         
         total_chunks = 0
         processed_files = []
+        sources = []
         
-        for i, pdf_file in enumerate(pdf_files):
-            logger.info(f"Processing PDF {i+1}/{len(pdf_files)}: {pdf_file.name}")
-            logger.info(f"PDF file attributes: {dir(pdf_file)}")
-            
-            try:
-                # Try different ways to get content
-                content = None
-                
-                # Method 1: Direct content access
-                if hasattr(pdf_file, 'content') and pdf_file.content:
-                    content = pdf_file.content
-                    logger.info(f"Method 1 - Got content from .content: {len(content)} bytes")
-                
-                # Method 2: Read from path if content is None
-                elif hasattr(pdf_file, 'path') and pdf_file.path:
-                    logger.info(f"Method 2 - Trying to read from path: {pdf_file.path}")
-                    try:
-                        with open(pdf_file.path, 'rb') as f:
-                            content = f.read()
-                        logger.info(f"Method 2 - Read from path: {len(content)} bytes")
-                    except Exception as e:
-                        logger.error(f"Method 2 failed: {e}")
-                
-                # Method 3: Check if it's a file-like object
-                elif hasattr(pdf_file, 'read'):
-                    logger.info("Method 3 - Trying to read as file-like object")
-                    try:
-                        content = pdf_file.read()
-                        logger.info(f"Method 3 - Read as file object: {len(content)} bytes")
-                    except Exception as e:
-                        logger.error(f"Method 3 failed: {e}")
-                
-                # Validate content
-                if not content:
-                    error_msg = f"No content found in {pdf_file.name} using any method"
-                    logger.error(error_msg)
-                    logger.error(f"Available attributes: {[attr for attr in dir(pdf_file) if not attr.startswith('_')]}")
-                    processed_files.append(f"❌ {pdf_file.name}: No content found")
-                    continue
-                
-                # Ensure content is bytes
-                if isinstance(content, str):
-                    content = content.encode('utf-8')
-                    logger.info(f"Converted string content to bytes: {len(content)} bytes")
-                
-                logger.info(f"PDF {pdf_file.name} has {len(content)} bytes of content")
-                
-                # Process PDF directly from content
-                chunks = add_pdf_to_vectorstore(content, pdf_file.name)
-                total_chunks += chunks
-                processed_files.append(f"✅ {pdf_file.name}: {chunks} chunks")
-                logger.info(f"Successfully processed {pdf_file.name}: {chunks} chunks added")
-                
-            except Exception as e:
-                error_msg = f"Error processing {pdf_file.name}: {str(e)}"
-                logger.error(error_msg)
-                processed_files.append(f"❌ {pdf_file.name}: Error - {str(e)}")
+        for pdf_file in pdf_files:
+            source = get_pdf_source(pdf_file)
+            if source is None:
+                processed_files.append(f"❌ {pdf_file.name}: No content found")
+                continue
+            sources.append((pdf_file.name, source))
+        
+        # Jobs run in background workers; this message follows their progress
+        file_status = {name: "⏳ queued" for name, _ in sources}
+        
+        async def on_progress(job: IngestJob):
+            file_status[job.filename] = describe_job(job)
+            processing_msg.content = "📄 Processing PDF(s)... (continues in the background if you leave; see `/jobs`)\n\n" + "\n".join(
+                f"{name}: {state}" for name, state in file_status.items()
+            )
+            await processing_msg.update()
+        
+        namespace = get_session_namespace()
+        # "/replace <old filename>" with one attached PDF swaps that document for the upload
+        command, _, replace_target = (message.content or "").strip().partition(" ")
+        replace_target = replace_target.strip() if command.lower() == "/replace" else ""
+        if replace_target and len(sources) != 1:
+            processed_files.append(f"❌ /replace needs exactly one attached PDF; {replace_target} was kept")
+            replace_target = ""
+        
+        job_ids = await enqueue_pdfs(sources, namespace)
+        for job in await wait_for_jobs(job_ids, on_progress):
+            name = job.filename
+            # Only a stored replacement removes the old document; a skipped duplicate may be its only copy
+            if replace_target and job.status == DONE and job.chunks_total and name != replace_target:
+                removed = await vector_db_pool.run(delete_document, replace_target, None, namespace)
+                processed_files.append(f"🗑️ {replace_target}: replaced ({removed} chunks removed)")
+            elif replace_target and name != replace_target:
+                processed_files.append(f"↩️ {replace_target}: kept, nothing new was stored")
+            if job.status == DONE:
+                total_chunks += job.chunks_total
+                processed_files.append(f"✅ {name}: {job.chunks_total} chunks")
+                logger.info(f"Successfully processed {name}: {job.chunks_total} chunks added")
+            elif job.status == SKIPPED:
+                processed_files.append(f"♻️ {name}: already indexed")
+            else:
+                processed_files.append(f"❌ {name}: Error - {job.error}")
         
         # Update processing message
         result_message = f"📄 PDF Processing Complete!\n\n" + "\n".join(processed_files)
@@ -394,12 +1268,31 @@ async def main(message: cl.Message):
     if message.content and message.content.strip().lower() == '/debug':
         logger.info("Debug command received - checking database status")
         try:
-            doc_count = collection.count()
-            await cl.Message(f"📊 **Database Status:**\n- Total document chunks: {doc_count}\n- Collection name: {collection.name}\n- Embedding model: sentence-transformers/all-MiniLM-L6-v2").send()
+            namespace = get_session_namespace()
+            doc_count = await vector_db_pool.run(count_chunks, namespace)
+            await cl.Message(f"📊 **Database Status:**\n- Total document chunks: {doc_count}\n- Namespace: {namespace} (collection `{storage_name(COLLECTION_NAME, namespace)}`, {len(namespace_registry)} namespaces open)\n- Vector engine: {VECTOR_ENGINE}\n- Embedding model: {EMBEDDING_MODEL_NAME} ({EMBEDDING_BACKEND}{', int8' if EMBEDDING_QUANTIZE else ''})").send()
+            
+            pool_info = "**Work pools** (waiting / active / limit, peak queue, avg wait):\n"
+            for stats in get_pool_stats():
+                pool_info += (
+                    f"- `{stats['name']}`: {stats['waiting']} / {stats['active']} / {stats['max_concurrency']}, "
+                    f"peak {stats['max_waiting']}, {stats['avg_wait_ms']:.0f} ms\n"
+                )
+            pool_info += "\n**Resources:**\n"
+            for resource in (embedding_model, reranker, embedding_cache, vector_store, ingest_queue):
+                status = f"loaded in {resource.load_seconds:.2f}s" if resource.loaded else "not loaded"
+                pool_info += f"- {resource.name}: {status}\n"
+            pool_info += "\n**Stage latency** (count, p50 / p95):\n"
+            for stage in STAGES:
+                count = stage_seconds.count(stage=stage)
+                if count:
+                    p50, p95 = (1000 * stage_seconds.quantile(q, stage=stage) for q in (0.5, 0.95))
+                    pool_info += f"- {stage}: {count}, {p50:.0f} / {p95:.0f} ms\n"
+            await cl.Message(pool_info).send()
             
             if doc_count > 0:
                 # Show some sample documents
-                sample_results = collection.get(limit=3)
+                sample_results = await vector_db_pool.run(lambda: get_collection(namespace).get(limit=3))
                 sample_info = "**Sample documents:**\n"
                 for i, (doc, metadata) in enumerate(zip(sample_results['documents'], sample_results['metadatas'])):
                     filename = metadata.get('filename', 'unknown')
@@ -412,6 +1305,62 @@ async def main(message: cl.Message):
             await cl.Message(f"❌ Error checking database: {e}").send()
         return
     
+    # Document lifecycle commands
+    command, _, argument = (message.content or "").strip().partition(" ")
+    argument = argument.strip()
+    if command.lower() == '/docs':
+        namespace = get_session_namespace()
+        documents = await vector_db_pool.run(list_documents, namespace)
+        if not documents:
+            await cl.Message("❌ No documents indexed yet. Try uploading a PDF first.").send()
+            return
+        lines = [f"📚 **Documents in {namespace}:**"]
+        for doc in documents:
+            indexed = time.strftime("%Y-%m-%d %H:%M", time.localtime(doc["indexed_at"])) if doc["indexed_at"] else "unknown"
+            lines.append(f"- `{doc['filename']}` ({doc['doc_hash'][:12]}): {doc['chunks']} chunks, {doc['pages']} pages, indexed {indexed}")
+        await cl.Message("\n".join(lines)).send()
+        return
+    
+    if command.lower() == '/delete':
+        if not argument:
+            await cl.Message("Usage: `/delete <filename or hash prefix>`").send()
+            return
+        namespace = get_session_namespace()
+        documents = await vector_db_pool.run(list_documents, namespace)
+        matches = [doc for doc in documents if doc["filename"] == argument] or [
+            doc for doc in documents if len(argument) >= 6 and doc["doc_hash"].startswith(argument)
+        ]
+        if len(matches) != 1:
+            problem = "No document matches" if not matches else f"{len(matches)} documents match"
+            await cl.Message(f"❌ {problem} `{argument}`. Use `/docs` to list documents.").send()
+            return
+        removed = await vector_db_pool.run(delete_document, None, matches[0]["doc_hash"], namespace)
+        reply = f"🗑️ Deleted `{matches[0]['filename']}` ({removed} chunks)"
+        if await vector_db_pool.run(compaction_due, namespace):
+            kept = await vector_db_pool.run(compact_namespace, namespace)
+            reply += f"\n\n🧹 Compacted the index ({kept} chunks kept)"
+        await cl.Message(reply).send()
+        return
+    
+    if command.lower() == '/jobs':
+        jobs = await vector_db_pool.run(ingest_queue.get().jobs, get_session_namespace())
+        if not jobs:
+            await cl.Message("No ingestion jobs yet.").send()
+            return
+        lines = ["📥 **Recent ingestion jobs:**"]
+        lines += [f"- #{job.id} `{job.filename}`: {describe_job(job)}" for job in jobs]
+        await cl.Message("\n".join(lines)).send()
+        return
+    
+    if command.lower() == '/compact':
+        kept = await vector_db_pool.run(compact_namespace, get_session_namespace())
+        await cl.Message(f"🧹 Compacted the index ({kept} chunks kept)").send()
+        return
+    
+    if command.lower() == '/replace':
+        await cl.Message("Attach the new PDF to `/replace <old filename>` to replace a document.").send()
+        return
+    
     # Help command
     if message.content and message.content.strip().lower() in ['/help', 'help']:
         help_text = """🤖 **Local GPT with PDF Q&A**
@@ -427,6 +1376,11 @@ async def main(message: cl.Message):
 
 **Commands:**
 • `/debug` - Check database status and see what PDFs are loaded
+• `/docs` - List indexed documents
+• `/jobs` - Show the progress of recent uploads
+• `/delete <filename or hash>` - Remove a document
+• `/replace <filename>` + attached PDF - Replace a document with a new version
+• `/compact` - Rebuild the index after many deletions
 • `/help` - Show this help message
 
 **Example Queries:**
@@ -439,56 +1393,79 @@ Ready to help! 🚀"""
         await cl.Message(content=help_text).send()
         return
     
+    # Retrieved candidates, the chunks selected as context (which key the answer cache) and the question's embedding
+    candidate_ids, context_ids, context_files, query_embedding = [], [], [], None
+    
+    async def answer_from_cache() -> bool:
+        cached_answer = answer_cache.lookup(query_embedding, candidate_ids)
+        if cached_answer is None:
+            return False
+        history: ConversationHistory = cl.user_session.get("history")
+        history.add_turn({"role": "user", "content": message.content}, {"role": "assistant", "content": cached_answer})
+        await cl.Message(content=cached_answer).send()
+        hot_path_logger.info("Message answered from cache")
+        return True
+    
     # Search for relevant documents if this looks like a question
     if message.content and len(message.content.strip()) > 10:
-        logger.info("Searching for relevant documents")
+        hot_path_logger.info("Searching for relevant documents")
         try:
-            search_results = search_documents(message.content)
+            search_results = await search_documents_async(
+                message.content,
+                n_results=RERANK_CANDIDATES if RERANK_ENABLED else 5,
+                namespaces=search_namespaces(get_session_namespace()),
+            )
+            query_embedding = search_results["query_embedding"]
             if search_results["documents"] and len(search_results["documents"]) > 0:
-                # Filter results by relevance (distance threshold)
+                # Qualified by namespace so cached answers never cross tenants
+                candidate_ids = [f"{ns}/{chunk_id}" for ns, chunk_id in zip(search_results["namespaces"], search_results["ids"])]
+                # Checked before re-ranking, so repeated questions skip the cross-encoder too
+                if not images and await answer_from_cache():
+                    return
+                selected = await rerank_pool.run(select_context, message.content, search_results)
                 relevant_docs = []
-                for i, (doc, metadata, distance) in enumerate(zip(
-                    search_results["documents"], 
-                    search_results["metadatas"], 
-                    search_results["distances"]
-                )):
-                    if distance < 0.8:  # Adjust threshold as needed
-                        relevant_docs.append(f"[From {metadata['filename']}]: {doc}")
-                        logger.info(f"Found relevant document chunk from {metadata['filename']} (distance: {distance:.3f})")
+                for i in selected:
+                    metadata = search_results["metadatas"][i]
+                    context_ids.append(candidate_ids[i])
+                    context_files.append(metadata["filename"])
+                    relevant_docs.append(f"[From {format_source(metadata)}]: {search_results['documents'][i]}")
+                    hot_path_logger.info(
+                        f"Using chunk from {metadata['filename']} "
+                        f"(matched by {'+'.join(search_results['matches'][i])}, distance: {search_results['distances'][i]})"
+                    )
                 
                 if relevant_docs:
-                    pdf_context = "\n\n".join(relevant_docs[:3])  # Limit to top 3 results
-                    logger.info(f"Using {len(relevant_docs)} relevant document chunks for context")
+                    pdf_context = "\n\n".join(relevant_docs)
+                    hot_path_logger.info(f"Using {len(relevant_docs)} of {len(search_results['documents'])} candidate chunks for context")
                 else:
-                    logger.info("No relevant documents found within distance threshold")
+                    hot_path_logger.info("No candidate chunks passed re-ranking")
             else:
-                logger.info("No documents found in search results")
+                hot_path_logger.info("No documents found in search results")
         except Exception as e:
             logger.error(f"Search error: {e}")
 
     # Log final context decision
     if pdf_context:
-        logger.info("🎯 WILL USE PDF CONTEXT for this query")
+        hot_path_logger.info("🎯 WILL USE PDF CONTEXT for this query")
     else:
-        logger.info("🚫 NO PDF CONTEXT - proceeding with general query processing")
-        logger.info("Reasons this might happen:")
-        logger.info("  • No PDFs uploaded/processed successfully")
-        logger.info("  • Query doesn't match document content semantically")
-        logger.info("  • Distance threshold too strict (currently 0.8)")
-        logger.info("  • Database is empty or search failed")
-
-    # Process the query
-    if images:
-        logger.info("Processing query with images")
-        tool_res = await process_query(message.content, [i.path for i in images], pdf_context)
-    else:
-        tool_res = await process_query(message.content, pdf_context=pdf_context)
+        hot_path_logger.info(
+            "🚫 NO PDF CONTEXT - proceeding with general query processing "
+            "(no PDFs processed, no semantic match, no chunk reached "
+            f"RERANK_MIN_SCORE ({RERANK_MIN_SCORE}), or the database is empty)"
+        )
 
-    # Stream the response
-    msg = cl.Message(content="")
+    # Document answers are cached under the chunks they were generated from
+    cacheable = bool(pdf_context) and bool(context_ids) and not images
 
-    for token in tool_res.message.content:
-        await msg.stream_token(token)
+    # Process the query, streaming the response as it is generated
+    msg = cl.Message(content="")
+    if images:
+        hot_path_logger.info("Processing query with images")
+        answer = await process_query(message.content, [i.path for i in images], pdf_context, msg=msg)
+    else:
+        answer = await process_query(message.content, pdf_context=pdf_context, msg=msg)
         
     await msg.send()
-    logger.info("Message processing completed")
+    if cacheable and answer:
+        answer_cache.store(query_embedding, context_ids, context_files, answer)
+    hot_path_logger.info("Message processing completed")
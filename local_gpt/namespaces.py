@@ -0,0 +1,166 @@
+"""Per-user and per-session document namespaces.
+
+Each namespace is a separate vector collection and keyword index. A search
+therefore only scans the caller's own documents, plus an optional shared
+corpus, instead of every tenant's uploads. Open namespaces are tracked
+here. Those idle for longer than a timeout, or beyond a maximum count, are
+released; their data stays on disk and is reopened on the next use.
+Releasing drops the handles, which frees keyword indexes and flat
+collections. Chroma keeps loaded indexes in its own cache, which only
+unloads them under its LRU memory limit.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Namespace holding documents visible to everyone (and all pre-namespace data)
+SHARED_NAMESPACE = "shared"
+NAMESPACE_MODES = ("user", "session", "shared")
+
+
+def namespace_for(mode: str, user_identifier: Optional[str], session_id: Optional[str]) -> str:
+    """Pick the namespace for a chat session.
+
+    ``user`` mode keys namespaces by the authenticated user and uses the
+    shared namespace when authentication is off, since an anonymous session's
+    uploads could not be found again after a reload. ``session`` mode (opt-in)
+    always uses the session; ``shared`` mode puts everything in one global
+    namespace.
+    """
+    if mode not in NAMESPACE_MODES:
+        raise ValueError(f"Unknown namespace mode {mode!r}; expected one of {', '.join(NAMESPACE_MODES)}")
+    if mode == "user" and user_identifier:
+        return f"user:{user_identifier}"
+    if mode == "session" and session_id:
+        return f"session:{session_id}"
+    return SHARED_NAMESPACE
+
+
+def storage_name(base: str, namespace: str) -> str:
+    """Return a collection/file name for ``namespace`` derived from ``base``.
+
+    The shared namespace keeps ``base`` itself, so existing data stays
+    visible. Others get a readable slug plus a hash, which keeps names unique
+    and within Chroma's rules (3-512 characters of ``[A-Za-z0-9._-]``,
+    starting and ending with an alphanumeric).
+    """
+    if namespace == SHARED_NAMESPACE:
+        return base
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", namespace).strip("-._")[:40]
+    digest = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:12]
+    return f"{base}-{slug}-{digest}"
+
+
+class NamespaceRegistry(Generic[T]):
+    """Opens namespaces on demand and releases the idle ones.
+
+    Args:
+        open_namespace: Called with a namespace name to open its handle.
+        idle_seconds: Namespaces unused for this long are released.
+        max_open: Most namespaces kept open at once; the least recently
+            used are released first.
+        pinned: Namespaces that are never released.
+    """
+
+    def __init__(
+        self,
+        open_namespace: Callable[[str], T],
+        idle_seconds: float = 900,
+        max_open: int = 64,
+        pinned: tuple = (SHARED_NAMESPACE,),
+    ):
+        self._open_namespace = open_namespace
+        self.idle_seconds = idle_seconds
+        self.max_open = max(1, max_open)
+        self.pinned = frozenset(pinned)
+        self._handles: "OrderedDict[str, T]" = OrderedDict()
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        # Per-namespace locks held while a namespace is being opened
+        self._opening: Dict[str, threading.Lock] = {}
+        self.opened = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def open_namespaces(self) -> List[str]:
+        """Names of the namespaces currently open, least recently used first."""
+        with self._lock:
+            return list(self._handles)
+
+    def get(self, namespace: str) -> T:
+        """Return the handle for ``namespace``, opening it if needed.
+
+        Opening can rebuild a keyword index, so it runs under a lock of its
+        own namespace only; other namespaces stay available meanwhile.
+        """
+        with self._lock:
+            handle = self._handles.get(namespace)
+            if handle is not None:
+                return self._touch(namespace, handle)
+            opening = self._opening.setdefault(namespace, threading.Lock())
+
+        with opening:
+            with self._lock:
+                # Another thread may have opened it while this one waited
+                handle = self._handles.get(namespace)
+            if handle is None:
+                logger.info(f"Opening namespace {namespace}")
+                handle = self._open_namespace(namespace)
+                with self._lock:
+                    self._handles[namespace] = handle
+                    self._opening.pop(namespace, None)
+                    self.opened += 1
+        with self._lock:
+            return self._touch(namespace, handle)
+
+    def _touch(self, namespace: str, handle: T) -> T:
+        now = time.monotonic()
+        if namespace in self._handles:
+            self._handles.move_to_end(namespace)
+            self._last_used[namespace] = now
+        self._evict(now)
+        return handle
+
+    def evict_idle(self) -> List[str]:
+        """Release namespaces idle for longer than ``idle_seconds``; returns their names."""
+        with self._lock:
+            return self._evict(time.monotonic())
+
+    def release(self, namespace: str) -> bool:
+        """Release one namespace (for example after it was deleted)."""
+        with self._lock:
+            return self._drop(namespace)
+
+    def _evict(self, now: float) -> List[str]:
+        evicted = [
+            name for name in self._handles
+            if name not in self.pinned and now - self._last_used[name] > self.idle_seconds
+        ]
+        # Beyond the limit, release least recently used first (but never the one just used)
+        unpinned = [name for name in self._handles if name not in self.pinned and name not in evicted]
+        excess = len(self._handles) - len(evicted) - self.max_open
+        evicted.extend(unpinned[:max(0, min(excess, len(unpinned) - 1))])
+        for name in evicted:
+            self._drop(name)
+        if evicted:
+            logger.info(f"Released {len(evicted)} idle namespaces")
+        return evicted
+
+    def _drop(self, namespace: str) -> bool:
+        # Callers still holding the handle can finish their work; the handle
+        # is closed once the last reference goes away
+        if self._handles.pop(namespace, None) is None:
+            return False
+        del self._last_used[namespace]
+        self.evicted += 1
+        return True
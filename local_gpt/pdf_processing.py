@@ -0,0 +1,412 @@
+"""PDF text extraction and chunking helpers.
+
+This module deliberately avoids importing the embedding model or the vector
+store so it can be loaded cheaply inside process-pool workers.
+"""
+import bisect
+import functools
+import hashlib
+import io
+import logging
+import re
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKENIZER = "sentence-transformers/all-MiniLM-L6-v2"
+# all-MiniLM-L6-v2 truncates at 256 tokens, two of which are [CLS] and [SEP]
+DEFAULT_MAX_TOKENS = 254
+DEFAULT_OVERLAP_TOKENS = 32
+
+# A sentence ends after ., ! or ? (plus closing quotes/brackets) followed by
+# whitespace, or at a blank line.
+SENTENCE_BOUNDARY = re.compile(r"([.!?][\"')\]]*)\s+|\n\s*\n")
+
+TokenCounter = Callable[[List[str]], np.ndarray]
+
+
+def compute_document_hash(pdf_content: Union[bytes, str]) -> str:
+    """Return the SHA-256 hex digest used to identify a PDF's contents.
+
+    Accepts the PDF bytes or a path, which is hashed in blocks without
+    reading the whole file into memory.
+    """
+    if isinstance(pdf_content, str):
+        digest = hashlib.sha256()
+        with open(pdf_content, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+    return hashlib.sha256(pdf_content).hexdigest()
+
+
+class Chunk(NamedTuple):
+    """A chunk of document text and the pages it spans (1-based)."""
+    text: str
+    page_start: int
+    page_end: int
+
+
+def _open_pdf(source: Union[bytes, str]):
+    return open(source, "rb") if isinstance(source, str) else io.BytesIO(source)
+
+
+def count_pdf_pages(source: Union[bytes, str]) -> int:
+    """Return the number of pages in a PDF path or bytes."""
+    with _open_pdf(source) as pdf_stream:
+        return len(PyPDF2.PdfReader(pdf_stream).pages)
+
+
+def iter_pdf_pages(
+    source: Union[bytes, str], first_page: int = 1, last_page: Optional[int] = None
+) -> Iterator[Tuple[int, str]]:
+    """Yield ``(page_number, text)`` for each PDF page that has text.
+
+    ``source`` is a path or PDF bytes. Paths are read through an open file
+    handle, so only the page currently being extracted is held in memory
+    instead of the whole file plus a copy of its text. ``first_page`` and
+    ``last_page`` (1-based, inclusive) limit extraction to a page range.
+    """
+    if isinstance(source, str):
+        logger.info(f"Starting PDF text extraction from {source}")
+    else:
+        logger.info(f"Starting PDF text extraction, content size: {len(source)} bytes")
+
+    with _open_pdf(source) as pdf_stream:
+        try:
+            pdf_reader = PyPDF2.PdfReader(pdf_stream)
+            num_pages = len(pdf_reader.pages)
+        except Exception as e:
+            logger.error(f"Error reading PDF: {e}")
+            raise Exception(f"Failed to extract text from PDF: {e}")
+
+        logger.info(f"PDF has {num_pages} pages")
+        for page_num in range(max(first_page, 1) - 1, min(last_page or num_pages, num_pages)):
+            try:
+                page_text = pdf_reader.pages[page_num].extract_text()
+            except Exception as e:
+                logger.error(f"Error extracting text from page {page_num + 1}: {e}")
+                continue
+            if page_text:
+                logger.debug(f"Page {page_num + 1}: extracted {len(page_text)} characters")
+                yield page_num + 1, page_text
+            else:
+                logger.warning(f"Page {page_num + 1}: no text extracted")
+
+
+def extract_pages(source: Union[bytes, str], first_page: int, last_page: int) -> List[Tuple[int, str]]:
+    """Return the ``(page_number, text)`` pairs of a page range, for checkpointed extraction."""
+    return list(iter_pdf_pages(source, first_page, last_page))
+
+
+def extract_text_from_pdf(pdf_content: Union[bytes, str]) -> str:
+    """Extract text from PDF content."""
+    text = "\n".join(page_text for _, page_text in iter_pdf_pages(pdf_content))
+
+    extracted_length = len(text.strip())
+    logger.info(f"PDF text extraction completed. Total characters extracted: {extracted_length}")
+    return text.strip()
+
+
+def iter_chunks(
+    pages: Iterable[Tuple[int, str]], chunk_size: int = 1000, overlap: int = 200
+) -> Iterator[Chunk]:
+    """Split a stream of ``(page_number, text)`` pages into overlapping chunks.
+
+    Pages are consumed incrementally: only the text not yet covered by an
+    emitted chunk is buffered, so memory stays bounded by roughly one page
+    plus one chunk regardless of document length.
+    """
+    buffer = ""
+    page_offsets: List[int] = []  # buffer offset at which each buffered page starts
+    page_numbers: List[int] = []
+    start = 0
+
+    def page_at(offset: int) -> int:
+        return page_numbers[max(bisect.bisect_right(page_offsets, offset) - 1, 0)]
+
+    def emit(start: int, final: bool) -> Tuple[List[Chunk], int]:
+        chunks = []
+        text_length = len(buffer)
+        # Until the last page arrives, only cut windows that are known to be
+        # followed by more text, which matches chunking the joined document.
+        known_length = text_length if final else len(buffer.rstrip())
+        while start < text_length and (final or start + chunk_size < known_length):
+            end = start + chunk_size
+            chunk = buffer[start:end]
+
+            # Try to break at sentence boundary
+            if end < text_length:
+                last_period = chunk.rfind('.')
+                if last_period > chunk_size * 0.5:  # Only if period is in latter half
+                    chunk = chunk[:last_period + 1]
+                    end = start + last_period + 1
+
+            stripped = chunk.strip()
+            if stripped:  # Only add non-empty chunks
+                chunks.append(Chunk(stripped, page_at(start), page_at(min(end, text_length) - 1)))
+
+            start = end - overlap
+        return chunks, start
+
+    for page_number, page_text in pages:
+        if not buffer:
+            page_text = page_text.lstrip()
+            if not page_text:
+                continue
+        page_offsets.append(len(buffer))
+        page_numbers.append(page_number)
+        buffer += page_text + "\n"
+
+        chunks, start = emit(start, final=False)
+        yield from chunks
+
+        # Drop text that no future chunk can reach
+        if start > 0:
+            buffer = buffer[start:]
+            page_offsets = [offset - start for offset in page_offsets]
+            keep = max(bisect.bisect_right(page_offsets, 0) - 1, 0)
+            page_offsets, page_numbers = page_offsets[keep:], page_numbers[keep:]
+            page_offsets[0] = 0
+            start = 0
+
+    buffer = buffer.rstrip()
+    if buffer:
+        chunks, _ = emit(start, final=True)
+        yield from chunks
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences using one regex pass over the whole text."""
+    sentences = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        end = match.end(1) if match.group(1) else match.start()
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+@functools.lru_cache(maxsize=4)
+def get_token_counter(tokenizer_name: str = DEFAULT_TOKENIZER) -> TokenCounter:
+    """Return a batched token counter backed by the embedding model's tokenizer.
+
+    The tokenizer is loaded once per process, so pool workers pay for it only
+    on their first document.
+    """
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+
+    def count_tokens(texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros(0, dtype=np.int64)
+        input_ids = tokenizer(texts, add_special_tokens=False)["input_ids"]
+        return np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(texts))
+
+    return count_tokens
+
+
+def _split_long_sentence(sentence: str, count_tokens: TokenCounter, max_tokens: int) -> List[str]:
+    """Break a sentence that exceeds the token budget into word groups that fit."""
+    words = sentence.split()
+    counts = count_tokens(words)
+    pieces = []
+    start = 0
+    while start < len(words):
+        cumulative = np.cumsum(counts[start:])
+        end = start + max(int(np.searchsorted(cumulative, max_tokens, side="right")), 1)
+        pieces.append(" ".join(words[start:end]))
+        start = end
+    return pieces
+
+
+class TokenChunker:
+    """Packs whole sentences into chunks that fit the embedding model's token budget.
+
+    Sentence boundaries and token counts are computed once per page in a
+    single batched tokenizer call; packing then works on cumulative token
+    counts with ``np.searchsorted`` instead of re-tokenizing candidate
+    windows. Consecutive chunks share trailing sentences totalling at most
+    ``overlap_tokens`` tokens.
+
+    Pages are fed incrementally and the object holds no more than the
+    sentences of the chunk being filled plus one unfinished sentence of at
+    most ``max_tokens``. It pickles, so a long document can be chunked a
+    batch of pages at a time, with the state checkpointed between batches.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_TOKENS, overlap_tokens: int = DEFAULT_OVERLAP_TOKENS):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.window_text: List[str] = []
+        self.window_pages: List[int] = []
+        self.window_counts = np.zeros(0, dtype=np.int64)
+        # Unfinished last sentence of the previous page and the page it started on
+        self.carry, self.carry_page = "", 0
+
+    def feed(self, pages: Iterable[Tuple[int, str]], count_tokens: TokenCounter) -> List[Chunk]:
+        """Add ``(page_number, text)`` pages; returns the chunks they completed."""
+        chunks: List[Chunk] = []
+        for page_number, page_text in pages:
+            carry, carry_page = self.carry, self.carry_page
+            sentences = split_sentences(f"{carry} {page_text}" if carry else page_text)
+            if not sentences:
+                continue
+            pages_of = [page_number] * len(sentences)
+            if carry:
+                pages_of[0] = carry_page
+
+            counts = count_tokens(sentences)
+            # A page that does not end a sentence continues it on the next page, unless the
+            # unfinished text already fills a chunk: slides, tables and code listings may never
+            # end a sentence, and carrying them on would re-split an ever growing text per page
+            if not page_text.rstrip().endswith((".", "!", "?")) and counts[-1] <= self.max_tokens:
+                self.carry, self.carry_page = sentences.pop(), pages_of.pop()
+                counts = counts[:-1]
+            else:
+                self.carry = ""
+
+            for sentence, page, count in zip(sentences, pages_of, counts):
+                if count > self.max_tokens:
+                    pieces = _split_long_sentence(sentence, count_tokens, self.max_tokens)
+                    self.window_text.extend(pieces)
+                    self.window_pages.extend([page] * len(pieces))
+                    self.window_counts = np.concatenate([self.window_counts, count_tokens(pieces)])
+                else:
+                    self.window_text.append(sentence)
+                    self.window_pages.append(page)
+                    self.window_counts = np.append(self.window_counts, count)
+            chunks.extend(self._pack(final=False))
+        return chunks
+
+    def finish(self, count_tokens: TokenCounter) -> List[Chunk]:
+        """Flush the remaining text at the end of the document; returns the last chunks."""
+        if self.carry:
+            for piece in _split_long_sentence(self.carry, count_tokens, self.max_tokens):
+                self.window_text.append(piece)
+                self.window_pages.append(self.carry_page)
+            self.window_counts = np.concatenate(
+                [self.window_counts, count_tokens(self.window_text[len(self.window_counts):])]
+            )
+            self.carry = ""
+        return list(self._pack(final=True))
+
+    def _pack(self, final: bool) -> Iterator[Chunk]:
+        max_tokens = self.max_tokens
+        while self.window_text:
+            cumulative = np.cumsum(self.window_counts)
+            if not final and cumulative[-1] <= max_tokens:
+                return
+            n = max(int(np.searchsorted(cumulative, max_tokens, side="right")), 1)
+            yield Chunk(" ".join(self.window_text[:n]), self.window_pages[0], self.window_pages[n - 1])
+            if n == len(self.window_text) and final:
+                self.window_text, self.window_pages, self.window_counts = [], [], self.window_counts[:0]
+                return
+            # Keep the longest run of trailing sentences that fits in the overlap
+            # while leaving room for the next sentence, so every chunk advances
+            overlap = self.overlap_tokens
+            if n < len(self.window_text):
+                overlap = min(overlap, max_tokens - int(self.window_counts[n]))
+            keep_from = int(np.searchsorted(cumulative, cumulative[n - 1] - overlap, side="left")) + 1
+            keep_from = min(max(keep_from, 1), n)
+            self.window_text = self.window_text[keep_from:]
+            self.window_pages = self.window_pages[keep_from:]
+            self.window_counts = self.window_counts[keep_from:]
+
+
+def iter_token_chunks(
+    pages: Iterable[Tuple[int, str]],
+    count_tokens: TokenCounter,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+) -> Iterator[Chunk]:
+    """Stream pages through a :class:`TokenChunker`, yielding chunks as they complete."""
+    chunker = TokenChunker(max_tokens, overlap_tokens)
+    for page in pages:
+        yield from chunker.feed([page], count_tokens)
+    yield from chunker.finish(count_tokens)
+
+
+def chunk_pdf(
+    source: Union[bytes, str],
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    tokenizer_name: str = DEFAULT_TOKENIZER,
+) -> List[Chunk]:
+    """Stream a PDF's pages into the token-aware chunker and return its chunks."""
+    return chunk_pdf_timed(source, max_tokens, overlap_tokens, tokenizer_name)[0]
+
+
+def chunk_pdf_timed(
+    source: Union[bytes, str],
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    tokenizer_name: str = DEFAULT_TOKENIZER,
+) -> Tuple[List[Chunk], Dict[str, float]]:
+    """Like :func:`chunk_pdf`, also returning seconds spent in ``extraction`` and ``chunking``.
+
+    Pages are extracted lazily while chunking, so the two are separated by
+    timing each page fetch.
+    """
+    timings = {"extraction": 0.0, "chunking": 0.0}
+
+    def timed_pages() -> Iterator[Tuple[int, str]]:
+        pages = iter_pdf_pages(source)
+        while True:
+            fetch_started = time.perf_counter()
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            finally:
+                timings["extraction"] += time.perf_counter() - fetch_started
+            yield page
+
+    started = time.perf_counter()
+    count_tokens = get_token_counter(tokenizer_name)
+    chunks = list(iter_token_chunks(timed_pages(), count_tokens, max_tokens, overlap_tokens))
+    timings["chunking"] = time.perf_counter() - started - timings["extraction"]
+    logger.debug(f"Text chunking completed. Created {len(chunks)} chunks")
+    return chunks, timings
+
+
+def chunk_page_batch(
+    pages: Iterable[Tuple[int, str]],
+    chunker: TokenChunker,
+    final: bool = False,
+    tokenizer_name: str = DEFAULT_TOKENIZER,
+) -> Tuple[List[Chunk], TokenChunker]:
+    """Feed one batch of extracted pages to ``chunker``, flushing it if ``final``.
+
+    Returns the completed chunks and the updated chunker, so it can run in a
+    process pool and the chunker be checkpointed between batches.
+    """
+    count_tokens = get_token_counter(tokenizer_name)
+    chunks = chunker.feed(pages, count_tokens)
+    if final:
+        chunks.extend(chunker.finish(count_tokens))
+    return chunks, chunker
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    """Split text into overlapping chunks."""
+    logger.info(f"Starting text chunking, input length: {len(text)} characters")
+
+    if not text or len(text.strip()) == 0:
+        logger.warning("No text provided for chunking")
+        return []
+
+    chunks = [chunk.text for chunk in iter_chunks([(1, text)], chunk_size, overlap)]
+
+    logger.info(f"Text chunking completed. Created {len(chunks)} chunks")
+    return chunks
@@ -0,0 +1,118 @@
+"""Micro-batched query embedding with an LRU cache.
+
+Each chat question needs one query embedding. Encoding questions one at a
+time means many batch-of-one forward passes that queue behind each other
+on the embedding pool. :class:`BatchingQueryEncoder` instead collects the
+queries that arrive within a few milliseconds and encodes them in one call.
+Identical concurrent queries share a single encode, and recent embeddings
+are served from an LRU cache.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Encodes a batch of texts into one embedding row per text
+BatchEncoder = Callable[[List[str]], Awaitable[np.ndarray]]
+
+
+class BatchingQueryEncoder:
+    """Coalesces concurrent query encodes into batches and caches the results.
+
+    Args:
+        encode_batch: Coroutine function embedding a list of texts, such as
+            a call through the embedding work pool.
+        max_batch_size: A batch is sent as soon as it holds this many queries.
+        max_wait: Seconds the first query of a batch waits for others.
+        cache_size: Query embeddings kept, least recently used evicted first
+            (0 disables caching).
+    """
+
+    def __init__(
+        self,
+        encode_batch: BatchEncoder,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        cache_size: int = 1024,
+    ):
+        self._encode_batch = encode_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Queries waiting for the next batch, and those in a batch being encoded
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_queries = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def encode(self, query: str) -> np.ndarray:
+        """Return the embedding of ``query`` (read-only, shared with other callers)."""
+        key = normalize_text(query)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        future = self._pending.get(key) or self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = loop.call_later(self.max_wait, self._flush)
+        # A caller giving up must not cancel the encode other callers wait for
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self._in_flight.update(batch)
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: Dict[str, asyncio.Future]) -> None:
+        texts = list(batch)
+        self.batches += 1
+        self.batched_queries += len(texts)
+        try:
+            vectors = np.asarray(await self._encode_batch(texts), dtype=np.float32)
+        except Exception as e:
+            logger.error(f"Encoding a batch of {len(texts)} queries failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            for text in texts:
+                self._in_flight.pop(text, None)
+
+        for text, vector in zip(texts, vectors):
+            vector.flags.writeable = False
+            if self.cache_size:
+                self._cache[text] = vector
+                self._cache.move_to_end(text)
+            if not batch[text].done():
+                batch[text].set_result(vector)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
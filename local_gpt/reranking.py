@@ -0,0 +1,107 @@
+"""Second-stage ranking of retrieved chunks before they become LLM context.
+
+Retrieval over-fetches candidates cheaply. A cross-encoder then scores each
+(query, chunk) pair jointly, which is far more accurate than comparing
+independent embeddings. Scoring runs in batches, best fused candidates
+first, and stops once the per-query time budget is spent. Maximal marginal
+relevance (MMR) then picks the final chunks so near-duplicates do not crowd
+out other relevant passages.
+"""
+import logging
+import time
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Scores a batch of (query, passage) pairs; higher is more relevant
+PairScorer = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+
+class RankedCandidates(NamedTuple):
+    """Result of :func:`rerank`.
+
+    Attributes:
+        order: Candidate indices, best first. Scored candidates come first,
+            sorted by score; candidates the budget did not reach follow in
+            their original order.
+        scores: Cross-encoder score per candidate (input order), or
+            ``None`` if it was not scored.
+    """
+    order: List[int]
+    scores: List[Optional[float]]
+
+    @property
+    def complete(self) -> bool:
+        """Whether every candidate was scored within the budget."""
+        return all(score is not None for score in self.scores)
+
+
+def rerank(
+    query: str,
+    passages: Sequence[str],
+    score_pairs: PairScorer,
+    batch_size: int = 16,
+    time_budget: Optional[float] = None,
+) -> RankedCandidates:
+    """Score ``passages`` against ``query`` in batches, within ``time_budget`` seconds.
+
+    ``passages`` should be ordered best first by the first-stage retriever,
+    so running out of time only leaves the least promising ones unscored.
+    The first batch is always scored.
+    """
+    scores: List[Optional[float]] = [None] * len(passages)
+    started = time.perf_counter()
+    for start in range(0, len(passages), batch_size):
+        elapsed = time.perf_counter() - started
+        if start and time_budget is not None and elapsed >= time_budget:
+            logger.info(f"Re-ranking budget of {time_budget * 1000:.0f} ms spent; scored {start}/{len(passages)} candidates")
+            break
+        batch = range(start, min(start + batch_size, len(passages)))
+        batch_scores = score_pairs([(query, passages[i]) for i in batch])
+        for i, score in zip(batch, batch_scores):
+            scores[i] = float(score)
+
+    scored = sorted((i for i, score in enumerate(scores) if score is not None), key=lambda i: -scores[i])
+    unscored = [i for i, score in enumerate(scores) if score is None]
+    return RankedCandidates(scored + unscored, scores)
+
+
+def mmr_select(embeddings: np.ndarray, relevance: Sequence[float], k: int, diversity: float = 0.3) -> List[int]:
+    """Pick ``k`` rows by maximal marginal relevance.
+
+    Each step takes the candidate maximising
+    ``(1 - diversity) * relevance - diversity * max cosine similarity to
+    already selected candidates``. With ``diversity=0`` this is plain
+    top-k by relevance.
+
+    Args:
+        embeddings: One embedding per candidate.
+        relevance: Relevance per candidate, on a 0-1 scale.
+        k: Number of candidates to select.
+        diversity: Weight of the redundancy penalty, between 0 and 1.
+
+    Returns:
+        Indices of the selected candidates, in selection order.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if len(vectors) == 0:
+        return []
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1.0, norms)
+    similarity = vectors @ vectors.T
+    relevance = np.asarray(relevance, dtype=np.float32)
+
+    selected: List[int] = []
+    # Highest similarity of each candidate to anything already selected
+    redundancy = np.zeros(len(vectors), dtype=np.float32)
+    available = np.ones(len(vectors), dtype=bool)
+    for _ in range(min(k, len(vectors))):
+        objective = (1 - diversity) * relevance - diversity * redundancy
+        objective[~available] = -np.inf
+        best = int(np.argmax(objective))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
@@ -0,0 +1,48 @@
+"""Helpers for streaming LLM output to the chat UI."""
+from typing import List, Tuple
+
+
+class ThinkTagSplitter:
+    """Separate ``<think>...</think>`` reasoning from the answer in a token stream.
+
+    Reasoning models such as DeepSeek-R1 emit their chain of thought between
+    ``<think>`` tags. Tags can be split across streamed chunks, so a possible
+    partial tag at the end of a chunk is held back until the next one.
+    """
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self.in_think = False
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[Tuple[bool, str]]:
+        """Consume a streamed chunk and return ``(is_thinking, text)`` pieces ready to display."""
+        self._buffer += text
+        pieces = []
+        while self._buffer:
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            index = self._buffer.find(tag)
+            if index >= 0:
+                pieces.append((self.in_think, self._buffer[:index]))
+                self._buffer = self._buffer[index + len(tag):]
+                self.in_think = not self.in_think
+                continue
+
+            # Hold back a suffix that could be the start of the tag
+            held = 0
+            for size in range(min(len(tag) - 1, len(self._buffer)), 0, -1):
+                if tag.startswith(self._buffer[-size:]):
+                    held = size
+                    break
+            pieces.append((self.in_think, self._buffer[:len(self._buffer) - held]))
+            self._buffer = self._buffer[len(self._buffer) - held:]
+            break
+        return [(is_thinking, piece) for is_thinking, piece in pieces if piece]
+
+    def flush(self) -> List[Tuple[bool, str]]:
+        """Return any held-back text once the stream has ended."""
+        pieces = [(self.in_think, self._buffer)] if self._buffer else []
+        self._buffer = ""
+        return pieces
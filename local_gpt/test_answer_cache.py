@@ -0,0 +1,67 @@
+import time
+import unittest
+
+import numpy as np
+
+from answer_cache import SemanticAnswerCache
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    """Unit tests for the semantic answer cache."""
+
+    def setUp(self):
+        self.cache = SemanticAnswerCache(threshold=0.95, max_entries=2, ttl_seconds=60)
+        self.query = np.array([1.0, 0.0, 0.0])
+        self.cache.store(self.query, ["a_0", "a_1"], ["a.pdf"], "cached answer")
+
+    def test_similar_query_same_chunks_hits(self):
+        """Test a near-identical question over the same chunks reuses the answer."""
+        similar = np.array([0.99, 0.05, 0.0])
+        self.assertEqual(self.cache.lookup(similar, ["a_1", "a_0"]), "cached answer")
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_paraphrase_with_reordered_candidates_hits(self):
+        """Test a paraphrase whose candidates differ and are reordered still hits if they hold the context."""
+        paraphrase = np.array([0.97, 0.2, 0.1])
+        candidates = [f"b_{i}" for i in range(30)] + ["a_1"] + [f"c_{i}" for i in range(18)] + ["a_0"]
+        self.assertEqual(self.cache.lookup(paraphrase, candidates), "cached answer")
+
+    def test_different_chunks_miss(self):
+        """Test the same question is not served from cache when its context was not retrieved."""
+        self.assertIsNone(self.cache.lookup(self.query, ["a_0", "b_0"]))
+
+    def test_min_overlap_allows_partial_context(self):
+        """Test a lower min_overlap accepts candidates holding part of the context."""
+        cache = SemanticAnswerCache(min_overlap=0.5)
+        cache.store(self.query, ["a_0", "a_1"], ["a.pdf"], "cached answer")
+        self.assertEqual(cache.lookup(self.query, ["a_0", "b_0"]), "cached answer")
+        self.assertIsNone(cache.lookup(self.query, ["b_0", "b_1"]))
+
+    def test_dissimilar_query_misses(self):
+        """Test a question below the similarity threshold misses."""
+        self.assertIsNone(self.cache.lookup(np.array([0.5, 0.5, 0.0]), ["a_0", "a_1"]))
+
+    def test_invalidate_changed_document(self):
+        """Test replacing a document drops answers built from it."""
+        self.assertEqual(self.cache.invalidate_files(["a.pdf"]), 1)
+        self.assertIsNone(self.cache.lookup(self.query, ["a_0", "a_1"]))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full."""
+        self.cache.store([0.0, 1.0, 0.0], ["b_0"], ["b.pdf"], "b")
+        self.cache.lookup(self.query, ["a_0", "a_1"])  # refresh the first entry
+        self.cache.store([0.0, 0.0, 1.0], ["c_0"], ["c.pdf"], "c")
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.lookup([0.0, 1.0, 0.0], ["b_0"]))
+        self.assertEqual(self.cache.lookup(self.query, ["a_0", "a_1"]), "cached answer")
+
+    def test_ttl_expiry(self):
+        """Test entries older than the TTL are discarded."""
+        cache = SemanticAnswerCache(ttl_seconds=0.01)
+        cache.store(self.query, ["a_0"], ["a.pdf"], "old")
+        time.sleep(0.02)
+        self.assertIsNone(cache.lookup(self.query, ["a_0"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import importlib.util
+import tempfile
+import unittest
+
+import numpy as np
+
+from embedding_backends import EmbeddingBackend, create_embedding_backend, l2_normalize, mean_pool
+from pdf_processing import DEFAULT_TOKENIZER
+
+HAS_TORCH_BACKEND = importlib.util.find_spec("sentence_transformers") is not None
+HAS_ONNX_BACKEND = HAS_TORCH_BACKEND and importlib.util.find_spec("onnxruntime") is not None
+
+PARITY_TEXTS = [
+    "The pump must be recalibrated every 90 days.",
+    "Clause 4.2.1 limits liability to direct damages.",
+    "Part number KX-12345 replaces the discontinued KX-12000 valve.",
+    "Short.",
+    "A much longer passage about maintenance schedules, safety interlocks, spare parts "
+    "and the procedure to follow when the pressure sensor reports values outside the range. " * 4,
+]
+
+
+class TestPooling(unittest.TestCase):
+    """Unit tests for the pooling used by the ONNX backend."""
+
+    def test_mean_pool_ignores_padding(self):
+        """Test padded positions do not contribute to the mean."""
+        tokens = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+        np.testing.assert_allclose(mean_pool(tokens, mask), [[2.0, 2.0]])
+
+    def test_l2_normalize(self):
+        """Test rows are scaled to unit length and zero rows are kept."""
+        vectors = l2_normalize(np.array([[3.0, 4.0], [0.0, 0.0]]))
+        np.testing.assert_allclose(vectors, [[0.6, 0.8], [0.0, 0.0]])
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name is rejected."""
+        with self.assertRaises(ValueError):
+            create_embedding_backend("tensorrt", DEFAULT_TOKENIZER)
+
+    def test_backend_without_encode_cannot_be_created(self):
+        """Test a backend missing encode fails when it is created, not on its first query."""
+        class Incomplete(EmbeddingBackend):
+            name, dim = "incomplete", 4
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+@unittest.skipUnless(HAS_ONNX_BACKEND, "sentence-transformers and onnxruntime are required")
+class TestOnnxParity(unittest.TestCase):
+    """ONNX embeddings must agree with the PyTorch reference."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.reference = create_embedding_backend("torch", DEFAULT_TOKENIZER).encode(PARITY_TEXTS)
+
+    def assert_parity(self, backend, min_cosine):
+        vectors = backend.encode(PARITY_TEXTS)
+        self.assertEqual(vectors.shape, self.reference.shape)
+        cosines = np.sum(vectors * self.reference, axis=1)
+        self.assertGreaterEqual(cosines.min(), min_cosine)
+
+    def test_onnx_matches_torch(self):
+        """Test full-precision ONNX embeddings match PyTorch almost exactly."""
+        self.assert_parity(create_embedding_backend("onnx", DEFAULT_TOKENIZER, batch_size=2), 0.999)
+
+    def test_int8_onnx_close_to_torch(self):
+        """Test int8-quantized embeddings stay close to PyTorch."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            backend = create_embedding_backend("onnx", DEFAULT_TOKENIZER, quantize=True, cache_dir=cache_dir)
+            self.assert_parity(backend, 0.98)
+
+    def test_batching_preserves_order(self):
+        """Test length-sorted batching returns rows in input order."""
+        backend = create_embedding_backend("onnx", DEFAULT_TOKENIZER, batch_size=2)
+        one_by_one = np.vstack([backend.encode([text]) for text in PARITY_TEXTS])
+        np.testing.assert_allclose(backend.encode(PARITY_TEXTS), one_by_one, atol=1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, normalize_text
+
+
+class FakeEncoder:
+    """Deterministic encoder that records which texts it was asked to embed."""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t) + i for i in range(self.dim)] for t in texts], dtype=np.float32)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Unit tests for the on-disk embedding cache."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.encoder = FakeEncoder()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_cache(self, model_name="model-a", dtype="float32"):
+        return EmbeddingCache(self.tmp.name, model_name, self.encoder.dim, dtype=dtype)
+
+    def test_only_misses_are_encoded(self):
+        """Test cached texts are not sent to the encoder again."""
+        cache = self.make_cache()
+        cache.encode(["alpha", "beta"], self.encoder)
+        result = cache.encode(["alpha", "gamma", "beta"], self.encoder)
+        self.assertEqual(self.encoder.calls, [["alpha", "beta"], ["gamma"]])
+        np.testing.assert_array_equal(result[0], self.encoder(["alpha"])[0])
+
+    def test_duplicates_in_one_call_encoded_once(self):
+        """Test repeated texts in a single batch are encoded once."""
+        cache = self.make_cache()
+        result = cache.encode(["same", "same  ", "other"], self.encoder)
+        self.assertEqual(self.encoder.calls, [["same", "other"]])
+        np.testing.assert_array_equal(result[0], result[1])
+
+    def test_persists_across_instances(self):
+        """Test entries survive reopening the cache directory."""
+        self.make_cache().encode(["alpha"], self.encoder)
+        reopened = self.make_cache()
+        reopened.encode(["alpha"], self.encoder)
+        self.assertEqual(len(self.encoder.calls), 1)
+        self.assertEqual(len(reopened), 1)
+
+    def test_models_do_not_share_entries(self):
+        """Test entries are keyed by model name."""
+        self.make_cache("model-a").encode(["alpha"], self.encoder)
+        self.make_cache("model-b").encode(["alpha"], self.encoder)
+        self.assertEqual(len(self.encoder.calls), 2)
+
+    def test_float16_storage_round_trip(self):
+        """Test float16 storage returns float32 vectors close to the originals."""
+        cache = self.make_cache(dtype="float16")
+        original = cache.encode(["alpha"], self.encoder)
+        cached = cache.get(["alpha"])[0]
+        self.assertEqual(cached.dtype, np.float32)
+        np.testing.assert_allclose(cached, original[0], rtol=1e-3)
+
+    def test_partial_trailing_row_is_overwritten(self):
+        """Test a write torn by a crash does not shift the vectors written after it."""
+        cache = self.make_cache()
+        cache.encode(["alpha"], self.encoder)
+        with open(cache._vectors_path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+        reopened = self.make_cache()
+        reopened.encode(["gamma", "delta"], self.encoder)
+        np.testing.assert_array_equal(reopened.get(["alpha"])[0], self.encoder(["alpha"])[0])
+        np.testing.assert_array_equal(reopened.get(["gamma"])[0], self.encoder(["gamma"])[0])
+        np.testing.assert_array_equal(reopened.get(["delta"])[0], self.encoder(["delta"])[0])
+
+    def test_evicts_least_recently_used(self):
+        """Test a full cache drops the entries used longest ago and keeps serving the rest."""
+        cache = EmbeddingCache(self.tmp.name, "model-a", self.encoder.dim, dtype="float32", max_rows=4)
+        cache.encode(["a", "bb", "ccc", "dddd"], self.encoder)
+        for text in ("bb", "ccc"):
+            time.sleep(0.01)
+            cache.get([text])
+        cache.encode(["eeeee"], self.encoder)
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.evicted, 2)
+        self.assertEqual([v is None for v in cache.get(["a", "bb", "ccc", "dddd", "eeeee"])],
+                         [True, False, False, True, False])
+
+        reopened = EmbeddingCache(self.tmp.name, "model-a", self.encoder.dim, dtype="float32", max_rows=4)
+        for text in ("bb", "ccc", "eeeee"):
+            np.testing.assert_array_equal(reopened.get([text])[0], self.encoder([text])[0])
+        self.assertEqual([name for name in os.listdir(reopened._dir) if name.startswith("vectors")],
+                         [os.path.basename(reopened._vectors_path)])
+
+    def test_normalize_text_collapses_whitespace(self):
+        """Test whitespace-only differences normalize to the same text."""
+        self.assertEqual(normalize_text("  a \n\t b "), "a b")
+
+
+if __name__ == "__main__":
+    unittest.main()
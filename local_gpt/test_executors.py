@@ -0,0 +1,76 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from executors import WorkPool
+
+
+class TestWorkPool(unittest.TestCase):
+    """Unit tests for the bounded work pools."""
+
+    def test_run_returns_result(self):
+        """Test a blocking call runs in the pool and returns its value."""
+        pool = WorkPool("test", 2)
+        self.assertEqual(asyncio.run(pool.run(sum, [1, 2, 3])), 6)
+        self.assertEqual(pool.stats()["completed"], 1)
+        pool.shutdown()
+
+    def test_concurrency_limit_is_respected(self):
+        """Test no more than max_concurrency calls run at once."""
+        pool = WorkPool("test", 2)
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+        async def main():
+            await asyncio.gather(*(pool.run(work) for _ in range(6)))
+
+        asyncio.run(main())
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(pool.stats()["max_waiting"], 4)
+        pool.shutdown()
+
+    def test_failures_are_counted_and_raised(self):
+        """Test exceptions propagate and are recorded in the stats."""
+        pool = WorkPool("test", 1)
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(pool.run(fail))
+        self.assertEqual(pool.stats()["failed"], 1)
+        self.assertEqual(pool.stats()["active"], 0)
+        pool.shutdown()
+
+    def test_async_pool_limits_slots(self):
+        """Test async pools limit coroutines entered through slot()."""
+        pool = WorkPool("llm", 1, kind="async")
+        order = []
+
+        async def task(name):
+            async with pool.slot():
+                order.append(f"start {name}")
+                await asyncio.sleep(0.01)
+                order.append(f"end {name}")
+
+        async def main():
+            await asyncio.gather(task("a"), task("b"))
+
+        asyncio.run(main())
+        self.assertEqual(order, ["start a", "end a", "start b", "end b"])
+        with self.assertRaises(TypeError):
+            asyncio.run(pool.run(sum, [1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
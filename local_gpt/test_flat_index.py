@@ -0,0 +1,128 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from flat_index import FlatClient, top_k_scan, where_to_sql
+
+
+def random_vectors(n, dim=16, seed=0):
+    """Random unit vectors."""
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestTopKScan(unittest.TestCase):
+    """Unit tests for the blocked exact search."""
+
+    def test_matches_brute_force_across_blocks(self):
+        """Test blocked float16 search returns the same neighbours as a float32 full scan."""
+        vectors = random_vectors(1000)
+        queries = random_vectors(5, seed=1)
+        live = np.ones(len(vectors), dtype=bool)
+        rows, scores = top_k_scan(vectors.astype(np.float16), live, queries, k=10, block_rows=64)
+        expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :10]
+        overlap = np.mean([len(set(r) & set(e)) / 10 for r, e in zip(rows, expected)])
+        self.assertGreaterEqual(overlap, 0.9)
+        self.assertTrue(np.all(np.diff(scores, axis=1) <= 0))
+
+    def test_skips_deleted_rows(self):
+        """Test rows masked out are never returned, and k shrinks to the live rows."""
+        vectors = random_vectors(10)
+        live = np.zeros(10, dtype=bool)
+        live[[2, 7]] = True
+        rows, _ = top_k_scan(vectors, live, vectors[:1], k=5, block_rows=4)
+        self.assertEqual(sorted(rows[0].tolist()), [2, 7])
+
+
+class TestWhereToSql(unittest.TestCase):
+    """Unit tests for translating Chroma filters."""
+
+    def test_equality_and_comparison(self):
+        """Test plain values become equality and operators map to SQL."""
+        sql, params = where_to_sql({"filename": "a.pdf", "indexed_at": {"$lt": 5}})
+        self.assertIn("= ?", sql)
+        self.assertIn("< ?", sql)
+        self.assertEqual(params, ["a.pdf", 5])
+
+    def test_rejects_unknown_operator(self):
+        """Test unsupported operators raise instead of matching everything."""
+        with self.assertRaises(ValueError):
+            where_to_sql({"filename": {"$regex": "a"}})
+
+
+class TestFlatCollection(unittest.TestCase):
+    """Unit tests for the memory-mapped collection."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = FlatClient(self.tmp.name)
+        self.collection = self.client.get_or_create_collection("docs", metadata={"namespace": "shared"})
+        self.vectors = random_vectors(1500)
+        self.collection.add(
+            ids=[f"c_{i}" for i in range(1500)],
+            documents=[f"chunk {i}" for i in range(1500)],
+            metadatas=[{"filename": "a.pdf" if i < 1000 else "b.pdf", "indexed_at": i} for i in range(1500)],
+            embeddings=self.vectors,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_query_returns_cosine_distances(self):
+        """Test the nearest chunk to a stored vector is itself, at distance ~0."""
+        result = self.collection.query(query_embeddings=[self.vectors[42]], n_results=3,
+                                       include=["documents", "metadatas", "distances", "embeddings"])
+        self.assertEqual(result["ids"][0][0], "c_42")
+        self.assertEqual(result["documents"][0][0], "chunk 42")
+        self.assertAlmostEqual(result["distances"][0][0], 0.0, places=2)
+        self.assertEqual(len(result["embeddings"][0]), 3)
+
+    def test_get_and_delete_by_filter(self):
+        """Test metadata filters select and delete matching chunks only."""
+        self.assertEqual(len(self.collection.get(where={"filename": "b.pdf"}, include=[])["ids"]), 500)
+        self.collection.delete(where={"indexed_at": {"$lt": 100}})
+        self.assertEqual(self.collection.count(), 1400)
+        result = self.collection.query(query_embeddings=[self.vectors[42]], n_results=1)
+        self.assertNotEqual(result["ids"][0][0], "c_42")
+
+    def test_reopen_and_rename(self):
+        """Test data survives reopening and a renamed collection is found under its new name."""
+        self.collection.delete(ids=["c_0"])
+        self.collection.modify(name="docs-2")
+        reopened = FlatClient(self.tmp.name)
+        self.assertEqual([c.name for c in reopened.list_collections()], ["docs-2"])
+        collection = reopened.get_collection("docs-2")
+        self.assertEqual(collection.count(), 1499)
+        self.assertEqual(collection.metadata, {"namespace": "shared"})
+        page = collection.get(limit=2, offset=0, include=["embeddings"])
+        self.assertEqual(page["ids"], ["c_1", "c_2"])
+        np.testing.assert_allclose(page["embeddings"][0], self.vectors[1], atol=1e-3)
+
+    def test_writes_after_rename(self):
+        """Test the renamed collection accepts adds and deletes, as after a compaction."""
+        self.collection.modify(name="docs-2")
+        self.collection.add(ids=["new"], documents=["new chunk"], metadatas=[{"filename": "c.pdf"}],
+                            embeddings=self.vectors[:1])
+        self.collection.delete(where={"filename": "b.pdf"})
+        self.assertEqual(self.collection.count(), 1001)
+        self.assertEqual(self.collection.name, "docs-2")
+        reopened = FlatClient(self.tmp.name).get_collection("docs-2")
+        self.assertEqual(reopened.get(ids=["new"])["documents"], ["new chunk"])
+
+    def test_delete_requires_ids_or_filter(self):
+        """Test a bare delete raises instead of wiping the collection."""
+        for kwargs in ({}, {"where": {}}):
+            with self.assertRaises(ValueError):
+                self.collection.delete(**kwargs)
+        self.collection.delete(ids=[])
+        self.assertEqual(self.collection.count(), 1500)
+
+    def test_rejects_duplicate_ids(self):
+        """Test adding an existing id raises like Chroma does."""
+        with self.assertRaises(ValueError):
+            self.collection.add(ids=["c_1"], embeddings=self.vectors[:1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+
+from history import ConversationHistory
+
+
+def count_words(text):
+    """Stand-in token counter: one token per word."""
+    return len(text.split())
+
+
+def user(text):
+    return {"role": "user", "content": text}
+
+
+def assistant(text):
+    return {"role": "assistant", "content": text}
+
+
+class TestConversationHistory(unittest.TestCase):
+    """Unit tests for the token-budgeted conversation history."""
+
+    def make_history(self, max_tokens=100, recent_turns=2):
+        return ConversationHistory("system prompt", max_tokens=max_tokens, recent_turns=recent_turns, count_tokens=count_words)
+
+    def test_prompt_starts_with_system_and_ends_with_user(self):
+        """Test the system prompt comes first and the new message last."""
+        history = self.make_history()
+        history.add_turn(user("hi"), assistant("hello"))
+        prompt = history.build_prompt(user("next question"))
+        self.assertEqual(prompt[0]["role"], "system")
+        self.assertEqual([m["content"] for m in prompt[1:]], ["hi", "hello", "next question"])
+
+    def test_prompt_stays_within_budget(self):
+        """Test the oldest turns are left out once the budget is reached."""
+        history = self.make_history(max_tokens=60)
+        for i in range(20):
+            history.add_turn(user(f"question {i} " + "word " * 5), assistant(f"answer {i} " + "word " * 5))
+        prompt = history.build_prompt(user("latest"))
+        self.assertLessEqual(sum(history.message_tokens(m) for m in prompt), 60)
+        self.assertTrue(prompt[-2]["content"].startswith("answer 19"))
+
+    def test_compaction_folds_older_turns_into_summary(self):
+        """Test older turns are summarized and recent turns kept verbatim."""
+        history = self.make_history(recent_turns=2)
+        folded = []
+
+        async def summarize(previous, messages):
+            folded.extend(messages)
+            return "summary of earlier turns"
+
+        async def main():
+            for i in range(4):
+                history.add_turn(user(f"q{i}"), assistant(f"a{i}"))
+            task = history.maybe_compact(summarize)
+            await task
+
+        asyncio.run(main())
+        self.assertEqual([m["content"] for m in folded], ["q0", "a0", "q1", "a1"])
+        self.assertEqual([t[0]["content"] for t in history.turns], ["q2", "q3"])
+        prompt = history.build_prompt(user("q4"))
+        self.assertIn("summary of earlier turns", prompt[1]["content"])
+
+    def test_no_compaction_until_enough_turns(self):
+        """Test the summarizer is not called while history is short."""
+        history = self.make_history(recent_turns=2)
+        history.add_turn(user("q0"), assistant("a0"))
+
+        async def summarize(previous, messages):
+            raise AssertionError("should not be called")
+
+        self.assertIsNone(history.maybe_compact(summarize))
+
+    def test_failed_summary_keeps_turns(self):
+        """Test a summarizer error leaves the history unchanged."""
+        history = self.make_history(recent_turns=1)
+
+        async def summarize(previous, messages):
+            raise RuntimeError("model unavailable")
+
+        async def main():
+            history.add_turn(user("q0"), assistant("a0"))
+            history.add_turn(user("q1"), assistant("a1"))
+            await history.maybe_compact(summarize)
+
+        asyncio.run(main())
+        self.assertEqual(len(history.turns), 2)
+        self.assertEqual(history.summary, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
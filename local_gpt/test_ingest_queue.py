@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ingest_queue import DONE, FAILED, QUEUED, RUNNING, IngestQueue
+from pdf_processing import Chunk, TokenChunker
+
+
+class TestIngestQueue(unittest.TestCase):
+    """Unit tests for the durable ingestion job queue."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "queue")
+        self.queue = IngestQueue(self.path)
+
+    def tearDown(self):
+        self.queue._db.close()
+        self.tmp.cleanup()
+
+    def reopen(self):
+        """Simulate a restart by opening the same queue again."""
+        self.queue._db.close()
+        self.queue = IngestQueue(self.path)
+
+    def test_enqueue_spools_source(self):
+        """Test queued bytes are copied into the spool directory."""
+        job_id = self.queue.enqueue("a.pdf", b"%PDF-1.4 test", "shared")
+        job = self.queue.get(job_id)
+        self.assertEqual(job.status, QUEUED)
+        with open(job.source_path, "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 test")
+
+    def test_claims_oldest_job_once(self):
+        """Test jobs are claimed in order and each by one worker."""
+        first = self.queue.enqueue("a.pdf", b"a", "shared")
+        second = self.queue.enqueue("b.pdf", b"b", "shared")
+        self.assertEqual(self.queue.claim().id, first)
+        self.assertEqual(self.queue.claim().id, second)
+        self.assertIsNone(self.queue.claim())
+        self.assertEqual(self.queue.get(first).status, RUNNING)
+
+    def test_resumes_from_checkpoints_after_restart(self):
+        """Test a running job is requeued on restart with its chunks, chunker and embeddings intact."""
+        job_id = self.queue.enqueue("a.pdf", b"a", "shared")
+        self.queue.claim()
+        self.assertIsNone(self.queue.chunker(job_id))
+        chunker = TokenChunker(max_tokens=8)
+        chunker.carry, chunker.carry_page = "unfinished", 2
+        self.queue.save_batch(job_id, [Chunk("one", 1, 1), Chunk("two", 2, 2)], chunker, next_page=3)
+        self.reopen()
+
+        self.assertEqual(self.queue.requeue_interrupted(), 1)
+        job = self.queue.claim()
+        self.assertEqual((job.id, job.next_page, job.chunks_total, job.attempts), (job_id, 3, 2, 2))
+        restored = self.queue.chunker(job_id)
+        self.assertEqual((restored.max_tokens, restored.carry, restored.carry_page), (8, "unfinished", 2))
+
+        self.queue.save_batch(job_id, [Chunk("three", 3, 3)], restored, next_page=4)
+        self.queue.save_embeddings(job_id, 0, np.ones((2, 4)))
+        self.reopen()
+
+        chunks = [Chunk("one", 1, 1), Chunk("two", 2, 2), Chunk("three", 3, 3)]
+        self.assertEqual(self.queue.chunks(job_id), chunks)
+        self.assertEqual(self.queue.chunks(job_id, 1, 2), chunks[1:2])
+        self.assertEqual(self.queue.embeddings(job_id), [[1.0] * 4] * 2)
+        self.assertEqual(self.queue.embeddings(job_id, 1, 3), [[1.0] * 4])
+        self.assertEqual((self.queue.get(job_id).chunks_total, self.queue.get(job_id).chunks_embedded), (3, 2))
+
+    def test_gives_up_after_repeated_interruptions(self):
+        """Test a job interrupted max_attempts times is failed rather than requeued."""
+        job_id = self.queue.enqueue("a.pdf", b"a", "shared")
+        for _ in range(2):
+            self.queue.claim()
+            self.queue.requeue_interrupted(max_attempts=2)
+        job = self.queue.get(job_id)
+        self.assertEqual(job.status, FAILED)
+        self.assertFalse(os.path.exists(job.source_path))
+
+    def test_finish_drops_checkpoints(self):
+        """Test finishing a job removes its chunks and spooled file but keeps its counts."""
+        job_id = self.queue.enqueue("a.pdf", b"a", "user:alice")
+        self.queue.claim()
+        self.queue.save_batch(job_id, [Chunk("one", 1, 1)], TokenChunker(), next_page=2)
+        self.queue.finish(job_id, DONE)
+        job = self.queue.get(job_id)
+        self.assertTrue(job.finished)
+        self.assertEqual(job.chunks_total, 1)
+        self.assertEqual(self.queue.chunks(job_id), [])
+        self.assertIsNone(self.queue.chunker(job_id))
+        self.assertFalse(os.path.exists(job.source_path))
+        self.assertEqual([j.id for j in self.queue.jobs("user:alice")], [job_id])
+        self.assertEqual(self.queue.jobs("shared"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
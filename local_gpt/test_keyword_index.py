@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from keyword_index import KeywordIndex, build_match_query, reciprocal_rank_fusion
+
+
+class TestKeywordIndex(unittest.TestCase):
+    """Unit tests for the BM25 keyword index."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = KeywordIndex(os.path.join(self.tmp.name, "keywords.sqlite"))
+        self.index.add(
+            ["a_0", "a_1", "b_0"],
+            [
+                "The pump uses part number KX-12345 for the seal.",
+                "General maintenance guidance for all pumps.",
+                "Call parse_invoice_header before validating totals.",
+            ],
+            [{"filename": "a.pdf"}, {"filename": "a.pdf"}, {"filename": "b.pdf"}],
+        )
+
+    def tearDown(self):
+        self.index._db.close()
+        self.tmp.cleanup()
+
+    def test_finds_exact_identifier(self):
+        """Test part numbers are matched exactly."""
+        hits = self.index.search("Which part is KX-12345?")
+        self.assertEqual(hits[0][0], "a_0")
+
+    def test_finds_function_name(self):
+        """Test snake_case identifiers are matched."""
+        hits = self.index.search("what does parse_invoice_header do")
+        self.assertEqual(hits[0][0], "b_0")
+
+    def test_delete_by_filename(self):
+        """Test deleting a file removes all of its chunks."""
+        self.index.delete(filename="a.pdf")
+        self.assertEqual(self.index.count(), 1)
+        self.assertEqual(self.index.search("KX-12345"), [])
+
+    def test_optimize_keeps_search_results(self):
+        """Test optimizing after deletes leaves the remaining chunks searchable."""
+        self.index.delete(ids=["a_1"])
+        self.index.optimize()
+        self.assertEqual(self.index.count(), 2)
+        self.assertEqual([chunk_id for chunk_id, _ in self.index.search("KX-12345")], ["a_0"])
+
+    def test_stopword_only_query_returns_nothing(self):
+        """Test queries made only of stopwords do not scan the index."""
+        self.assertIsNone(build_match_query("what is the"))
+        self.assertEqual(self.index.search("what is the"), [])
+
+    def test_persists_across_instances(self):
+        """Test the index survives reopening the database file."""
+        reopened = KeywordIndex(os.path.join(self.tmp.name, "keywords.sqlite"))
+        self.assertEqual(reopened.count(), 3)
+        reopened._db.close()
+
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    """Unit tests for reciprocal-rank fusion."""
+
+    def test_items_in_both_rankings_rank_first(self):
+        """Test an ID ranked by both retrievers beats IDs found by one."""
+        fused = reciprocal_rank_fusion([["x", "y"], ["z", "y"]], k=60)
+        self.assertEqual(fused[0][0], "y")
+        self.assertAlmostEqual(fused[0][1], 2 / 62)
+
+    def test_empty_rankings(self):
+        """Test fusing nothing returns nothing."""
+        self.assertEqual(reciprocal_rank_fusion([[], []]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
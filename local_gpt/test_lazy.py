@@ -0,0 +1,56 @@
+import threading
+import time
+import unittest
+
+from lazy import LazyResource
+
+
+class TestLazyResource(unittest.TestCase):
+    """Unit tests for thread-safe lazy initialization."""
+
+    def test_factory_not_called_until_first_use(self):
+        """Test creating the wrapper does not build the resource."""
+        calls = []
+        resource = LazyResource("thing", lambda: calls.append(1) or "value")
+        self.assertFalse(resource.loaded)
+        self.assertEqual(calls, [])
+        self.assertEqual(resource.get(), "value")
+        self.assertTrue(resource.loaded)
+
+    def test_concurrent_first_use_builds_once(self):
+        """Test many threads asking at once share a single load."""
+        calls = []
+
+        def factory():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+
+        resource = LazyResource("thing", factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resource.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_failed_load_is_retried(self):
+        """Test an exception during loading does not poison the resource."""
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("first load fails")
+            return "ok"
+
+        resource = LazyResource("thing", factory)
+        with self.assertRaises(RuntimeError):
+            resource.get()
+        self.assertEqual(resource.get(), "ok")
+
+
+if __name__ == "__main__":
+    unittest.main()
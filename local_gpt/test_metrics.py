@@ -0,0 +1,90 @@
+import logging
+import unittest
+import urllib.request
+
+from metrics import Histogram, MetricsRegistry, SamplingFilter, start_metrics_server
+
+
+class TestHistogram(unittest.TestCase):
+    """Unit tests for latency histograms."""
+
+    def test_render_is_cumulative(self):
+        """Test bucket counts are cumulative and include +Inf, sum and count."""
+        histogram = Histogram("stage_seconds", "Stage time", ["stage"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, stage="embedding")
+        lines = histogram.render()
+        self.assertIn('stage_seconds_bucket{stage="embedding",le="0.1"} 1', lines)
+        self.assertIn('stage_seconds_bucket{stage="embedding",le="1.0"} 2', lines)
+        self.assertIn('stage_seconds_bucket{stage="embedding",le="+Inf"} 3', lines)
+        self.assertIn('stage_seconds_sum{stage="embedding"} 5.55', lines)
+        self.assertIn('stage_seconds_count{stage="embedding"} 3', lines)
+
+    def test_time_records_even_on_error(self):
+        """Test a span is recorded when the timed block raises."""
+        histogram = Histogram("stage_seconds", "Stage time", ["stage"])
+        with self.assertRaises(RuntimeError):
+            with histogram.time(stage="retrieval"):
+                raise RuntimeError("boom")
+        self.assertEqual(histogram.count(stage="retrieval"), 1)
+
+    def test_time_as_decorator(self):
+        """Test each call of a decorated function is recorded."""
+        histogram = Histogram("stage_seconds", "Stage time", ["stage"])
+
+        @histogram.time(stage="rerank")
+        def work(x):
+            return x * 2
+
+        self.assertEqual(work(2), 4)
+        self.assertEqual(work(3), 6)
+        self.assertEqual(histogram.count(stage="rerank"), 2)
+
+    def test_quantile_interpolates_within_bucket(self):
+        """Test quantiles are estimated from bucket boundaries."""
+        histogram = Histogram("latency_seconds", "Latency", buckets=(1.0, 2.0))
+        for value in (0.5, 1.5, 1.5, 1.5):
+            histogram.observe(value)
+        self.assertAlmostEqual(histogram.quantile(0.5), 1.0 + 1.0 / 3)
+        self.assertIsNone(Histogram("empty_seconds", "Empty").quantile(0.5))
+
+    def test_rejects_wrong_labels(self):
+        """Test observations must carry exactly the declared labels."""
+        histogram = Histogram("stage_seconds", "Stage time", ["stage"])
+        with self.assertRaises(ValueError):
+            histogram.observe(1.0, pool="llm")
+
+
+class TestMetricsServer(unittest.TestCase):
+    """The /metrics endpoint serves the registry in Prometheus text format."""
+
+    def test_serves_metrics(self):
+        """Test scraping /metrics returns registered metrics and collector lines."""
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc()
+        registry.add_collector(lambda: ["queue_depth 3"])
+        server = start_metrics_server(registry, port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/metrics"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode()
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+        finally:
+            server.shutdown()
+        self.assertIn("# TYPE requests_total counter", body)
+        self.assertIn("requests_total 1.0", body)
+        self.assertIn("queue_depth 3", body)
+
+
+class TestSamplingFilter(unittest.TestCase):
+    """Unit tests for hot-path log sampling."""
+
+    def test_rates(self):
+        """Test rate 0 drops every record and rate 1 keeps every record."""
+        record = logging.LogRecord("hot", logging.INFO, __file__, 1, "msg", None, None)
+        self.assertFalse(SamplingFilter(0).filter(record))
+        self.assertTrue(SamplingFilter(1).filter(record))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import re
+import threading
+import time
+import unittest
+
+from namespaces import SHARED_NAMESPACE, NamespaceRegistry, namespace_for, storage_name
+
+
+class TestNamespaceFor(unittest.TestCase):
+    """Unit tests for choosing a session's namespace."""
+
+    def test_user_mode_prefers_authenticated_user(self):
+        """Test user mode keys by user and puts anonymous sessions in the shared namespace."""
+        self.assertEqual(namespace_for("user", "alice", "s1"), "user:alice")
+        self.assertEqual(namespace_for("user", None, "s1"), SHARED_NAMESPACE)
+
+    def test_session_and_shared_modes(self):
+        """Test session mode ignores the user and shared mode uses one namespace."""
+        self.assertEqual(namespace_for("session", "alice", "s1"), "session:s1")
+        self.assertEqual(namespace_for("shared", "alice", "s1"), SHARED_NAMESPACE)
+
+    def test_unknown_mode(self):
+        """Test an unknown mode is rejected."""
+        with self.assertRaises(ValueError):
+            namespace_for("tenant", "alice", "s1")
+
+
+class TestStorageName(unittest.TestCase):
+    """Unit tests for per-namespace collection names."""
+
+    def test_shared_keeps_base_name(self):
+        """Test the shared namespace maps to the original collection."""
+        self.assertEqual(storage_name("pdf_documents", SHARED_NAMESPACE), "pdf_documents")
+
+    def test_names_are_valid_and_unique(self):
+        """Test names follow Chroma's rules and differ for similar namespaces."""
+        first = storage_name("pdf_documents", "user:alice@example.com")
+        second = storage_name("pdf_documents", "user:alice#example.com")
+        self.assertNotEqual(first, second)
+        for name in (first, second, storage_name("pdf_documents", "user:" + "x" * 300)):
+            self.assertRegex(name, r"^[A-Za-z0-9][A-Za-z0-9._-]{1,510}[A-Za-z0-9]$")
+            self.assertLessEqual(len(name), 512)
+            self.assertIsNone(re.search(r"\.\.", name))
+
+
+class TestNamespaceRegistry(unittest.TestCase):
+    """Unit tests for opening and releasing namespaces."""
+
+    def test_opens_once_and_reuses(self):
+        """Test a namespace is opened on first use and then reused."""
+        opened = []
+        registry = NamespaceRegistry(lambda name: opened.append(name) or object())
+        first = registry.get("user:a")
+        self.assertIs(registry.get("user:a"), first)
+        self.assertEqual(opened, ["user:a"])
+
+    def test_releases_idle_namespaces(self):
+        """Test namespaces idle past the timeout are released, the shared one never."""
+        registry = NamespaceRegistry(lambda name: object(), idle_seconds=0.01)
+        registry.get(SHARED_NAMESPACE)
+        registry.get("user:a")
+        time.sleep(0.02)
+        self.assertEqual(registry.evict_idle(), ["user:a"])
+        self.assertEqual(registry.open_namespaces(), [SHARED_NAMESPACE])
+
+    def test_max_open_releases_least_recently_used(self):
+        """Test the least recently used namespace is released beyond max_open."""
+        registry = NamespaceRegistry(lambda name: object(), max_open=2)
+        registry.get("user:a")
+        registry.get("user:b")
+        registry.get("user:a")
+        registry.get("user:c")
+        self.assertEqual(registry.open_namespaces(), ["user:a", "user:c"])
+
+    def test_slow_open_does_not_block_other_namespaces(self):
+        """Test a namespace being opened blocks only callers of that namespace."""
+        started, finish = threading.Event(), threading.Event()
+        opened = []
+
+        def open_namespace(name):
+            opened.append(name)
+            if name == "user:slow":
+                started.set()
+                finish.wait(5)
+            return object()
+
+        registry = NamespaceRegistry(open_namespace)
+        threads = [threading.Thread(target=registry.get, args=("user:slow",)) for _ in range(2)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        threads[1].start()
+        registry.get("user:fast")
+        self.assertEqual(registry.open_namespaces(), ["user:fast"])
+        finish.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(sorted(opened), ["user:fast", "user:slow"])
+        self.assertEqual(sorted(registry.open_namespaces()), ["user:fast", "user:slow"])
+
+    def test_released_namespace_reopens(self):
+        """Test a released namespace is reopened with a fresh handle."""
+        registry = NamespaceRegistry(lambda name: object())
+        first = registry.get("user:a")
+        self.assertTrue(registry.release("user:a"))
+        self.assertIsNot(registry.get("user:a"), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import pickle
+import re
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from benchmarks.corpus import generate_document, render_pdf
+from pdf_processing import (
+    TokenChunker,
+    chunk_page_batch,
+    chunk_pdf_timed,
+    chunk_text,
+    count_pdf_pages,
+    extract_pages,
+    iter_chunks,
+    iter_pdf_pages,
+    iter_token_chunks,
+    split_sentences,
+)
+
+
+def count_words(texts):
+    """Stand-in token counter: one token per word or punctuation mark."""
+    return np.array([len(re.findall(r"\w+|[^\w\s]", text)) for text in texts], dtype=np.int64)
+
+
+class TestChunkText(unittest.TestCase):
+    """Unit tests for the character-based chunker."""
+
+    def test_empty_text_returns_no_chunks(self):
+        """Test empty or whitespace-only text produces no chunks."""
+        self.assertEqual(chunk_text(""), [])
+        self.assertEqual(chunk_text("   \n "), [])
+
+    def test_short_text_is_single_chunk(self):
+        """Test text shorter than the chunk size is returned as one chunk."""
+        self.assertEqual(chunk_text("Hello world."), ["Hello world."])
+
+    def test_breaks_at_sentence_boundary(self):
+        """Test chunks end at a period in the latter half of the window."""
+        text = "a" * 70 + ". " + "b" * 100
+        chunks = chunk_text(text, chunk_size=100, overlap=10)
+        self.assertTrue(chunks[0].endswith("."))
+        self.assertEqual(len(chunks[0]), 71)
+
+
+class TestIterPdfPages(unittest.TestCase):
+    """Unit tests for page-by-page PDF extraction."""
+
+    def test_extracts_generated_pdf(self):
+        """Test every page of a generated PDF is extracted with its planted facts intact."""
+        pages, facts = generate_document(seed=3, num_pages=4, facts_per_page=1.0)
+        extracted = list(iter_pdf_pages(render_pdf(pages)))
+        self.assertEqual([number for number, _ in extracted], [1, 2, 3, 4])
+        for fact in facts:
+            self.assertIn(fact.answer, extracted[fact.page - 1][1])
+
+    def test_chunk_pdf_timed_reports_stage_times(self):
+        """Test timed chunking returns chunks plus extraction and chunking seconds."""
+        pages, _ = generate_document(seed=1, num_pages=2)
+        with mock.patch("pdf_processing.get_token_counter", return_value=count_words):
+            chunks, timings = chunk_pdf_timed(render_pdf(pages))
+        self.assertTrue(chunks)
+        self.assertEqual(set(timings), {"extraction", "chunking"})
+        self.assertTrue(all(seconds >= 0 for seconds in timings.values()))
+
+    def test_extracts_page_range(self):
+        """Test extracting a page range in batches gives the same chunks as the whole file."""
+        pages, _ = generate_document(seed=2, num_pages=5)
+        pdf = render_pdf(pages)
+        self.assertEqual(count_pdf_pages(pdf), 5)
+        batches = extract_pages(pdf, 1, 2) + extract_pages(pdf, 3, 5)
+        self.assertEqual(batches, list(iter_pdf_pages(pdf)))
+        with mock.patch("pdf_processing.get_token_counter", return_value=count_words):
+            expected = chunk_pdf_timed(pdf)[0]
+            # Chunking each batch with the carried-over chunker matches chunking the whole file
+            first, chunker = chunk_page_batch(batches[:2], TokenChunker())
+            rest, _ = chunk_page_batch(batches[2:], pickle.loads(pickle.dumps(chunker)), final=True)
+            self.assertEqual(first + rest, expected)
+
+
+class TestIterChunks(unittest.TestCase):
+    """Unit tests for the streaming page chunker."""
+
+    def test_matches_chunking_joined_text(self):
+        """Test streaming pages gives the same chunks as chunking the joined text."""
+        pages = [(1, "First page. " * 40), (2, "Second page text " * 30), (3, "Third. " * 50)]
+        joined = "\n".join(text for _, text in pages).strip()
+        streamed = [chunk.text for chunk in iter_chunks(pages, chunk_size=200, overlap=40)]
+        self.assertEqual(streamed, chunk_text(joined, chunk_size=200, overlap=40))
+
+    def test_records_page_span(self):
+        """Test chunks record the pages they start and end on."""
+        pages = [(1, "x" * 150), (2, "y" * 150)]
+        chunks = list(iter_chunks(pages, chunk_size=200, overlap=20))
+        self.assertEqual((chunks[0].page_start, chunks[0].page_end), (1, 2))
+        self.assertEqual(chunks[-1].page_end, 2)
+
+
+class TestSplitSentences(unittest.TestCase):
+    """Unit tests for sentence boundary detection."""
+
+    def test_splits_on_terminal_punctuation(self):
+        """Test sentences split after ., ! and ? followed by whitespace."""
+        self.assertEqual(split_sentences("One. Two! Three? Four"), ["One.", "Two!", "Three?", "Four"])
+
+    def test_keeps_closing_quotes(self):
+        """Test closing quotes stay with their sentence."""
+        self.assertEqual(split_sentences('He said "Hi." Then left.'), ['He said "Hi."', "Then left."])
+
+    def test_does_not_split_decimals(self):
+        """Test a period inside a number is not a boundary."""
+        self.assertEqual(split_sentences("Pi is 3.14 roughly."), ["Pi is 3.14 roughly."])
+
+
+class TestIterTokenChunks(unittest.TestCase):
+    """Unit tests for the token-aware sentence chunker."""
+
+    def setUp(self):
+        sentence = "the quick brown fox jumps over the lazy dog."
+        self.pages = [(page, " ".join([sentence] * 12)) for page in range(1, 6)]
+
+    def test_chunks_fit_token_budget(self):
+        """Test no chunk exceeds the token budget."""
+        chunks = list(iter_token_chunks(self.pages, count_words, max_tokens=50, overlap_tokens=10))
+        self.assertTrue(chunks)
+        self.assertLessEqual(count_words([c.text for c in chunks]).max(), 50)
+
+    def test_chunks_end_on_sentence_boundaries(self):
+        """Test chunks contain only whole sentences."""
+        for chunk in iter_token_chunks(self.pages, count_words, max_tokens=50, overlap_tokens=10):
+            self.assertTrue(chunk.text.startswith("the quick"))
+            self.assertTrue(chunk.text.endswith("dog."))
+
+    def test_consecutive_chunks_overlap(self):
+        """Test consecutive chunks share trailing sentences up to the overlap."""
+        chunks = list(iter_token_chunks(self.pages, count_words, max_tokens=50, overlap_tokens=10))
+        last_sentence = chunks[0].text.split("dog. ")[-1]
+        self.assertTrue(chunks[1].text.startswith(last_sentence))
+
+    def test_splits_overlong_sentence(self):
+        """Test a sentence longer than the budget is split into pieces that fit."""
+        pages = [(1, " ".join(["word"] * 120) + ".")]
+        chunks = list(iter_token_chunks(pages, count_words, max_tokens=50, overlap_tokens=0))
+        self.assertEqual(len(chunks), 3)
+        self.assertLessEqual(count_words([c.text for c in chunks]).max(), 50)
+
+    def test_sentence_spanning_pages_is_kept_whole(self):
+        """Test a sentence continued on the next page is not split."""
+        pages = [(1, "Start of a sentence that"), (2, "ends here. Another one.")]
+        chunks = list(iter_token_chunks(pages, count_words, max_tokens=50, overlap_tokens=0))
+        self.assertEqual(chunks[0].text, "Start of a sentence that ends here. Another one.")
+        self.assertEqual((chunks[0].page_start, chunks[0].page_end), (1, 2))
+
+    def test_pages_without_sentence_ends_do_not_accumulate(self):
+        """Test unterminated pages are flushed once they fill a chunk, keeping their page numbers."""
+        pages = [(page, " ".join(f"cell{page}_{i}" for i in range(30))) for page in range(1, 201)]
+        calls = []
+
+        def counting(texts):
+            calls.append(sum(len(text) for text in texts))
+            return count_words(texts)
+
+        chunks = list(iter_token_chunks(pages, counting, max_tokens=50, overlap_tokens=0))
+        self.assertLessEqual(count_words([c.text for c in chunks]).max(), 50)
+        self.assertGreaterEqual(chunks[-1].page_start, 199)
+        self.assertGreaterEqual(len({c.page_start for c in chunks}), 100)
+        # Each page is tokenized with at most about two pages of carried text
+        self.assertLess(max(calls), 3 * len(pages[0][1]))
+        words = " ".join(c.text for c in chunks).split()
+        self.assertEqual(words, " ".join(text for _, text in pages).split())
+
+
+if __name__ == "__main__":
+    unittest.main()
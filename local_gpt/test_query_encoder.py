@@ -0,0 +1,95 @@
+import asyncio
+import unittest
+
+import numpy as np
+
+from query_encoder import BatchingQueryEncoder
+
+
+class FakeEncoder:
+    """Records batches and embeds each text as [len(text), batch size]."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("encoder down")
+        return np.array([[len(text), len(texts)] for text in texts], dtype=np.float32)
+
+
+class TestBatchingQueryEncoder(unittest.TestCase):
+    """Unit tests for the micro-batching query encoder."""
+
+    def test_concurrent_queries_share_one_batch(self):
+        """Test queries arriving together are encoded in a single call."""
+        fake = FakeEncoder()
+        encoder = BatchingQueryEncoder(fake, max_wait=0.01)
+
+        async def main():
+            return await asyncio.gather(*(encoder.encode(f"question {i}") for i in range(5)))
+
+        vectors = asyncio.run(main())
+        self.assertEqual(len(fake.batches), 1)
+        self.assertEqual([vector[1] for vector in vectors], [5] * 5)
+        self.assertEqual(encoder.batched_queries, 5)
+
+    def test_batch_size_limit_flushes_early(self):
+        """Test a full batch is sent without waiting for the timer."""
+        fake = FakeEncoder()
+        encoder = BatchingQueryEncoder(fake, max_batch_size=2, max_wait=10)
+
+        async def main():
+            return await asyncio.wait_for(
+                asyncio.gather(*(encoder.encode(f"q{i}") for i in range(4))), timeout=1
+            )
+
+        asyncio.run(main())
+        self.assertEqual([len(batch) for batch in fake.batches], [2, 2])
+
+    def test_duplicates_are_coalesced_and_cached(self):
+        """Test identical queries are encoded once, then served from the cache."""
+        fake = FakeEncoder(delay=0.01)
+        encoder = BatchingQueryEncoder(fake, max_wait=0.001)
+
+        async def main():
+            first = await asyncio.gather(encoder.encode("what is KX-1?"), encoder.encode("what  is KX-1?"))
+            again = await encoder.encode("what is KX-1?")
+            return first, again
+
+        (a, b), again = asyncio.run(main())
+        self.assertEqual(fake.batches, [["what is KX-1?"]])
+        self.assertIs(a, b)
+        self.assertIs(again, a)
+        self.assertEqual((encoder.hits, encoder.misses, encoder.coalesced), (1, 2, 1))
+        self.assertFalse(again.flags.writeable)
+
+    def test_lru_eviction(self):
+        """Test the least recently used embedding is evicted beyond cache_size."""
+        encoder = BatchingQueryEncoder(FakeEncoder(), max_wait=0, cache_size=2)
+
+        async def main():
+            for query in ("a", "b", "a", "c"):
+                await encoder.encode(query)
+
+        asyncio.run(main())
+        self.assertEqual(list(encoder._cache), ["a", "c"])
+
+    def test_failure_reaches_every_caller(self):
+        """Test an encoder error is raised to all waiting callers and nothing is cached."""
+        encoder = BatchingQueryEncoder(FakeEncoder(fail=True), max_wait=0.001)
+
+        async def main():
+            return await asyncio.gather(encoder.encode("a"), encoder.encode("b"), return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(len(encoder), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
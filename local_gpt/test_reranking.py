@@ -0,0 +1,74 @@
+import time
+import unittest
+
+import numpy as np
+
+from reranking import mmr_select, rerank
+
+
+def keyword_scorer(pairs):
+    """Score a passage by how many query words it contains."""
+    return [sum(word in passage.split() for word in query.split()) for query, passage in pairs]
+
+
+class TestRerank(unittest.TestCase):
+    """Unit tests for budgeted cross-encoder re-ranking."""
+
+    def test_orders_by_score(self):
+        """Test candidates are returned best-scored first."""
+        passages = ["nothing here", "pump pressure limit", "pump only"]
+        ranked = rerank("pump pressure limit", passages, keyword_scorer, batch_size=2)
+        self.assertEqual(ranked.order, [1, 2, 0])
+        self.assertEqual(ranked.scores, [0.0, 3.0, 1.0])
+        self.assertTrue(ranked.complete)
+
+    def test_scores_in_batches(self):
+        """Test pairs are sent to the scorer in batches of batch_size."""
+        batches = []
+
+        def scorer(pairs):
+            batches.append(len(pairs))
+            return [0.0] * len(pairs)
+
+        rerank("q", ["p"] * 7, scorer, batch_size=3)
+        self.assertEqual(batches, [3, 3, 1])
+
+    def test_time_budget_leaves_tail_unscored(self):
+        """Test scoring stops at the budget and unscored candidates keep their order."""
+        def slow_scorer(pairs):
+            time.sleep(0.05)
+            return [float(len(passage)) for _, passage in pairs]
+
+        passages = ["a", "bbb", "cc", "dddd", "e"]
+        ranked = rerank("q", passages, slow_scorer, batch_size=2, time_budget=0.01)
+        self.assertFalse(ranked.complete)
+        self.assertEqual(ranked.scores, [1.0, 3.0, None, None, None])
+        self.assertEqual(ranked.order, [1, 0, 2, 3, 4])
+
+    def test_empty(self):
+        """Test no candidates give an empty ranking."""
+        self.assertEqual(rerank("q", [], keyword_scorer).order, [])
+
+
+class TestMMR(unittest.TestCase):
+    """Unit tests for maximal marginal relevance selection."""
+
+    def test_skips_near_duplicate(self):
+        """Test a near-duplicate of the top candidate loses to a distinct one."""
+        embeddings = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]])
+        relevance = [1.0, 0.95, 0.7]
+        self.assertEqual(mmr_select(embeddings, relevance, k=2, diversity=0.5), [0, 2])
+
+    def test_zero_diversity_is_top_k(self):
+        """Test diversity=0 selects purely by relevance."""
+        embeddings = np.array([[1.0, 0.0], [0.99, 0.01], [0.0, 1.0]])
+        self.assertEqual(mmr_select(embeddings, [1.0, 0.95, 0.7], k=2, diversity=0.0), [0, 1])
+
+    def test_k_larger_than_candidates(self):
+        """Test asking for more candidates than exist returns them all."""
+        self.assertEqual(sorted(mmr_select(np.eye(2), [0.5, 0.4], k=5)), [0, 1])
+        self.assertEqual(mmr_select(np.zeros((0, 2)), [], k=3), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from streaming import ThinkTagSplitter
+
+
+def split_all(chunks):
+    """Feed chunks through a splitter and merge consecutive pieces of the same kind."""
+    splitter = ThinkTagSplitter()
+    pieces = [p for chunk in chunks for p in splitter.feed(chunk)] + splitter.flush()
+    merged = []
+    for is_thinking, text in pieces:
+        if merged and merged[-1][0] == is_thinking:
+            merged[-1] = (is_thinking, merged[-1][1] + text)
+        else:
+            merged.append((is_thinking, text))
+    return merged
+
+
+class TestThinkTagSplitter(unittest.TestCase):
+    """Unit tests for separating reasoning from the answer while streaming."""
+
+    def test_plain_answer(self):
+        """Test output without tags is all answer."""
+        self.assertEqual(split_all(["Hello ", "world"]), [(False, "Hello world")])
+
+    def test_think_then_answer(self):
+        """Test reasoning inside tags is marked as thinking."""
+        self.assertEqual(
+            split_all(["<think>plan</think>", "Answer"]),
+            [(True, "plan"), (False, "Answer")],
+        )
+
+    def test_tags_split_across_chunks(self):
+        """Test tags broken over several chunks are still recognised."""
+        chunks = ["<thi", "nk>rea", "soning</th", "ink>Fin", "al"]
+        self.assertEqual(split_all(chunks), [(True, "reasoning"), (False, "Final")])
+
+    def test_partial_tag_lookalike_is_released(self):
+        """Test a '<' that does not start a tag is not swallowed."""
+        self.assertEqual(split_all(["a <", "b"]), [(False, "a <b")])
+
+    def test_unclosed_think_flushes_as_thinking(self):
+        """Test text left in an unterminated think block is flushed as thinking."""
+        self.assertEqual(split_all(["<think>never done</th"]), [(True, "never done</th")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Concurrent-client load test for the finance MCP server.
+
+Starts N simulated clients at once, each calling one tool repeatedly over
+the SSE transport, and reports throughput and latency for every client
+count. With blocking calls offloaded to the fetch pool, throughput should
+grow with the number of clients until the pool or host limit is reached,
+instead of staying flat as it does when requests are served one at a time.
+
+Start the server with the cache disabled for the tool under test, so
+every call really reaches Yahoo:
+
+    YF_CACHE_TTL_QUOTE=0 uv run python mcp_finance_server.py
+    uv run python -m benchmarks.concurrent_clients --clients 1 2 4 8 16 --requests 10 --json load.json
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from llama_index.tools.mcp import BasicMCPClient
+
+DEFAULT_SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "JPM", "V", "XOM"]
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+async def run_client(url: str, tool: str, symbols: List[str], offset: int, requests: int) -> Dict[str, List]:
+    client = BasicMCPClient(command_or_url=url)
+    latencies, errors = [], []
+    for i in range(requests):
+        symbol = symbols[(offset + i) % len(symbols)]
+        started = time.perf_counter()
+        try:
+            result = await client.call_tool(tool, {"symbol": symbol})
+            # Tools report upstream failures as an "error" field rather than an MCP error
+            text = " ".join(getattr(content, "text", "") for content in result.content)
+            if result.isError or '"error"' in text:
+                errors.append(text)
+        except Exception as e:
+            errors.append(str(e))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"latencies": latencies, "errors": errors}
+
+
+async def run_level(url: str, tool: str, symbols: List[str], clients: int, requests: int) -> Dict:
+    started = time.perf_counter()
+    runs = await asyncio.gather(*(
+        run_client(url, tool, symbols, offset=c * requests, requests=requests) for c in range(clients)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies = [latency for run in runs for latency in run["latencies"]]
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": sum(len(run["errors"]) for run in runs),
+        "seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/sse")
+    parser.add_argument("--tool", default="get_stock_info", help="A tool taking a single 'symbol' argument")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=10, help="Calls made by each client")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for clients in args.clients:
+        result = await run_level(args.url, args.tool, args.symbols, clients, args.requests)
+        result["speedup"] = result["throughput_rps"] / results[0]["throughput_rps"] if results else 1.0
+        results.append(result)
+        print(
+            f"{clients:>3} clients  {result['throughput_rps']:7.2f} req/s  x{result['speedup']:5.2f}  "
+            f"p50 {result['latency_p50_ms']:8.1f} ms  p95 {result['latency_p95_ms']:8.1f} ms  "
+            f"errors {result['errors']}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Compare row-by-row and vectorized serialization of price history.
+
+Builds synthetic OHLCV frames shaped like yfinance output: 10 years of
+daily bars and 60 days of 1-minute bars during regular trading hours.
+Each frame is serialized with the previous ``iterrows()``/``strftime``
+loop and with :func:`serialization.serialize_frame` in every response
+shape. The benchmark reports the time taken and the JSON size.
+
+Usage:
+    uv run python -m benchmarks.serialization --repeat 5 --json serialization.json
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from serialization import ORIENTS, date_unit_for, serialize_frame
+
+HISTORY_COLUMNS = [
+    ("open", "Open", float),
+    ("high", "High", float),
+    ("low", "Low", float),
+    ("close", "Close", float),
+    ("volume", "Volume", int),
+]
+
+
+def make_history(interval: str, days: int, seed: int = 0) -> pd.DataFrame:
+    """Random-walk OHLCV bars on weekdays, in exchange-local time."""
+    sessions = pd.bdate_range(end="2025-06-30", periods=days, tz="America/New_York")
+    if interval == "1d":
+        index = sessions
+    else:
+        minutes = pd.timedelta_range("9h30min", "15h59min", freq="1min")
+        index = pd.DatetimeIndex((sessions.values[:, None] + minutes.values[None, :]).ravel()).tz_localize("UTC")
+        index = index.tz_convert("America/New_York")
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, len(index))))
+    spread = np.abs(rng.normal(0, 0.002, len(index))) * close
+    return pd.DataFrame({
+        "Open": close + rng.normal(0, 0.001, len(index)) * close,
+        "High": close + spread,
+        "Low": close - spread,
+        "Close": close,
+        "Volume": rng.integers(1000, 1_000_000, len(index)),
+    }, index=index)
+
+
+def iterrows_records(hist: pd.DataFrame) -> List[Dict]:
+    """The per-row conversion the history tool used before."""
+    data = []
+    for date, row in hist.iterrows():
+        data.append({
+            "date": date.strftime("%Y-%m-%d"),
+            "open": float(row["Open"]),
+            "high": float(row["High"]),
+            "low": float(row["Low"]),
+            "close": float(row["Close"]),
+            "volume": int(row["Volume"]) if "Volume" in row else 0
+        })
+    return data
+
+
+def best_seconds(function: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    cases = {"10y 1d": make_history("1d", 252 * 10), "60d 1m": make_history("1m", 60)}
+    results = []
+    for case, hist in cases.items():
+        unit = date_unit_for(case.split()[1])
+        methods = {"iterrows": lambda: iterrows_records(hist)}
+        for orient in ORIENTS:
+            methods[orient] = lambda orient=orient: serialize_frame(hist, HISTORY_COLUMNS, orient=orient, date_unit=unit)
+        baseline = None
+        for method, function in methods.items():
+            seconds = best_seconds(function, args.repeat)
+            json_bytes = len(json.dumps(function(), separators=(",", ":")))
+            baseline = baseline or seconds
+            results.append({
+                "case": case,
+                "rows": len(hist),
+                "method": method,
+                "seconds": seconds,
+                "speedup": baseline / seconds,
+                "json_bytes": json_bytes,
+            })
+            print(
+                f"{case:<7} {len(hist):>7} rows  {method:<8} {seconds * 1000:9.1f} ms  "
+                f"x{baseline / seconds:6.1f}  {json_bytes / 2**20:7.2f} MB JSON"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
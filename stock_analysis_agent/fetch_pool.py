@@ -0,0 +1,114 @@
+"""Bounded thread pool for blocking market data calls.
+
+yfinance is synchronous: ``Ticker.info`` or ``Ticker.history`` block on
+HTTP requests to Yahoo. Awaiting them inline in an ``async def`` tool
+stalls the event loop and every other connected client with it.
+:class:`FetchPool` runs them on a dedicated, sized thread pool instead,
+limits how many requests go to one host at a time, and gives up on calls
+that take too long.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class FetchTimeout(TimeoutError):
+    """A fetch did not finish within the pool's timeout."""
+
+
+class FetchPool:
+    """Runs blocking calls on worker threads with per-host concurrency limits.
+
+    A call holds its host's slot until its thread actually returns, even if
+    the caller already timed out, so a slow host can never have more than
+    its limit of requests outstanding.
+
+    Args:
+        max_workers: Worker threads shared by all hosts.
+        host_limit: Concurrent calls allowed per host unless overridden.
+        host_limits: Per-host overrides of ``host_limit``.
+        timeout: Seconds a caller waits for a free slot plus the call itself
+            before :class:`FetchTimeout` is raised (``None`` waits forever).
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 16,
+        host_limit: int = 8,
+        host_limits: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = 30.0,
+    ):
+        self.max_workers = max_workers
+        self.host_limit = host_limit
+        self.host_limits = dict(host_limits or {})
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._active: Dict[str, int] = {}
+        self._counters: Dict[str, Dict[str, float]] = {}
+
+    def _count(self, host: str, name: str, amount: float = 1) -> None:
+        counters = self._counters.setdefault(host, {"calls": 0, "errors": 0, "timeouts": 0, "busy_seconds": 0.0})
+        counters[name] += amount
+
+    def _semaphore(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.host_limits.get(host, self.host_limit))
+        return semaphore
+
+    async def run(self, host: str, function: Callable[[], Any]) -> Any:
+        """Run ``function`` on a worker thread once ``host`` has a free slot."""
+        loop = asyncio.get_running_loop()
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+        semaphore = self._semaphore(host)
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._count(host, "timeouts")
+            raise FetchTimeout(f"No free {host} slot within {self.timeout:g}s") from None
+
+        self._count(host, "calls")
+        self._active[host] = self._active.get(host, 0) + 1
+        started = time.perf_counter()
+
+        def release(_future: asyncio.Future) -> None:
+            self._active[host] -= 1
+            self._count(host, "busy_seconds", time.perf_counter() - started)
+            semaphore.release()
+
+        future = loop.run_in_executor(self._executor, function)
+        future.add_done_callback(release)
+        try:
+            # Shielded: a caller timing out must not free the slot while the thread still runs
+            return await asyncio.wait_for(
+                asyncio.shield(future), None if deadline is None else max(0.0, deadline - loop.time())
+            )
+        except asyncio.TimeoutError:
+            self._count(host, "timeouts")
+            # The result nobody waits for any more, including its error, is dropped
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            raise FetchTimeout(f"{host} call did not finish within {self.timeout:g}s") from None
+        except Exception:
+            self._count(host, "errors")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and, per host, its limit, calls in flight and call counters."""
+        return {
+            "max_workers": self.max_workers,
+            "timeout_seconds": self.timeout,
+            "hosts": {
+                host: {
+                    "limit": self.host_limits.get(host, self.host_limit),
+                    "active": self._active.get(host, 0),
+                    **counters,
+                }
+                for host, counters in self._counters.items()
+            },
+        }
+
+    def shutdown(self) -> None:
+        """Stop accepting calls; threads still running finish in the background."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
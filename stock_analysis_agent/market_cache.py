@@ -0,0 +1,202 @@
+"""Shared TTL cache for market data lookups, with request coalescing.
+
+An agent typically asks about the same symbol several times per
+conversation. Each kind of data gets its own time-to-live: quotes change
+by the second, while financial statements and split history change at
+most daily. Concurrent requests for the same key share one upstream
+fetch instead of each calling Yahoo.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# Seconds each kind of data is served from the cache
+DEFAULT_TTLS = {
+    "quote": 15,
+    "price": 15,
+    "history": 300,
+    "news": 300,
+    "recommendations": 3600,
+    "search": 3600,
+    "dividends": 86400,
+    "splits": 86400,
+    "financials": 86400,
+    "earnings": 86400,
+}
+
+# Marks a key with no cached value, since None is a valid value
+_MISSING = object()
+
+
+class MarketDataCache:
+    """LRU cache with per-kind TTLs that coalesces concurrent misses.
+
+    Args:
+        ttls: Seconds to keep each kind of entry; kinds not listed (or with
+            a TTL of 0) are never cached, but concurrent requests for them
+            are still coalesced.
+        max_entries: Entries kept across all kinds; the least recently used
+            are evicted first.
+        clock: Monotonic time source, replaceable in tests.
+    """
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _count(self, kind: str, outcome: str) -> None:
+        counters = self._counters.setdefault(kind, {"hits": 0, "misses": 0, "coalesced": 0})
+        counters[outcome] += 1
+
+    def _lookup(self, cache_key: Tuple[str, Hashable]) -> Any:
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            expires_at, value = entry
+            if self._clock() < expires_at:
+                self._entries.move_to_end(cache_key)
+                self._count(cache_key[0], "hits")
+                return value
+            del self._entries[cache_key]
+        return _MISSING
+
+    def _store(self, cache_key: Tuple[str, Hashable], value: Any) -> None:
+        ttl = self.ttls.get(cache_key[0], 0)
+        if ttl > 0:
+            self._entries[cache_key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, kind: str, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``(kind, key)``, calling ``load`` on a miss.
+
+        Exceptions from ``load`` are raised to every waiting caller and
+        nothing is cached.
+        """
+        cache_key = (kind, key)
+        value = self._lookup(cache_key)
+        if value is not _MISSING:
+            return value
+
+        future = self._in_flight.get(cache_key)
+        if future is not None:
+            self._count(kind, "coalesced")
+            value = await asyncio.shield(future)
+            if value is _MISSING:
+                raise LookupError(f"No {kind} data for {key!r}")
+            return value
+
+        self._count(kind, "misses")
+        future = self._in_flight[cache_key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await load()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it here so an error nobody else waited for is not logged as unhandled
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._store(cache_key, value)
+            return value
+        finally:
+            del self._in_flight[cache_key]
+
+    async def get_many(
+        self,
+        kind: str,
+        keys: Iterable[Hashable],
+        load_many: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Dict[Hashable, Any]:
+        """Return cached values for ``keys``, loading all misses with one ``load_many`` call.
+
+        ``load_many`` receives the keys neither cached nor already being
+        loaded and returns a dict of the values it found. Keys it leaves
+        out are missing from the result and are not cached. Exceptions
+        from ``load_many`` are raised as in :meth:`get`.
+        """
+        results: Dict[Hashable, Any] = {}
+        waiting: Dict[Hashable, asyncio.Future] = {}
+        missing: List[Hashable] = []
+        for key in dict.fromkeys(keys):
+            cache_key = (kind, key)
+            value = self._lookup(cache_key)
+            if value is not _MISSING:
+                results[key] = value
+            elif cache_key in self._in_flight:
+                self._count(kind, "coalesced")
+                waiting[key] = self._in_flight[cache_key]
+            else:
+                self._count(kind, "misses")
+                missing.append(key)
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            futures = {key: loop.create_future() for key in missing}
+            for key, future in futures.items():
+                self._in_flight[(kind, key)] = future
+            try:
+                loaded = await load_many(missing)
+            except asyncio.CancelledError:
+                for future in futures.values():
+                    future.cancel()
+                raise
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                    future.exception()
+                raise
+            else:
+                for key, future in futures.items():
+                    # Keys without data resolve to the missing marker for anyone coalesced onto them
+                    value = loaded.get(key, _MISSING)
+                    future.set_result(value)
+                    if value is not _MISSING:
+                        self._store((kind, key), value)
+                        results[key] = value
+            finally:
+                for key in missing:
+                    del self._in_flight[(kind, key)]
+
+        for key, future in waiting.items():
+            value = await asyncio.shield(future)
+            if value is not _MISSING:
+                results[key] = value
+        return results
+
+    def invalidate(self, kind: Optional[str] = None) -> int:
+        """Drop every entry, or only those of ``kind``; returns how many were dropped."""
+        keys = [key for key in self._entries if kind is None or key[0] == kind]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and coalesced counts per kind, plus totals and the entry count."""
+        totals = {"hits": 0, "misses": 0, "coalesced": 0}
+        for counters in self._counters.values():
+            for name, count in counters.items():
+                totals[name] += count
+        lookups = sum(totals.values())
+        return {
+            "entries": len(self._entries),
+            "by_kind": {kind: dict(counters) for kind, counters in self._counters.items()},
+            **totals,
+            "hit_rate": (totals["hits"] + totals["coalesced"]) / lookups if lookups else 0.0,
+        }
@@ -3,13 +3,22 @@
 import asyncio
 import logging
 import os
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Union
 
+import pandas as pd
 import yfinance as yf
 from fastmcp import FastMCP
 from pydantic import BaseModel, Field
 
+from fetch_pool import FetchPool
+from market_cache import DEFAULT_TTLS, MarketDataCache
+from price_store import PriceStore, period_start
+from quotes import BULK_PERIOD, build_quote, prices_from_download
+from serialization import date_unit_for, serialize_frame, serialize_series
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,6 +26,54 @@ logger = logging.getLogger(__name__)
 # Initialize FastMCP server
 mcp = FastMCP("YFinance MCP Server")
 
+# Per-kind cache lifetimes in seconds, overridable as e.g. YF_CACHE_TTL_QUOTE=30 (0 disables)
+CACHE_TTLS = {kind: float(os.getenv(f"YF_CACHE_TTL_{kind.upper()}", ttl)) for kind, ttl in DEFAULT_TTLS.items()}
+cache = MarketDataCache(CACHE_TTLS, max_entries=int(os.getenv("YF_CACHE_MAX_ENTRIES", "1024")))
+
+# Every yfinance call goes to Yahoo's API hosts; they share one concurrency limit
+YAHOO_HOST = "finance.yahoo.com"
+YF_FETCH_TIMEOUT = float(os.getenv("YF_FETCH_TIMEOUT", "30"))
+fetch_pool = FetchPool(
+    max_workers=int(os.getenv("YF_FETCH_WORKERS", "16")),
+    host_limit=int(os.getenv("YF_HOST_CONCURRENCY", "8")),
+    timeout=YF_FETCH_TIMEOUT or None,
+)
+
+
+# Bulk quotes: threads yf.download uses for one call, and the list size up to which
+# get_multiple_quotes also fetches per-symbol details by default
+YF_DOWNLOAD_THREADS = int(os.getenv("YF_DOWNLOAD_THREADS", os.getenv("YF_HOST_CONCURRENCY", "8")))
+YF_QUOTE_DETAILS_MAX = int(os.getenv("YF_QUOTE_DETAILS_MAX", "25"))
+_download_lock = threading.Lock()
+
+# Local OHLCV store for get_historical_data (empty YF_PRICE_STORE_PATH disables it), and
+# how many seconds stored bars are served before the latest ones are fetched
+YF_PRICE_STORE_PATH = os.getenv("YF_PRICE_STORE_PATH", "price_store")
+YF_PRICE_STORE_REFRESH = float(os.getenv("YF_PRICE_STORE_REFRESH", "300"))
+price_store = PriceStore(YF_PRICE_STORE_PATH) if YF_PRICE_STORE_PATH else None
+
+
+async def fetch(kind: str, key: Any, load: Callable[[], Any], host: str = YAHOO_HOST) -> Any:
+    """Return yfinance data from the shared cache, running ``load`` on the fetch pool on a miss."""
+    return await cache.get(kind, key, lambda: fetch_pool.run(host, load))
+
+
+# Output name, yfinance column and type of the columns tools return
+HISTORY_COLUMNS = [
+    ("open", "Open", float),
+    ("high", "High", float),
+    ("low", "Low", float),
+    ("close", "Close", float),
+    ("volume", "Volume", int),
+]
+RECOMMENDATION_COLUMNS = [
+    ("firm", "Firm", str),
+    ("to_grade", "To Grade", str),
+    ("from_grade", "From Grade", str),
+    ("action", "Action", str),
+]
+
+
 class StockInfo(BaseModel):
     """Stock information model"""
     symbol: str
@@ -44,11 +101,11 @@ async def get_stock_info(symbol: str) -> Dict[str, Any]:
         Dictionary containing stock information
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info
+        symbol = symbol.upper()
+        info = await fetch("quote", symbol, lambda: yf.Ticker(symbol).info)
         
         return {
-            "symbol": symbol.upper(),
+            "symbol": symbol,
             "name": info.get("longName", ""),
             "current_price": info.get("currentPrice", 0.0),
             "market_cap": info.get("marketCap"),
@@ -73,11 +130,55 @@ async def get_stock_info(symbol: str) -> Dict[str, Any]:
         logger.error(f"Error getting stock info for {symbol}: {str(e)}")
         return {"error": f"Failed to get stock info for {symbol}: {str(e)}"}
 
+def load_history(symbol: str, period: str, interval: str) -> pd.DataFrame:
+    """Price history from the local store, downloading only bars it does not have yet.
+
+    A series is downloaded in full once per widest period requested; later
+    calls fetch just the bars since the last stored one. If Yahoo has since
+    adjusted past prices (after a split or dividend), the series is
+    downloaded again.
+    """
+    ticker = yf.Ticker(symbol)
+    if price_store is None:
+        return ticker.history(period=period, interval=interval)
+    try:
+        start = period_start(period)
+    except ValueError:
+        # Trading-day periods such as 5d are short; download them directly
+        return ticker.history(period=period, interval=interval)
+    
+    def download_all():
+        hist = ticker.history(period=period, interval=interval)
+        price_store.delete(symbol, interval)
+        price_store.merge(symbol, interval, hist, covers_from=start, extend_coverage=True)
+    
+    with price_store.lock(symbol, interval):
+        info = price_store.info(symbol, interval)
+        stale = info is not None and time.time() - info.fetched_at > YF_PRICE_STORE_REFRESH
+        if info is None or not info.covers(start) or (stale and not info.rows):
+            download_all()
+        elif stale:
+            # Re-fetch from the second to last bar: the last one may have been stored unfinished
+            tail_start = price_store.last_timestamps(symbol, interval, 2)[0]
+            try:
+                tail = ticker.history(start=tail_start, interval=interval)
+            except Exception as e:
+                logger.warning(f"Tail download of {symbol} {interval} failed, downloading {period}: {str(e)}")
+                download_all()
+            else:
+                if price_store.matches(symbol, interval, tail):
+                    price_store.merge(symbol, interval, tail)
+                else:
+                    logger.info(f"Stored {symbol} {interval} prices were adjusted upstream, downloading {period}")
+                    download_all()
+        return price_store.read(symbol, interval, start=start)
+
 @mcp.tool()
 async def get_historical_data(
     symbol: str,
     period: str = "1mo",
-    interval: str = "1d"
+    interval: str = "1d",
+    response_format: str = "records"
 ) -> Dict[str, Any]:
     """
     Get historical stock price data.
@@ -86,103 +187,85 @@ async def get_historical_data(
         symbol: Stock ticker symbol (e.g., 'AAPL', 'GOOGL')
         period: Time period (1d,5d,1mo,3mo,6mo,1y,2y,5y,10y,ytd,max)
         interval: Data interval (1m,2m,5m,15m,30m,60m,90m,1h,1d,5d,1wk,1mo,3mo)
+        response_format: Shape of "data": "records" (one object per bar), "split"
+            (column names plus one array per bar) or "columns" (one array per field, smallest)
     
     Returns:
         Dictionary containing historical price data
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        hist = ticker.history(period=period, interval=interval)
+        hist = await fetch(
+            "history", (symbol.upper(), period, interval), lambda: load_history(symbol.upper(), period, interval)
+        )
         
         if hist.empty:
             return {"error": f"No data found for symbol {symbol}"}
         
-        # Convert DataFrame to dictionary format
-        data = []
-        for date, row in hist.iterrows():
-            data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "open": float(row["Open"]),
-                "high": float(row["High"]),
-                "low": float(row["Low"]),
-                "close": float(row["Close"]),
-                "volume": int(row["Volume"]) if "Volume" in row else 0
-            })
+        data = serialize_frame(hist, HISTORY_COLUMNS, orient=response_format, date_unit=date_unit_for(interval))
         
         return {
             "symbol": symbol.upper(),
             "period": period,
             "interval": interval,
+            "format": response_format,
             "data": data,
-            "count": len(data)
+            "count": len(hist)
         }
     except Exception as e:
         logger.error(f"Error getting historical data for {symbol}: {str(e)}")
         return {"error": f"Failed to get historical data for {symbol}: {str(e)}"}
 
 @mcp.tool()
-async def get_dividends(symbol: str) -> Dict[str, Any]:
+async def get_dividends(symbol: str, response_format: str = "records") -> Dict[str, Any]:
     """
     Get dividend history for a stock.
     
     Args:
         symbol: Stock ticker symbol (e.g., 'AAPL', 'GOOGL')
+        response_format: Shape of "dividends": "records", "split" or "columns"
     
     Returns:
         Dictionary containing dividend history
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        dividends = ticker.dividends
+        dividends = await fetch("dividends", symbol.upper(), lambda: yf.Ticker(symbol.upper()).dividends)
         
         if dividends.empty:
             return {"symbol": symbol.upper(), "dividends": [], "message": "No dividend data available"}
         
-        dividend_data = []
-        for date, dividend in dividends.items():
-            dividend_data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "dividend": float(dividend)
-            })
-        
         return {
             "symbol": symbol.upper(),
-            "dividends": dividend_data,
-            "count": len(dividend_data)
+            "format": response_format,
+            "dividends": serialize_series(dividends, "dividend", orient=response_format),
+            "count": len(dividends)
         }
     except Exception as e:
         logger.error(f"Error getting dividends for {symbol}: {str(e)}")
         return {"error": f"Failed to get dividends for {symbol}: {str(e)}"}
 
 @mcp.tool()
-async def get_splits(symbol: str) -> Dict[str, Any]:
+async def get_splits(symbol: str, response_format: str = "records") -> Dict[str, Any]:
     """
     Get stock split history for a stock.
     
     Args:
         symbol: Stock ticker symbol (e.g., 'AAPL', 'GOOGL')
+        response_format: Shape of "splits": "records", "split" or "columns"
     
     Returns:
         Dictionary containing split history
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        splits = ticker.splits
+        splits = await fetch("splits", symbol.upper(), lambda: yf.Ticker(symbol.upper()).splits)
         
         if splits.empty:
             return {"symbol": symbol.upper(), "splits": [], "message": "No split data available"}
         
-        split_data = []
-        for date, split in splits.items():
-            split_data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "split_ratio": float(split)
-            })
-        
         return {
             "symbol": symbol.upper(),
-            "splits": split_data,
-            "count": len(split_data)
+            "format": response_format,
+            "splits": serialize_series(splits, "split_ratio", orient=response_format),
+            "count": len(splits)
         }
     except Exception as e:
         logger.error(f"Error getting splits for {symbol}: {str(e)}")
@@ -201,16 +284,13 @@ async def get_financials(symbol: str, quarterly: bool = False) -> Dict[str, Any]
         Dictionary containing financial statements
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
+        def load_statements():
+            ticker = yf.Ticker(symbol.upper())
+            if quarterly:
+                return ticker.quarterly_income_stmt, ticker.quarterly_balance_sheet, ticker.quarterly_cashflow
+            return ticker.income_stmt, ticker.balance_sheet, ticker.cashflow
         
-        if quarterly:
-            income_stmt = ticker.quarterly_income_stmt
-            balance_sheet = ticker.quarterly_balance_sheet
-            cash_flow = ticker.quarterly_cashflow
-        else:
-            income_stmt = ticker.income_stmt
-            balance_sheet = ticker.balance_sheet
-            cash_flow = ticker.cashflow
+        income_stmt, balance_sheet, cash_flow = await fetch("financials", (symbol.upper(), quarterly), load_statements)
         
         result = {
             "symbol": symbol.upper(),
@@ -247,9 +327,11 @@ async def get_earnings(symbol: str) -> Dict[str, Any]:
         Dictionary containing earnings data
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        earnings = ticker.earnings
-        quarterly_earnings = ticker.quarterly_earnings
+        def load_earnings():
+            ticker = yf.Ticker(symbol.upper())
+            return ticker.earnings, ticker.quarterly_earnings
+        
+        earnings, quarterly_earnings = await fetch("earnings", symbol.upper(), load_earnings)
         
         result = {
             "symbol": symbol.upper(),
@@ -281,8 +363,7 @@ async def get_news(symbol: str, count: int = 10) -> Dict[str, Any]:
         Dictionary containing news articles
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        news = ticker.news
+        news = await fetch("news", symbol.upper(), lambda: yf.Ticker(symbol.upper()).news)
         
         if not news:
             return {"symbol": symbol.upper(), "news": [], "message": "No news available"}
@@ -311,38 +392,39 @@ async def get_news(symbol: str, count: int = 10) -> Dict[str, Any]:
         return {"error": f"Failed to get news for {symbol}: {str(e)}"}
 
 @mcp.tool()
-async def get_recommendations(symbol: str) -> Dict[str, Any]:
+async def get_recommendations(symbol: str, response_format: str = "records") -> Dict[str, Any]:
     """
     Get analyst recommendations for a stock.
     
     Args:
         symbol: Stock ticker symbol (e.g., 'AAPL', 'GOOGL')
+        response_format: Shape of "recommendations": "records", "split" or "columns"
     
     Returns:
         Dictionary containing analyst recommendations
     """
     try:
-        ticker = yf.Ticker(symbol.upper())
-        recommendations = ticker.recommendations
+        recommendations = await fetch(
+            "recommendations", symbol.upper(), lambda: yf.Ticker(symbol.upper()).recommendations
+        )
         
         if recommendations is None or recommendations.empty:
             return {"symbol": symbol.upper(), "recommendations": [], "message": "No recommendations available"}
         
-        # Convert to dictionary format
-        rec_data = []
-        for date, row in recommendations.iterrows():
-            rec_data.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "firm": row.get("Firm", ""),
-                "to_grade": row.get("To Grade", ""),
-                "from_grade": row.get("From Grade", ""),
-                "action": row.get("Action", "")
-            })
+        if isinstance(recommendations.index, pd.DatetimeIndex):
+            # Dated firm-by-firm grade changes
+            rec_data = serialize_frame(recommendations, RECOMMENDATION_COLUMNS, orient=response_format)
+        else:
+            # Monthly rating counts (period, strongBuy, buy, ...) without a date index
+            columns = [(name, name, int if pd.api.types.is_numeric_dtype(dtype) else str)
+                       for name, dtype in recommendations.dtypes.items()]
+            rec_data = serialize_frame(recommendations, columns, orient=response_format, date_key=None)
         
         return {
             "symbol": symbol.upper(),
+            "format": response_format,
             "recommendations": rec_data,
-            "count": len(rec_data)
+            "count": len(recommendations)
         }
     except Exception as e:
         logger.error(f"Error getting recommendations for {symbol}: {str(e)}")
@@ -362,7 +444,7 @@ async def search_stocks(query: str, limit: int = 10) -> Dict[str, Any]:
     """
     try:
         # Use yfinance search functionality
-        search_results = yf.search(query, limit=limit)
+        search_results = await fetch("search", (query, limit), lambda: yf.search(query, limit=limit))
         
         if not search_results:
             return {"query": query, "results": [], "message": "No results found"}
@@ -386,53 +468,89 @@ async def search_stocks(query: str, limit: int = 10) -> Dict[str, Any]:
         logger.error(f"Error searching stocks for query '{query}': {str(e)}")
         return {"error": f"Failed to search stocks for query '{query}': {str(e)}"}
 
+def download_prices(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Latest daily closes of many symbols through one bulk ``yf.download`` call."""
+    # yf.download keeps its results in module globals, so two downloads must not overlap
+    with _download_lock:
+        frame = yf.download(
+            symbols, period=BULK_PERIOD, interval="1d", group_by="ticker", auto_adjust=False,
+            actions=False, threads=YF_DOWNLOAD_THREADS, progress=False,
+        )
+    return prices_from_download(frame, symbols)
+
 @mcp.tool()
-async def get_multiple_quotes(symbols: List[str]) -> Dict[str, Any]:
+async def get_multiple_quotes(symbols: List[str], include_details: Optional[bool] = None) -> Dict[str, Any]:
     """
     Get current quotes for multiple stocks at once.
     
+    Prices for all symbols are downloaded in bulk. Name, market cap and P/E ratio need one
+    extra request per symbol, so they are only included for short lists unless requested.
+    
     Args:
         symbols: List of stock ticker symbols (e.g., ['AAPL', 'GOOGL', 'MSFT'])
+        include_details: Also fetch name, market cap and P/E ratio; by default only for
+            lists of up to YF_QUOTE_DETAILS_MAX symbols
     
     Returns:
-        Dictionary containing quotes for all requested symbols
+        Dictionary containing quotes for all requested symbols; symbols that could not be
+        fetched have an "error" entry instead
     """
     try:
-        # Convert to uppercase
-        symbols = [symbol.upper() for symbol in symbols]
-        
-        # Use yfinance to get multiple tickers
-        tickers = yf.Tickers(' '.join(symbols))
+        # Convert to uppercase, dropping duplicates
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        if include_details is None:
+            include_details = len(symbols) <= YF_QUOTE_DETAILS_MAX
+        
+        try:
+            prices = await cache.get_many(
+                "price", symbols, lambda missing: fetch_pool.run(YAHOO_HOST, lambda: download_prices(missing))
+            )
+        except Exception as e:
+            logger.warning(f"Bulk price download failed, falling back to per-symbol quotes: {str(e)}")
+            prices = {}
+        
+        # Per-symbol info, shared with get_stock_info, for details and for symbols the bulk download missed
+        info_symbols = symbols if include_details else [symbol for symbol in symbols if symbol not in prices]
+        infos = dict(zip(info_symbols, await asyncio.gather(
+            *(fetch("quote", symbol, lambda symbol=symbol: yf.Ticker(symbol).info) for symbol in info_symbols),
+            return_exceptions=True,
+        )))
         
         results = {}
         for symbol in symbols:
-            try:
-                ticker = tickers.tickers[symbol]
-                info = ticker.info
-                
-                results[symbol] = {
-                    "symbol": symbol,
-                    "name": info.get("longName", ""),
-                    "current_price": info.get("currentPrice", 0.0),
-                    "previous_close": info.get("previousClose", 0.0),
-                    "change": info.get("currentPrice", 0.0) - info.get("previousClose", 0.0),
-                    "change_percent": ((info.get("currentPrice", 0.0) - info.get("previousClose", 0.0)) / info.get("previousClose", 1.0)) * 100,
-                    "volume": info.get("volume", 0),
-                    "market_cap": info.get("marketCap"),
-                    "pe_ratio": info.get("forwardPE")
-                }
-            except Exception as e:
-                results[symbol] = {"error": f"Failed to get data for {symbol}: {str(e)}"}
-        
+            info = infos.get(symbol)
+            if isinstance(info, BaseException):
+                if symbol not in prices:
+                    results[symbol] = {"error": f"Failed to get data for {symbol}: {str(info)}"}
+                    continue
+                info = None
+            if symbol not in prices and not (info or {}).get("currentPrice"):
+                results[symbol] = {"error": f"No price data found for {symbol}"}
+                continue
+            results[symbol] = build_quote(symbol, prices.get(symbol), info)
+        
+        failed = sum("error" in quote for quote in results.values())
         return {
             "symbols": symbols,
             "quotes": results,
-            "count": len(symbols)
+            "count": len(symbols),
+            "failed": failed
         }
     except Exception as e:
         logger.error(f"Error getting multiple quotes: {str(e)}")
         return {"error": f"Failed to get multiple quotes: {str(e)}"}
 
+@mcp.tool()
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss statistics of the server's market data cache and its upstream fetch pool.
+    
+    Returns:
+        Dictionary with cache entries, hits, misses, coalesced requests and hit rate, per data kind and in total,
+        plus per-host call, error and timeout counts of the fetch pool
+    """
+    return {"ttl_seconds": CACHE_TTLS, **cache.stats(), "fetch_pool": fetch_pool.stats()}
+
 if __name__ == "__main__":
     # Run the FastMCP server
     mcp.run("sse")
\ No newline at end of file
@@ -0,0 +1,281 @@
+"""Local columnar store of OHLCV bars, keyed by symbol and interval.
+
+Past bars do not change, so downloading a 10-year history again for every
+request wastes most of the transfer. :class:`PriceStore` keeps each series
+on disk as one flat binary file per column plus a small ``meta.json``:
+
+    <root>/<interval>/<SYMBOL>/timestamps.i8   UTC nanoseconds, ascending
+                               open.f8 high.f8 low.f8 close.f8 volume.i8
+                               meta.json       rows, timezone, coverage, fetch time
+
+New bars are appended in place: the stored tail from the first new
+timestamp on is truncated and the new rows are written after it. Range
+reads memory-map the columns and binary-search the timestamps, so only
+the requested rows are copied.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# yfinance column, file name and dtype of each stored column
+COLUMNS = (
+    ("Open", "open.f8", np.float64),
+    ("High", "high.f8", np.float64),
+    ("Low", "low.f8", np.float64),
+    ("Close", "close.f8", np.float64),
+    ("Volume", "volume.i8", np.int64),
+)
+TIMESTAMPS = "timestamps.i8"
+META = "meta.json"
+# covers_from of a series no full download has been stored for
+NOT_COVERED = int(np.iinfo(np.int64).max)
+
+# Calendar-based yfinance periods; "d" periods count trading sessions and are not mapped
+PERIOD_UNITS = {"wk": "weeks", "mo": "months", "y": "years"}
+
+
+class SeriesInfo(NamedTuple):
+    """What is stored for one symbol and interval."""
+    rows: int
+    first: Optional[pd.Timestamp]
+    last: Optional[pd.Timestamp]
+    # Bars are complete from this time on; None means since the symbol's first bar
+    covers_from: Optional[pd.Timestamp]
+    # Unix time of the last download merged in
+    fetched_at: float
+    tz: Optional[str]
+
+    def covers(self, start: Optional[pd.Timestamp]) -> bool:
+        """Whether every bar from ``start`` (None for all history) up to the last fetch is stored."""
+        if self.covers_from is None:
+            return True
+        return start is not None and start >= self.covers_from
+
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """First time covered by a yfinance ``period``, or None for ``max``.
+
+    Raises ValueError for periods counted in trading days (``1d``, ``5d``)
+    or not understood, which the store cannot resolve from calendar time.
+    """
+    now = pd.Timestamp.now(tz="UTC") if now is None else now
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    match = re.fullmatch(r"(\d+)(wk|mo|y)", period)
+    if not match:
+        raise ValueError(f"Period {period!r} cannot be served from the price store")
+    return now - pd.DateOffset(**{PERIOD_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def _column(frame: pd.DataFrame, column: str, dtype: type) -> np.ndarray:
+    # Missing prices stay NaN; volumes, stored as integers, become 0
+    values = frame[column] if column in frame else pd.Series(np.nan, index=frame.index)
+    if np.issubdtype(dtype, np.integer):
+        values = values.fillna(0)
+    return values.to_numpy(dtype=dtype)
+
+
+def _to_utc_ns(index: pd.Index) -> np.ndarray:
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    return index.tz_convert("UTC").as_unit("ns").asi8
+
+
+def _from_utc_ns(values: np.ndarray, tz: Optional[str]) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(pd.to_datetime(values, unit="ns", utc=True), name="Date")
+    return index.tz_convert(tz) if tz else index.tz_localize(None)
+
+
+class PriceStore:
+    """On-disk OHLCV series with in-place appends and memory-mapped range reads.
+
+    Args:
+        root: Directory holding one sub-directory per interval and symbol.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        if not re.fullmatch(r"[\w^][\w.^=-]*", symbol) or not re.fullmatch(r"\w+", interval):
+            raise ValueError(f"Invalid symbol or interval: {symbol!r}, {interval!r}")
+        return os.path.join(self.root, interval, symbol.upper())
+
+    def lock(self, symbol: str, interval: str) -> threading.Lock:
+        """Lock to hold while reading, fetching and merging one series."""
+        key = (symbol.upper(), interval)
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _meta(self, path: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(path, META)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        # A write interrupted between the columns and meta.json leaves files longer or shorter than recorded
+        lengths = [
+            os.path.getsize(file_path) // 8 if os.path.exists(file_path) else 0
+            for file_path in (os.path.join(path, name) for name in (TIMESTAMPS, *(c[1] for c in COLUMNS)))
+        ]
+        meta["rows"] = min(meta["rows"], *lengths)
+        return meta
+
+    def _write_meta(self, path: str, meta: dict) -> None:
+        tmp = os.path.join(path, META + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, META))
+
+    def _timestamps(self, path: str, rows: int) -> np.ndarray:
+        if rows == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.memmap(os.path.join(path, TIMESTAMPS), dtype=np.int64, mode="r", shape=(rows,))
+
+    def info(self, symbol: str, interval: str) -> Optional[SeriesInfo]:
+        """Row count, time range and coverage of a stored series, or None if there is none."""
+        path = self._dir(symbol, interval)
+        meta = self._meta(path)
+        if meta is None:
+            return None
+        timestamps = self._timestamps(path, meta["rows"])
+        ends = _from_utc_ns(timestamps[[0, -1]], meta["tz"]) if len(timestamps) else [None, None]
+        covers_from = meta["covers_from"]
+        return SeriesInfo(
+            rows=meta["rows"],
+            first=ends[0],
+            last=ends[1],
+            covers_from=None if covers_from is None else pd.Timestamp(covers_from, unit="ns", tz="UTC"),
+            fetched_at=meta["fetched_at"],
+            tz=meta["tz"],
+        )
+
+    def last_timestamps(self, symbol: str, interval: str, count: int) -> pd.DatetimeIndex:
+        """Times of the last ``count`` stored bars."""
+        path = self._dir(symbol, interval)
+        meta = self._meta(path)
+        if meta is None:
+            return _from_utc_ns(np.empty(0, dtype=np.int64), None)
+        return _from_utc_ns(np.array(self._timestamps(path, meta["rows"])[-count:]), meta["tz"])
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """Bars with ``start <= time < end`` as a yfinance-style frame (empty if none are stored)."""
+        path = self._dir(symbol, interval)
+        meta = self._meta(path)
+        rows = meta["rows"] if meta else 0
+        timestamps = self._timestamps(path, rows)
+        first = 0 if start is None else int(np.searchsorted(timestamps, _to_utc_ns([start])[0], side="left"))
+        last = rows if end is None else int(np.searchsorted(timestamps, _to_utc_ns([end])[0], side="left"))
+        last = max(first, last)
+        columns = {}
+        for column, name, dtype in COLUMNS:
+            if last > first:
+                columns[column] = np.array(np.memmap(os.path.join(path, name), dtype=dtype, mode="r", shape=(rows,))[first:last])
+            else:
+                columns[column] = np.empty(0, dtype=dtype)
+        return pd.DataFrame(columns, index=_from_utc_ns(np.array(timestamps[first:last]), meta["tz"] if meta else None))
+
+    def matches(self, symbol: str, interval: str, frame: pd.DataFrame, rtol: float = 1e-6) -> bool:
+        """Whether ``frame`` agrees with the stored closes of the bars both contain.
+
+        The last stored bar is skipped since it may have been stored while
+        still forming. A mismatch means Yahoo has adjusted past prices, e.g.
+        after a split or dividend, and the series must be downloaded again.
+        """
+        stored = self.read(symbol, interval, start=frame.index.min() if len(frame) else None).iloc[:-1]
+        if stored.empty or frame.empty:
+            return True
+        new = pd.Series(frame["Close"].to_numpy(dtype=np.float64), index=_to_utc_ns(frame.index))
+        old = pd.Series(stored["Close"].to_numpy(), index=_to_utc_ns(stored.index))
+        common = old.index.intersection(new.index)
+        return bool(np.allclose(old[common].to_numpy(), new[common].to_numpy(), rtol=rtol, equal_nan=True))
+
+    def merge(
+        self,
+        symbol: str,
+        interval: str,
+        frame: pd.DataFrame,
+        covers_from: Optional[pd.Timestamp] = None,
+        extend_coverage: bool = False,
+    ) -> int:
+        """Write the bars in ``frame``, replacing stored bars from its first timestamp on.
+
+        With ``extend_coverage`` the series is recorded as complete from
+        ``covers_from`` (None meaning all history), since ``frame`` is a full
+        download from then. Returns the stored row count.
+        """
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        meta = self._meta(path) or {"rows": 0, "tz": None, "covers_from": NOT_COVERED, "fetched_at": 0.0}
+        if extend_coverage:
+            new_from = None if covers_from is None else int(_to_utc_ns([covers_from])[0])
+            old_from = meta["covers_from"]
+            meta["covers_from"] = None if new_from is None or old_from is None else min(new_from, old_from)
+        meta["fetched_at"] = time.time()
+
+        frame = frame.sort_index()
+        frame = frame[~frame.index.duplicated(keep="last")]
+        if frame.empty:
+            self._write_meta(path, meta)
+            return meta["rows"]
+
+        new_ts = _to_utc_ns(frame.index)
+        stored_ts = self._timestamps(path, meta["rows"])
+        keep = int(np.searchsorted(stored_ts, new_ts[0], side="left"))
+        after = int(np.searchsorted(stored_ts, new_ts[-1], side="right"))
+        del stored_ts
+        if frame.index.tz is not None:
+            meta["tz"] = str(frame.index.tz)
+
+        if after < meta["rows"]:
+            # Stored bars follow the new ones: rebuild the series in full
+            stored = self.read(symbol, interval)
+            merged = pd.concat([stored.iloc[:keep], frame.reindex(columns=[c for c, _, _ in COLUMNS]), stored.iloc[after:]])
+            self._rewrite(path, merged, meta)
+            return meta["rows"]
+
+        columns = [(TIMESTAMPS, new_ts.astype(np.int64))]
+        for column, name, dtype in COLUMNS:
+            columns.append((name, _column(frame, column, dtype)))
+        for name, values in columns:
+            file_path = os.path.join(path, name)
+            with open(file_path, "ab") as f:
+                f.truncate(keep * 8)
+                f.seek(keep * 8)
+                values.tofile(f)
+        meta["rows"] = keep + len(frame)
+        self._write_meta(path, meta)
+        return meta["rows"]
+
+    def _rewrite(self, path: str, frame: pd.DataFrame, meta: dict) -> None:
+        for name, values in [(TIMESTAMPS, _to_utc_ns(frame.index))] + [
+            (name, _column(frame, column, dtype)) for column, name, dtype in COLUMNS
+        ]:
+            tmp = os.path.join(path, name + ".tmp")
+            values.tofile(tmp)
+            os.replace(tmp, os.path.join(path, name))
+        meta["rows"] = len(frame)
+        self._write_meta(path, meta)
+
+    def delete(self, symbol: str, interval: str) -> None:
+        """Remove a stored series."""
+        shutil.rmtree(self._dir(symbol, interval), ignore_errors=True)
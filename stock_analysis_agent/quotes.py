@@ -0,0 +1,78 @@
+"""Turn bulk price downloads and per-symbol info into quote records.
+
+``yf.download`` fetches daily bars for many symbols in one call, from which
+the latest and previous close of each symbol can be read. Names, market
+caps and P/E ratios only come from each symbol's ``Ticker.info``, so they
+are merged in when available.
+"""
+import math
+from typing import Any, Dict, Iterable, Optional
+
+import pandas as pd
+
+# Bars requested per symbol: enough to span a long weekend plus a holiday
+BULK_PERIOD = "5d"
+
+
+def prices_from_download(frame: pd.DataFrame, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Latest close, previous close and volume of each symbol in a ``yf.download`` frame.
+
+    Works with frames grouped by ticker or by field, and with the single
+    level columns returned for one symbol. Symbols without any close in the
+    frame are left out.
+    """
+    symbols = list(symbols)
+    if frame is None or frame.empty:
+        return {}
+    if isinstance(frame.columns, pd.MultiIndex):
+        # Put the field level second whichever way the frame was grouped
+        if "Close" in frame.columns.get_level_values(0):
+            frame = frame.swaplevel(axis=1)
+        closes = frame.xs("Close", axis=1, level=1)
+        volumes = frame.xs("Volume", axis=1, level=1) if "Volume" in frame.columns.get_level_values(1) else None
+    else:
+        if len(symbols) != 1:
+            raise ValueError("A frame without ticker columns can only hold one symbol")
+        closes = frame[["Close"]].set_axis(symbols, axis=1)
+        volumes = frame[["Volume"]].set_axis(symbols, axis=1) if "Volume" in frame else None
+
+    prices = {}
+    for symbol in symbols:
+        if symbol not in closes:
+            continue
+        series = closes[symbol].dropna()
+        if series.empty:
+            continue
+        as_of = series.index[-1]
+        volume = volumes[symbol].get(as_of) if volumes is not None and symbol in volumes else None
+        prices[symbol] = {
+            "current_price": float(series.iloc[-1]),
+            "previous_close": float(series.iloc[-2]) if len(series) > 1 else None,
+            "volume": int(volume) if volume is not None and not math.isnan(volume) else 0,
+            "as_of": as_of.isoformat(),
+        }
+    return prices
+
+
+def build_quote(symbol: str, price: Optional[Dict[str, Any]], info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Quote record for ``get_multiple_quotes``, preferring bulk prices over ``info``.
+
+    ``info`` fields missing from ``price`` are used as a fallback; fields
+    only ``info`` has are ``None`` when it was not fetched.
+    """
+    info = info or {}
+    price = price or {}
+    current = price.get("current_price", info.get("currentPrice", 0.0))
+    previous = price.get("previous_close") or info.get("previousClose") or 0.0
+    return {
+        "symbol": symbol,
+        "name": info.get("longName", ""),
+        "current_price": current,
+        "previous_close": previous,
+        "change": current - previous if previous else 0.0,
+        "change_percent": (current - previous) / previous * 100 if previous else 0.0,
+        "volume": price.get("volume", info.get("volume", 0)),
+        "market_cap": info.get("marketCap"),
+        "pe_ratio": info.get("forwardPE"),
+        "as_of": price.get("as_of"),
+    }
@@ -0,0 +1,97 @@
+"""Vectorized conversion of yfinance frames into JSON-ready tool responses.
+
+Converting a frame row by row with ``iterrows()`` and ``strftime`` costs a
+Python-level round trip per cell, which dominates ``period="max"`` daily or
+intraday history. :func:`serialize_frame` formats the date index and casts
+each column with one numpy operation per column instead.
+
+Three response shapes are supported:
+
+- ``records``: a list of ``{"date": ..., "open": ...}`` dicts, one per row.
+- ``split``: ``{"columns": [...], "data": [[...], ...]}``, one list per row.
+- ``columns``: ``{"date": [...], "open": [...]}``, one list per column, the
+  smallest on the wire since names are not repeated for every row.
+"""
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+import numpy as np
+import pandas as pd
+
+ORIENTS = ("records", "split", "columns")
+
+# Intervals whose bars start at midnight; others are formatted to the minute
+DAILY_INTERVALS = {"1d", "5d", "1wk", "1mo", "3mo"}
+
+# (output name, source column, type) for each serialized column
+ColumnSpec = Sequence[Tuple[str, str, Type]]
+
+
+def date_unit_for(interval: str) -> str:
+    """numpy datetime unit to format bars of ``interval`` with: days or minutes."""
+    return "D" if interval in DAILY_INTERVALS else "m"
+
+
+def format_dates(index: pd.Index, unit: str = "D") -> List[str]:
+    """ISO dates (``unit="D"``) or minutes (``unit="m"``) of a datetime index, in its own timezone."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        # Keep exchange-local wall-clock times rather than converting to UTC
+        index = index.tz_localize(None)
+    formatted = np.datetime_as_string(index.to_numpy().astype(f"datetime64[{unit}]"), unit=unit)
+    if unit != "D":
+        formatted = np.char.replace(formatted, "T", " ")
+    return formatted.tolist()
+
+
+def column_values(frame: pd.DataFrame, source: str, dtype: Type) -> List[Any]:
+    """One column as a list of JSON-safe Python values.
+
+    Missing columns become 0 for ints, None for floats and "" otherwise;
+    NaN floats become None.
+    """
+    if source not in frame:
+        return [0 if dtype is int else None if dtype is float else ""] * len(frame)
+    column = frame[source]
+    if dtype is int:
+        return pd.to_numeric(column, errors="coerce").fillna(0).to_numpy(dtype=np.int64).tolist()
+    if dtype is float:
+        values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+        nan = np.isnan(values)
+        if nan.any():
+            return np.where(nan, None, values).tolist()
+        return values.tolist()
+    return column.fillna("").astype(str).tolist()
+
+
+def serialize_frame(
+    frame: pd.DataFrame,
+    columns: ColumnSpec,
+    orient: str = "records",
+    date_key: str = "date",
+    date_unit: str = "D",
+) -> Any:
+    """Serialize ``frame`` as ``orient`` with its datetime index under ``date_key``.
+
+    Pass ``date_key=None`` to leave the index out, e.g. for frames without
+    dates.
+    """
+    if orient not in ORIENTS:
+        raise ValueError(f"Unknown response format {orient!r}; expected one of {', '.join(ORIENTS)}")
+    data: Dict[str, List[Any]] = {}
+    if date_key is not None:
+        data[date_key] = format_dates(frame.index, date_unit)
+    for name, source, dtype in columns:
+        data[name] = column_values(frame, source, dtype)
+
+    if orient == "columns":
+        return data
+    rows = zip(*data.values())
+    if orient == "split":
+        return {"columns": list(data), "data": [list(row) for row in rows]}
+    names = list(data)
+    return [dict(zip(names, row)) for row in rows]
+
+
+def serialize_series(series: pd.Series, name: str, dtype: Type = float, orient: str = "records", **kwargs) -> Any:
+    """Serialize a dated series such as dividends or splits as one ``name`` column."""
+    return serialize_frame(series.to_frame(name), [(name, name, dtype)], orient=orient, **kwargs)
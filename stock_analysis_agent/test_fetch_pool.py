@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from fetch_pool import FetchPool, FetchTimeout
+
+
+class TestFetchPool(unittest.TestCase):
+    """Unit tests for the bounded blocking-call pool."""
+
+    def test_blocking_calls_run_concurrently(self):
+        """Test sleeping calls overlap instead of blocking the event loop in turn."""
+        pool = FetchPool(max_workers=8, host_limit=8)
+
+        async def main():
+            started = time.perf_counter()
+            results = await asyncio.gather(*(pool.run("h", lambda i=i: time.sleep(0.1) or i) for i in range(8)))
+            return results, time.perf_counter() - started
+
+        results, elapsed = asyncio.run(main())
+        pool.shutdown()
+        self.assertEqual(results, list(range(8)))
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(pool.stats()["hosts"]["h"]["calls"], 8)
+
+    def test_host_limit_caps_concurrency(self):
+        """Test no more than the host's limit of calls run at once, while other hosts proceed."""
+        pool = FetchPool(max_workers=8, host_limit=2, host_limits={"other": 4})
+        running = {"h": 0, "other": 0}
+        peak = {"h": 0, "other": 0}
+        lock = threading.Lock()
+
+        def call(host):
+            with lock:
+                running[host] += 1
+                peak[host] = max(peak[host], running[host])
+            time.sleep(0.02)
+            with lock:
+                running[host] -= 1
+
+        async def main():
+            await asyncio.gather(*(pool.run(host, lambda host=host: call(host)) for host in ["h", "other"] * 6))
+
+        asyncio.run(main())
+        pool.shutdown()
+        self.assertEqual(peak, {"h": 2, "other": 4})
+
+    def test_timeout_keeps_slot_until_thread_returns(self):
+        """Test a timed-out call raises FetchTimeout but still counts against the host limit."""
+        pool = FetchPool(max_workers=2, host_limit=1, timeout=0.05)
+        release = threading.Event()
+
+        async def main():
+            with self.assertRaises(FetchTimeout):
+                await pool.run("h", release.wait)
+            self.assertEqual(pool.stats()["hosts"]["h"]["active"], 1)
+            with self.assertRaises(FetchTimeout):
+                await pool.run("h", lambda: "never started")
+            release.set()
+            await asyncio.sleep(0.05)
+            return await pool.run("h", lambda: "ok")
+
+        self.assertEqual(asyncio.run(main()), "ok")
+        pool.shutdown()
+        self.assertEqual(pool.stats()["hosts"]["h"]["timeouts"], 2)
+
+    def test_errors_propagate(self):
+        """Test an exception in the worker thread reaches the caller and is counted."""
+        pool = FetchPool()
+
+        async def main():
+            await pool.run("h", lambda: 1 / 0)
+
+        with self.assertRaises(ZeroDivisionError):
+            asyncio.run(main())
+        pool.shutdown()
+        self.assertEqual(pool.stats()["hosts"]["h"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import asyncio
+import unittest
+
+from market_cache import MarketDataCache
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMarketDataCache(unittest.TestCase):
+    """Unit tests for the TTL cache with request coalescing."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = MarketDataCache({"quote": 15, "splits": 86400}, clock=self.clock)
+        self.calls = 0
+
+    async def load(self, value="data", delay=0.0):
+        self.calls += 1
+        await asyncio.sleep(delay)
+        return value
+
+    def test_serves_hits_until_ttl_expires(self):
+        """Test a cached value is reused within its TTL and refetched after it."""
+        async def main():
+            await self.cache.get("quote", "AAPL", self.load)
+            await self.cache.get("quote", "AAPL", self.load)
+            self.clock.now = 16
+            await self.cache.get("quote", "AAPL", self.load)
+
+        asyncio.run(main())
+        self.assertEqual(self.calls, 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+
+    def test_ttl_is_per_kind(self):
+        """Test a long-lived kind outlives a short-lived one."""
+        async def main():
+            await self.cache.get("quote", "AAPL", self.load)
+            await self.cache.get("splits", "AAPL", self.load)
+            self.clock.now = 60
+            await self.cache.get("quote", "AAPL", self.load)
+            await self.cache.get("splits", "AAPL", self.load)
+
+        asyncio.run(main())
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(self.cache.stats()["by_kind"]["splits"]["hits"], 1)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        """Test N concurrent callers for one key trigger a single upstream fetch."""
+        async def main():
+            return await asyncio.gather(*(
+                self.cache.get("quote", "MSFT", lambda: self.load("msft", delay=0.01)) for _ in range(5)
+            ))
+
+        self.assertEqual(asyncio.run(main()), ["msft"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats()["coalesced"], 4)
+
+    def test_errors_are_shared_and_not_cached(self):
+        """Test a failed fetch is raised to every waiter and retried next time."""
+        async def fail():
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        async def main():
+            results = await asyncio.gather(
+                self.cache.get("quote", "X", fail), self.cache.get("quote", "X", fail), return_exceptions=True
+            )
+            value = await self.cache.get("quote", "X", self.load)
+            return results, value
+
+        results, value = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual((self.calls, value), (2, "data"))
+
+    def test_uncached_kind_and_lru_limit(self):
+        """Test kinds without a TTL are not stored and the entry limit evicts the oldest."""
+        cache = MarketDataCache({"quote": 15}, max_entries=2, clock=self.clock)
+
+        async def main():
+            await cache.get("news", "AAPL", self.load)
+            for symbol in ("A", "B", "C"):
+                await cache.get("quote", symbol, self.load)
+
+        asyncio.run(main())
+        self.assertEqual([key for _, key in cache._entries], ["B", "C"])
+
+
+    def test_get_many_loads_misses_in_one_call(self):
+        """Test cached keys are served and all misses go to a single bulk load."""
+        requested = []
+
+        async def load_many(keys):
+            requested.append(keys)
+            return {key: key.lower() for key in keys if key != "BAD"}
+
+        async def main():
+            await self.cache.get("quote", "A", lambda: self.load("a"))
+            first = await self.cache.get_many("quote", ["A", "B", "BAD", "B"], load_many)
+            second = await self.cache.get_many("quote", ["A", "B", "BAD"], load_many)
+            return first, second
+
+        first, second = asyncio.run(main())
+        self.assertEqual(first, {"A": "a", "B": "b"})
+        self.assertEqual(second, first)
+        self.assertEqual(requested, [["B", "BAD"], ["BAD"]])
+
+    def test_get_many_joins_in_flight_loads(self):
+        """Test keys already being loaded are awaited instead of fetched again."""
+        async def load_many(keys):
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            return {key: key for key in keys}
+
+        async def main():
+            return await asyncio.gather(
+                self.cache.get_many("quote", ["A", "B"], load_many),
+                self.cache.get_many("quote", ["B", "C"], load_many),
+                self.cache.get("quote", "A", lambda: self.load("unused")),
+            )
+
+        first, second, single = asyncio.run(main())
+        self.assertEqual((first, second, single), ({"A": "A", "B": "B"}, {"B": "B", "C": "C"}, "A"))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.cache.stats()["coalesced"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from price_store import PriceStore, period_start
+
+
+def bars(start, periods, close_from=1.0):
+    """Daily OHLCV bars at midnight New York time."""
+    index = pd.date_range(start, periods=periods, freq="D", tz="America/New_York", name="Date")
+    close = np.arange(periods, dtype=float) + close_from
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close,
+                         "Volume": np.arange(periods) * 10, "Dividends": 0.0}, index=index)
+
+
+class TestPeriodStart(unittest.TestCase):
+    """Unit tests for mapping yfinance periods to start times."""
+
+    def test_calendar_periods(self):
+        """Test calendar periods, ytd and max resolve, while trading-day periods are refused."""
+        now = pd.Timestamp("2025-06-15 12:00", tz="UTC")
+        self.assertEqual(period_start("10y", now), pd.Timestamp("2015-06-15 12:00", tz="UTC"))
+        self.assertEqual(period_start("3mo", now), pd.Timestamp("2025-03-15 12:00", tz="UTC"))
+        self.assertEqual(period_start("ytd", now), pd.Timestamp("2025-01-01", tz="UTC"))
+        self.assertIsNone(period_start("max", now))
+        with self.assertRaises(ValueError):
+            period_start("5d", now)
+
+
+class TestPriceStore(unittest.TestCase):
+    """Unit tests for the on-disk OHLCV store."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = PriceStore(self.tmp.name)
+        self.store.merge("AAPL", "1d", bars("2025-01-01", 10), covers_from=pd.Timestamp("2024-12-01", tz="UTC"),
+                         extend_coverage=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_and_range_read(self):
+        """Test bars come back with their timezone and a range read returns only that range."""
+        frame = self.store.read("AAPL", "1d", start=pd.Timestamp("2025-01-03", tz="America/New_York"),
+                                end=pd.Timestamp("2025-01-05", tz="America/New_York"))
+        self.assertEqual(list(frame.index.strftime("%Y-%m-%d")), ["2025-01-03", "2025-01-04"])
+        self.assertEqual(str(frame.index.tz), "America/New_York")
+        self.assertEqual(frame["Close"].tolist(), [3.0, 4.0])
+        self.assertEqual(frame["Volume"].dtype, np.int64)
+        self.assertNotIn("Dividends", frame)
+
+    def test_tail_merge_replaces_overlap_and_appends(self):
+        """Test new bars overwrite the stored tail from their first timestamp and extend the series."""
+        self.store.merge("AAPL", "1d", bars("2025-01-09", 4, close_from=90.0))
+        frame = self.store.read("AAPL", "1d")
+        self.assertEqual(len(frame), 12)
+        self.assertEqual(frame["Close"].tolist()[-5:], [8.0, 90.0, 91.0, 92.0, 93.0])
+        self.assertEqual(os.path.getsize(os.path.join(self.tmp.name, "1d", "AAPL", "close.f8")), 12 * 8)
+
+    def test_backfill_rebuilds_and_extends_coverage(self):
+        """Test bars before and around the stored range merge into one ordered series."""
+        info = self.store.info("AAPL", "1d")
+        self.assertTrue(info.covers(pd.Timestamp("2024-12-15", tz="UTC")))
+        self.assertFalse(info.covers(pd.Timestamp("2024-01-01", tz="UTC")))
+        self.store.merge("AAPL", "1d", bars("2024-12-25", 10, close_from=50.0), covers_from=None, extend_coverage=True)
+        frame = self.store.read("AAPL", "1d")
+        self.assertTrue(frame.index.is_monotonic_increasing)
+        self.assertEqual(len(frame), 17)
+        self.assertEqual(frame["Close"].iloc[-1], 10.0)
+        self.assertTrue(self.store.info("AAPL", "1d").covers(None))
+
+    def test_matches_detects_adjusted_history(self):
+        """Test overlapping closes are compared, ignoring the possibly unfinished last stored bar."""
+        tail = bars("2025-01-09", 3, close_from=9.0)
+        self.assertTrue(self.store.matches("AAPL", "1d", tail))
+        tail.iloc[1, tail.columns.get_loc("Close")] = 99.0
+        self.assertTrue(self.store.matches("AAPL", "1d", tail))
+        tail.iloc[0, tail.columns.get_loc("Close")] = 4.5
+        self.assertFalse(self.store.matches("AAPL", "1d", tail))
+
+    def test_interrupted_write_is_truncated_on_read(self):
+        """Test rows written to only some columns are ignored."""
+        with open(os.path.join(self.tmp.name, "1d", "AAPL", "close.f8"), "ab") as f:
+            np.array([1.0, 2.0]).tofile(f)
+        with open(os.path.join(self.tmp.name, "1d", "AAPL", "open.f8"), "r+b") as f:
+            f.truncate(9 * 8)
+        self.assertEqual(len(self.store.read("AAPL", "1d")), 9)
+
+    def test_unknown_series_and_bad_symbol(self):
+        """Test an absent series reads as empty and path-like symbols are rejected."""
+        self.assertIsNone(self.store.info("MSFT", "1d"))
+        self.assertTrue(self.store.read("MSFT", "1d").empty)
+        with self.assertRaises(ValueError):
+            self.store.read("..", "1d")
+
+
+if __name__ == "__main__":
+    unittest.main()
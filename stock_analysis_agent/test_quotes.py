@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from quotes import build_quote, prices_from_download
+
+
+def download_frame(closes, group_by="ticker"):
+    """A frame shaped like ``yf.download`` output for {symbol: [closes]}."""
+    index = pd.date_range("2025-01-06", periods=len(next(iter(closes.values()))), freq="D", name="Date")
+    columns = {}
+    for symbol, values in closes.items():
+        columns[(symbol, "Close")] = values
+        columns[(symbol, "Volume")] = [1000] * len(values)
+    frame = pd.DataFrame(columns, index=index)
+    return frame if group_by == "ticker" else frame.swaplevel(axis=1)
+
+
+class TestPricesFromDownload(unittest.TestCase):
+    """Unit tests for reading quotes out of bulk downloads."""
+
+    def test_latest_and_previous_close(self):
+        """Test the last two closes are used, whichever way columns are grouped."""
+        for group_by in ("ticker", "column"):
+            frame = download_frame({"AAPL": [1.0, 2.0, 3.0], "MSFT": [5.0, 6.0, 7.0]}, group_by)
+            prices = prices_from_download(frame, ["AAPL", "MSFT"])
+            self.assertEqual(prices["AAPL"]["current_price"], 3.0)
+            self.assertEqual(prices["MSFT"]["previous_close"], 6.0)
+            self.assertEqual(prices["MSFT"]["volume"], 1000)
+
+    def test_trailing_gaps_and_failed_symbols(self):
+        """Test a symbol's last bar is its own latest close and symbols without data are omitted."""
+        frame = download_frame({"AAPL": [1.0, 2.0, np.nan], "BAD": [np.nan] * 3})
+        prices = prices_from_download(frame, ["AAPL", "BAD", "GONE"])
+        self.assertEqual(list(prices), ["AAPL"])
+        self.assertEqual((prices["AAPL"]["current_price"], prices["AAPL"]["previous_close"]), (2.0, 1.0))
+        self.assertTrue(prices["AAPL"]["as_of"].startswith("2025-01-07"))
+
+    def test_single_level_columns(self):
+        """Test a frame for one symbol without a ticker level is read as that symbol."""
+        frame = download_frame({"AAPL": [1.0, 2.0]}).droplevel(0, axis=1)
+        self.assertEqual(prices_from_download(frame, ["AAPL"])["AAPL"]["current_price"], 2.0)
+
+
+class TestBuildQuote(unittest.TestCase):
+    """Unit tests for merging bulk prices with per-symbol info."""
+
+    def test_prices_win_and_info_adds_details(self):
+        """Test bulk prices are preferred while name and market cap come from info."""
+        price = {"current_price": 110.0, "previous_close": 100.0, "volume": 5, "as_of": "2025-01-07"}
+        quote = build_quote("AAPL", price, {"currentPrice": 1.0, "longName": "Apple", "marketCap": 3})
+        self.assertEqual((quote["current_price"], quote["name"], quote["market_cap"]), (110.0, "Apple", 3))
+        self.assertAlmostEqual(quote["change_percent"], 10.0)
+
+    def test_info_only_fallback(self):
+        """Test a quote can be built from info alone, without dividing by a missing close."""
+        quote = build_quote("AAPL", None, {"currentPrice": 5.0})
+        self.assertEqual((quote["current_price"], quote["change_percent"], quote["as_of"]), (5.0, 0.0, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
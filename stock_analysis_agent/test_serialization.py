@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from serialization import date_unit_for, format_dates, serialize_frame, serialize_series
+
+COLUMNS = [("close", "Close", float), ("volume", "Volume", int), ("firm", "Firm", str)]
+
+
+def history(periods=3, freq="D", tz="America/New_York"):
+    """A small OHLCV-like frame with a timezone-aware index."""
+    index = pd.date_range("2025-01-06 09:30", periods=periods, freq=freq, tz=tz)
+    return pd.DataFrame({"Close": np.arange(periods, dtype=float) + 0.5, "Volume": np.arange(periods) * 10.0}, index=index)
+
+
+class TestFormatDates(unittest.TestCase):
+    """Unit tests for vectorized date formatting."""
+
+    def test_daily_and_intraday(self):
+        """Test days for daily bars and local wall-clock minutes for intraday bars."""
+        self.assertEqual(format_dates(history().index), ["2025-01-06", "2025-01-07", "2025-01-08"])
+        self.assertEqual(format_dates(history(2, "min").index, "m"), ["2025-01-06 09:30", "2025-01-06 09:31"])
+        self.assertEqual((date_unit_for("1d"), date_unit_for("1m")), ("D", "m"))
+
+    def test_matches_strftime(self):
+        """Test the vectorized result equals per-row strftime."""
+        index = history(500, "h").index
+        self.assertEqual(format_dates(index), [date.strftime("%Y-%m-%d") for date in index])
+
+
+class TestSerializeFrame(unittest.TestCase):
+    """Unit tests for the response shapes."""
+
+    def test_records_cast_types_and_fill_missing(self):
+        """Test values become plain Python types, NaN becomes None and absent columns get defaults."""
+        frame = history()
+        frame.iloc[1, 0] = np.nan
+        records = serialize_frame(frame, COLUMNS)
+        self.assertEqual(records[0], {"date": "2025-01-06", "close": 0.5, "volume": 0, "firm": ""})
+        self.assertIsNone(records[1]["close"])
+        self.assertIs(type(records[2]["volume"]), int)
+
+    def test_split_and_columns_hold_the_same_values(self):
+        """Test all shapes carry the same data in different layouts."""
+        frame = history()
+        records = serialize_frame(frame, COLUMNS)
+        split = serialize_frame(frame, COLUMNS, orient="split")
+        columns = serialize_frame(frame, COLUMNS, orient="columns")
+        self.assertEqual(split["columns"], ["date", "close", "volume", "firm"])
+        self.assertEqual([dict(zip(split["columns"], row)) for row in split["data"]], records)
+        self.assertEqual(columns["close"], [record["close"] for record in records])
+
+    def test_series_and_unknown_orient(self):
+        """Test a dated series serializes as one named column and bad shapes are rejected."""
+        series = history()["Close"]
+        self.assertEqual(serialize_series(series, "dividend", orient="columns")["dividend"], [0.5, 1.5, 2.5])
+        with self.assertRaises(ValueError):
+            serialize_frame(history(), COLUMNS, orient="table")
+
+
+if __name__ == "__main__":
+    unittest.main()